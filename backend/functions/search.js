@@ -88,7 +88,7 @@ exports.semanticSearch = onCall(async (data, context) => {
     const articles = [];
     snapshot.forEach((doc) => {
       const data = doc.data();
-      const { full_clean_content, keywords, ...article } = data;
+      const { full_clean_content, keywords, content_ref, raw_content_ref, ...article } = data;
       articles.push({ id: doc.id, ...article });
     });
 
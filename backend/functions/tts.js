@@ -11,6 +11,9 @@ const {verifyAuth} = require("./src/utils/auth");
 
 // --- Configuration ---
 const KOKORO_TTS_URL = process.env.KOKORO_TTS_URL || "http://localhost:8080/tts";
+// Time the TTS service may spend on a request before the caller gives up
+// (below the callable's 60s timeout); sent as X-Request-Deadline.
+const TTS_DEADLINE_SECONDS = Number(process.env.TTS_DEADLINE_SECONDS || 50);
 
 // --- Callable Cloud Function Definition ---
 exports.generateTTS = functions.https.onCall(async (data, context) => {
@@ -32,10 +35,25 @@ exports.generateTTS = functions.https.onCall(async (data, context) => {
     console.log(`Sending text to Kokoro TTS service: "${text.substring(0, 60)}..."`);
     const response = await fetch(KOKORO_TTS_URL, {
       method: "POST",
-      headers: {"Content-Type": "application/json"},
+      headers: {
+        "Content-Type": "application/json",
+        "X-Priority": "interactive",
+        "X-Request-Deadline": String(Date.now() / 1000 + TTS_DEADLINE_SECONDS),
+      },
       body: JSON.stringify({text}),
     });
 
+    // Saturated (429) or dropped past the deadline (503): tell the client to retry later
+    if (response.status === 429 || response.status === 503) {
+      const retryAfter = response.headers.get("retry-after") || "1";
+      console.warn(`Kokoro TTS service overloaded (${response.status}), retry after ${retryAfter}s`);
+      throw new functions.https.HttpsError(
+          "resource-exhausted",
+          "Speech generation is busy right now. Please try again shortly.",
+          {retryAfter: Number(retryAfter)},
+      );
+    }
+
     if (!response.ok) {
       const errText = await response.text();
       console.error(`Kokoro TTS service error (${response.status}): ${errText}`);
@@ -58,6 +76,9 @@ exports.generateTTS = functions.https.onCall(async (data, context) => {
       mime_type: result.mime_type || "audio/wav",
     };
   } catch (error) {
+    if (error instanceof functions.https.HttpsError) {
+      throw error;
+    }
     console.error("Error calling Kokoro TTS service:", error);
     throw new functions.https.HttpsError(
         "internal",
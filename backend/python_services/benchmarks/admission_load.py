@@ -0,0 +1,203 @@
+"""
+Admission Control Load Test
+---------------------------
+Drives an inference endpoint well past its capacity with open-loop
+(Poisson) arrivals, a mix of interactive and batch requests, and a client
+timeout, and compares latency with and without the AdmissionController
+(shared/runtime/admission.py):
+
+  * p50/p99 latency of completed requests, per lane
+  * how many were rejected (429/503) and how fast
+  * wasted work: requests that finished after their client gave up
+  * goodput: requests answered within the client timeout per second
+
+By default it runs in-process against a simulated CPU-bound model (one
+request at a time, --service-ms each), so it is reproducible offline. It
+fails (exit code 1) unless the admitted interactive p99 stays within
+(max_queue / max_in_flight + 2) service times at overload.
+
+With --url it loads a running service instead, e.g. the embedding service:
+    python admission_load.py --url http://localhost:8080/embed --token <ID token> --rate 40
+
+Usage:
+    python admission_load.py [--rate 100] [--duration 5] [--service-ms 20] [--batch-share 0.3]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import urllib.error
+import urllib.request
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+python_services_dir = os.path.abspath(os.path.join(current_dir, '..'))
+for path in (current_dir, python_services_dir):
+    if path not in sys.path:
+        sys.path.append(path)
+
+from shared.observability.metrics import percentile
+from shared.runtime.admission import AdmissionController, AdmissionRejected, BATCH, INTERACTIVE
+
+
+class SimulatedModel:
+    """A CPU-bound model on `cores` cores: each call holds a core for `service_seconds`."""
+
+    def __init__(self, service_seconds: float, cores: int = 1):
+        self.service_seconds = service_seconds
+        self._cores = threading.Semaphore(cores)
+        self.calls = 0
+
+    def __call__(self):
+        with self._cores:
+            self.calls += 1
+            time.sleep(self.service_seconds)
+
+
+def in_process_target(model: SimulatedModel, controller: AdmissionController | None):
+    """A request handler: admission (if any), then the model. Returns the HTTP status it would answer."""
+    def handle(lane: str, deadline_epoch: float) -> int:
+        if controller is None:
+            model()
+            return 200
+        try:
+            with controller.admit(lane, time.monotonic() + (deadline_epoch - time.time())):
+                model()
+            return 200
+        except AdmissionRejected as e:
+            return e.status
+    return handle
+
+
+def http_target(url: str, token: str | None, text: str):
+    """A request sender for a running service; 'text' is the JSON body field of /embed and /tts."""
+    body = json.dumps({"text": text}).encode("utf-8")
+
+    def handle(lane: str, deadline_epoch: float) -> int:
+        headers = {"Content-Type": "application/json", "X-Priority": lane, "X-Request-Deadline": f"{deadline_epoch:.3f}"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        request = urllib.request.Request(url, data=body, headers=headers, method="POST")
+        try:
+            with urllib.request.urlopen(request, timeout=max(deadline_epoch - time.time(), 0.1) + 5) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+        except Exception:
+            return 0  # timeout or connection error
+    return handle
+
+
+def run_load(handle, rate: float, duration: float, batch_share: float, client_timeout: float, seed: int = 7) -> dict:
+    """
+    Sends Poisson arrivals at `rate` per second for `duration` seconds, one
+    thread per request, and summarises the outcomes per lane.
+    """
+    rng = random.Random(seed)
+    records, lock, threads = [], threading.Lock(), []
+
+    def one(lane):
+        started = time.time()
+        status = handle(lane, started + client_timeout)
+        with lock:
+            records.append((lane, status, time.time() - started))
+
+    began = time.time()
+    next_at = began
+    while next_at - began < duration:
+        time.sleep(max(0.0, next_at - time.time()))
+        lane = BATCH if rng.random() < batch_share else INTERACTIVE
+        thread = threading.Thread(target=one, args=(lane,), daemon=True)
+        thread.start()
+        threads.append(thread)
+        next_at += rng.expovariate(rate)
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - began
+
+    result = {}
+    for lane in (INTERACTIVE, BATCH):
+        rows = [r for r in records if r[0] == lane]
+        done = sorted(latency for _, status, latency in rows if status == 200)
+        rejected = sorted(latency for _, status, latency in rows if status in (429, 503))
+        result[lane] = {
+            "sent": len(rows),
+            "completed": len(done),
+            "rejected_429": sum(1 for _, status, _ in rows if status == 429),
+            "rejected_503": sum(1 for _, status, _ in rows if status == 503),
+            "failed": sum(1 for _, status, _ in rows if status not in (200, 429, 503)),
+            "p50_ms": round(percentile(done, 50) * 1000, 1) if done else None,
+            "p95_ms": round(percentile(done, 95) * 1000, 1) if done else None,
+            "p99_ms": round(percentile(done, 99) * 1000, 1) if done else None,
+            "reject_p99_ms": round(percentile(rejected, 99) * 1000, 1) if rejected else None,
+            "wasted": sum(1 for latency in done if latency > client_timeout),
+            "goodput_per_s": round(sum(1 for latency in done if latency <= client_timeout) / elapsed, 2),
+        }
+    return result
+
+
+def compare(rate: float = 100, duration: float = 5, service_ms: float = 20, batch_share: float = 0.3,
+            client_timeout: float = 2.0, max_in_flight: int = 1, max_queue: int = 4) -> dict:
+    """Runs the same overload in-process without and with admission control."""
+    service = service_ms / 1000
+    runs = {}
+    for mode in ("uncontrolled", "admission"):
+        model = SimulatedModel(service)
+        controller = AdmissionController("load_test", max_in_flight=max_in_flight, max_queue=max_queue) \
+            if mode == "admission" else None
+        runs[mode] = run_load(in_process_target(model, controller), rate, duration, batch_share, client_timeout)
+        runs[mode]["model_calls"] = model.calls
+
+    bound_ms = (max_queue / max_in_flight + 2) * service_ms
+    p99 = runs["admission"][INTERACTIVE]["p99_ms"]
+    runs["offered_load"] = round(rate * service / max_in_flight, 2)
+    runs["interactive_p99_bound_ms"] = bound_ms
+    runs["bounded"] = p99 is not None and p99 <= bound_ms
+    return runs
+
+
+def _print_run(name: str, run: dict):
+    print(f"\n{name}")
+    print(f"   {'lane':<13}{'sent':>6}{'done':>6}{'429':>6}{'503':>6}{'p50 ms':>10}{'p99 ms':>10}{'wasted':>8}{'goodput/s':>11}")
+    for lane in (INTERACTIVE, BATCH):
+        r = run[lane]
+        print(f"   {lane:<13}{r['sent']:>6}{r['completed']:>6}{r['rejected_429']:>6}{r['rejected_503']:>6}"
+              f"{str(r['p50_ms']):>10}{str(r['p99_ms']):>10}{r['wasted']:>8}{r['goodput_per_s']:>11}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Overload an inference endpoint with and without admission control.")
+    parser.add_argument("--rate", type=float, default=100, help="Requests per second (capacity is 1000/service-ms).")
+    parser.add_argument("--duration", type=float, default=5, help="Seconds of load.")
+    parser.add_argument("--service-ms", type=float, default=20, help="Simulated inference time per request.")
+    parser.add_argument("--batch-share", type=float, default=0.3, help="Fraction of requests sent as 'batch'.")
+    parser.add_argument("--client-timeout", type=float, default=2.0, help="Seconds a client waits (sent as the deadline).")
+    parser.add_argument("--max-in-flight", type=int, default=1)
+    parser.add_argument("--max-queue", type=int, default=4)
+    parser.add_argument("--url", help="Load a running service instead of the in-process simulation.")
+    parser.add_argument("--token", help="Firebase ID token for --url.")
+    parser.add_argument("--text", default="What is happening with interest rates this week?", help="Request text for --url.")
+    args = parser.parse_args()
+
+    if args.url:
+        run = run_load(http_target(args.url, args.token, args.text), args.rate, args.duration, args.batch_share,
+                       args.client_timeout)
+        _print_run(f"{args.url} at {args.rate}/s", run)
+        return
+
+    runs = compare(args.rate, args.duration, args.service_ms, args.batch_share, args.client_timeout,
+                   args.max_in_flight, args.max_queue)
+    print(f"Offered load: {runs['offered_load']}x capacity")
+    _print_run("Without admission control", runs["uncontrolled"])
+    _print_run("With admission control", runs["admission"])
+    print(f"\nInteractive p99 {runs['admission'][INTERACTIVE]['p99_ms']} ms, bound {runs['interactive_p99_bound_ms']} ms: "
+          f"{'✅ bounded' if runs['bounded'] else '❌ NOT bounded'}")
+    sys.exit(0 if runs["bounded"] else 1)
+
+
+if __name__ == "__main__":
+    main()
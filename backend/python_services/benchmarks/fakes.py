@@ -0,0 +1,290 @@
+"""
+Local stand-ins for the remote services the hot paths talk to, so the
+benchmarks run offline and measure our code rather than the network:
+
+  * InMemoryFirestore: the subset of the Firestore client API the code uses,
+    with an optional simulated round-trip latency per RPC.
+  * install_fake_firestore(): routes firebase_admin to an InMemoryFirestore,
+    so modules that connect at import time can be imported offline.
+  * fake_chat_model(): a LangChain chat model that answers instantly (or
+    after a simulated, token-dependent delay) instead of calling Gemini, and
+    counts the calls and prompt tokens it received.
+  * FakeKPipeline: the parts of Kokoro's KPipeline the TTS service uses,
+    with simulated grapheme-to-phoneme and inference costs.
+"""
+
+import re
+import copy
+import json
+import time
+import threading
+from collections import namedtuple
+
+
+# --- Firestore ---
+class FakeSnapshot:
+    def __init__(self, reference, data):
+        self.reference = reference
+        self.id = reference.id
+        self._data = data
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self):
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+    def get(self, field):
+        return (self._data or {}).get(field)
+
+
+class FakeDocumentReference:
+    def __init__(self, db, collection: str, doc_id: str):
+        self._db = db
+        self.collection_name = collection
+        self.id = doc_id
+
+    def _store(self) -> dict:
+        return self._db._collections.setdefault(self.collection_name, {})
+
+    def get(self, field_paths=None):
+        self._db._rpc()
+        return self._db._snapshot(self, field_paths)
+
+    def set(self, data: dict, merge: bool = False):
+        self._db._rpc()
+        self._db._write(self, data, merge)
+
+    def update(self, data: dict):
+        self._db._rpc()
+        self._db._write(self, data, merge=True)
+
+    def delete(self):
+        self._db._rpc()
+        with self._db._lock:
+            self._store().pop(self.id, None)
+
+
+class FakeQuery:
+    def __init__(self, db, collection: str, filters=(), limit=None):
+        self._db = db
+        self._collection = collection
+        self._filters = list(filters)
+        self._limit = limit
+
+    def document(self, doc_id: str) -> FakeDocumentReference:
+        return FakeDocumentReference(self._db, self._collection, doc_id)
+
+    def where(self, field, op, value):
+        return FakeQuery(self._db, self._collection, self._filters + [(field, op, value)], self._limit)
+
+    def limit(self, count: int):
+        return FakeQuery(self._db, self._collection, self._filters, count)
+
+    def select(self, field_paths):
+        return self
+
+    def stream(self):
+        self._db._rpc()
+        ops = {"==": lambda a, b: a == b, "<": lambda a, b: a is not None and a < b,
+               ">": lambda a, b: a is not None and a > b, "in": lambda a, b: a in b}
+        with self._db._lock:
+            items = list(self._db._collections.get(self._collection, {}).items())
+        matched = 0
+        for doc_id, data in items:
+            if all(ops[op](data.get(field), value) for field, op, value in self._filters):
+                yield FakeSnapshot(self.document(doc_id), copy.deepcopy(data))
+                matched += 1
+                if self._limit is not None and matched >= self._limit:
+                    return
+
+    def get(self):
+        return list(self.stream())
+
+
+class FakeWriteBatch:
+    def __init__(self, db):
+        self._db = db
+        self._ops = []
+
+    def set(self, ref, data, merge=False):
+        self._ops.append((ref, data, merge))
+
+    def update(self, ref, data):
+        self._ops.append((ref, data, True))
+
+    def commit(self):
+        self._db._rpc()
+        for ref, data, merge in self._ops:
+            self._db._write(ref, data, merge)
+        self._ops = []
+
+
+class InMemoryFirestore:
+    """
+    Dict-backed Firestore look-alike. Every RPC (get, set, get_all, commit,
+    stream) sleeps `rpc_latency` seconds so round-trip savings show up.
+    """
+
+    def __init__(self, rpc_latency: float = 0.0):
+        self.rpc_latency = rpc_latency
+        self.rpc_count = 0
+        self._collections = {}
+        self._lock = threading.Lock()
+
+    def _rpc(self):
+        self.rpc_count += 1
+        if self.rpc_latency:
+            time.sleep(self.rpc_latency)
+
+    def _snapshot(self, ref, field_paths=None):
+        with self._lock:
+            data = ref._store().get(ref.id)
+        if data is not None and field_paths is not None:
+            data = {k: v for k, v in data.items() if k in field_paths}
+        return FakeSnapshot(ref, copy.deepcopy(data) if data is not None else None)
+
+    def _write(self, ref, data, merge):
+        with self._lock:
+            store = ref._store()
+            if merge and ref.id in store:
+                store[ref.id].update(copy.deepcopy(data))
+            else:
+                store[ref.id] = copy.deepcopy(data)
+
+    def collection(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    def get_all(self, refs, field_paths=None):
+        self._rpc()
+        for ref in refs:
+            yield self._snapshot(ref, field_paths)
+
+    def batch(self) -> FakeWriteBatch:
+        return FakeWriteBatch(self)
+
+    def load(self, collection: str, documents: list[dict]):
+        """Bulk-loads documents (each with an 'id' key) without counting RPCs."""
+        store = self._collections.setdefault(collection, {})
+        for doc in documents:
+            store[doc["id"]] = {k: v for k, v in doc.items() if k != "id"}
+
+
+def install_fake_firestore(db: InMemoryFirestore) -> bool:
+    """
+    Makes firebase_admin hand out `db` instead of connecting, so modules that
+    initialise Firebase at import time (shared.database.firestore_client,
+    clean_content) import offline. Returns False if firebase_admin is missing.
+    """
+    try:
+        import firebase_admin
+        from firebase_admin import credentials, firestore
+    except ImportError:
+        return False
+    firebase_admin._apps.setdefault("[DEFAULT]", object())
+    firebase_admin.initialize_app = lambda *args, **kwargs: None
+    credentials.Certificate = lambda *args, **kwargs: None
+    firestore.client = lambda *args, **kwargs: db
+    return True
+
+
+# --- LLM ---
+FAKE_SUMMARY = "\n".join(f"* Key point {i}: the article reports a development." for i in range(1, 5))
+
+
+def fake_chat_model(latency: float = 0.0, per_1k_tokens: float = 0.0, count_tokens=None, drop_every: int = 0):
+    """
+    Returns a LangChain chat model that replies with a fixed bulleted summary
+    instead of calling Gemini. Packed prompts (articles in <article id="...">
+    tags) get a JSON object keyed by article ID; with `drop_every` = n, every
+    n-th ID is left out to exercise the fallback path. Each call sleeps
+    `latency` seconds plus `per_1k_tokens` seconds per thousand prompt tokens
+    (counted with `count_tokens`), and the model keeps totals in `.calls` and
+    `.prompt_tokens`. Requires langchain-core.
+    """
+    from langchain_core.language_models.chat_models import SimpleChatModel
+
+    class MeteredFakeChatModel(SimpleChatModel):
+        latency: float = 0.0
+        per_1k_tokens: float = 0.0
+        calls: int = 0
+        prompt_tokens: int = 0
+        packed_ids_seen: int = 0
+
+        @property
+        def _llm_type(self) -> str:
+            return "fake-gemini"
+
+        def _call(self, messages, stop=None, run_manager=None, **kwargs) -> str:
+            prompt = "".join(str(message.content) for message in messages)
+            tokens = count_tokens(prompt) if count_tokens else len(prompt) // 4
+            self.calls += 1
+            self.prompt_tokens += tokens
+            delay = self.latency + self.per_1k_tokens * tokens / 1000
+            if delay:
+                time.sleep(delay)
+
+            ids = re.findall(r'<article id="([^"]+)">', prompt)
+            if not ids:
+                return FAKE_SUMMARY
+            reply = {}
+            for doc_id in ids:
+                self.packed_ids_seen += 1
+                if not (drop_every and self.packed_ids_seen % drop_every == 0):
+                    reply[doc_id] = [line[2:] for line in FAKE_SUMMARY.splitlines()]
+            return "```json\n" + json.dumps(reply) + "\n```"
+
+    return MeteredFakeChatModel(latency=latency, per_1k_tokens=per_1k_tokens)
+
+
+# --- TTS ---
+FakeResult = namedtuple("FakeResult", "graphemes phonemes audio")
+
+
+class FakeKPipeline:
+    """
+    Kokoro KPipeline look-alike. g2p() sleeps `g2p_per_char` seconds per
+    character and "phonemizes" by lower-casing; inference sleeps
+    `infer_per_phoneme` seconds per phoneme and returns a deterministic
+    float32 waveform of ~70 ms per phoneme. Counts g2p and inference calls.
+    Requires numpy.
+    """
+
+    def __init__(self, g2p_per_char: float = 2e-5, infer_per_phoneme: float = 2e-4):
+        self.g2p_per_char = g2p_per_char
+        self.infer_per_phoneme = infer_per_phoneme
+        self.g2p_calls = 0
+        self.infer_calls = 0
+
+    def g2p(self, text: str):
+        self.g2p_calls += 1
+        time.sleep(self.g2p_per_char * len(text))
+        return text, text.lower()
+
+    def en_tokenize(self, tokens: str):
+        # Kokoro caps a chunk at 510 phonemes
+        chunk = ""
+        for word in tokens.split():
+            if chunk and len(chunk) + len(word) + 1 > 510:
+                yield chunk, chunk, None
+                chunk = ""
+            chunk = f"{chunk} {word}" if chunk else word
+        if chunk:
+            yield chunk, chunk, None
+
+    def generate_from_tokens(self, tokens: str, voice: str = "af_heart", speed: float = 1):
+        import numpy as np
+        self.infer_calls += 1
+        time.sleep(self.infer_per_phoneme * len(tokens))
+        samples = int(len(tokens) * 1680 / speed)
+        yield FakeResult("", tokens, (np.sin(np.arange(samples, dtype=np.float32) * 0.05) * 0.3).astype(np.float32))
+
+    def __call__(self, text: str, voice: str = "af_heart", speed: float = 1, split_pattern: str = r"\n+"):
+        for paragraph in re.split(split_pattern, text):
+            if not paragraph.strip():
+                continue
+            _, tokens = self.g2p(paragraph)
+            for graphemes, phonemes, _ in self.en_tokenize(tokens):
+                for result in self.generate_from_tokens(phonemes, voice, speed):
+                    yield FakeResult(graphemes, phonemes, result.audio)
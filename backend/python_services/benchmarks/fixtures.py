@@ -0,0 +1,190 @@
+"""
+Offline benchmark fixtures: a deterministic corpus of article pages in the
+three shapes the pipeline sees (raw HTML, Jina Reader markdown, plain text),
+plus synthetic article metadata and embeddings.
+
+Everything is generated from a fixed seed, so two runs on the same machine
+measure exactly the same input. Recorded pages can be used instead with
+load_corpus_dir() (e.g. pages exported from the scrape cache).
+"""
+
+import os
+import json
+import random
+
+SEED = 1234
+
+_WORDS = (
+    "government market officials said report company growth policy election health "
+    "research scientists energy climate technology investors quarter shares league "
+    "season team players city council budget inflation rates central bank announced "
+    "study patients hospital launch product users data security court ruling minister"
+).split()
+
+_BOILERPLATE = [
+    "Subscribe to our newsletter", "Sign in", "Privacy Policy", "Terms of Service",
+    "Advertisement", "Follow us on Twitter", "Read more", "Related Stories", "Accept cookies",
+]
+
+
+def _sentence(rng: random.Random) -> str:
+    words = [rng.choice(_WORDS) for _ in range(rng.randint(8, 22))]
+    return " ".join(words).capitalize() + rng.choice([".", ".", ".", "!", "?"])
+
+
+def _paragraph(rng: random.Random) -> str:
+    return " ".join(_sentence(rng) for _ in range(rng.randint(2, 5)))
+
+
+def make_article(rng: random.Random, paragraphs: int) -> tuple[str, list[str]]:
+    title = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(5, 10))).title()
+    return title, [_paragraph(rng) for _ in range(paragraphs)]
+
+
+def to_html(title: str, paragraphs: list[str], rng: random.Random) -> str:
+    nav = "".join(f'<li><a href="/section/{i}">{rng.choice(_BOILERPLATE)}</a></li>' for i in range(12))
+    body = "".join(f"<p>{p}</p>" for p in paragraphs)
+    related = "".join(f'<li><a href="/story/{rng.randint(1, 10**6)}">{_sentence(rng)}</a></li>' for _ in range(6))
+    return (
+        "<!DOCTYPE html><html><head><title>{t}</title>"
+        "<script>window.dataLayer=[];function track(){{}}</script>"
+        "<style>body{{font-family:serif}} .ad{{display:block}}</style></head>"
+        "<body><header><nav><ul>{nav}</ul></nav></header>"
+        '<div class="ad">Advertisement</div>'
+        "<article><h1>{t}</h1>{body}</article>"
+        '<aside><h3>Related Stories</h3><ul>{related}</ul></aside>'
+        "<footer>© 2025 News Co. Privacy Policy | Terms of Service</footer>"
+        "</body></html>"
+    ).format(t=title, nav=nav, body=body, related=related)
+
+
+def to_markdown(title: str, paragraphs: list[str], rng: random.Random) -> str:
+    lines = [f"Title: {title}", "", f"URL Source: https://example.com/story/{rng.randint(1, 10**6)}", "",
+             "Markdown Content:", "", "* [Home](https://example.com/)", "* [Sign in](https://example.com/login)", "",
+             f"# {title}", "", f"![hero](https://cdn.example.com/{rng.randint(1, 999)}.jpg)", ""]
+    for paragraph in paragraphs:
+        lines += [paragraph, ""]
+    lines += ["Related Stories", "", *(f"* [{_sentence(rng)}](https://example.com/s/{i})" for i in range(5)),
+              "", "Subscribe to our newsletter", ""]
+    return "\n".join(lines)
+
+
+def to_text(title: str, paragraphs: list[str], rng: random.Random) -> str:
+    return title + "\n\n" + "\n\n".join(paragraphs)
+
+
+def build_corpus(size: int = 60, seed: int = SEED) -> list[dict]:
+    """
+    Returns `size` documents cycling through html/markdown/text, each
+    {"format", "text"}, with article lengths from a few to ~40 paragraphs.
+    """
+    rng = random.Random(seed)
+    renderers = [("html", to_html), ("markdown", to_markdown), ("text", to_text)]
+    corpus = []
+    for i in range(size):
+        fmt, render = renderers[i % len(renderers)]
+        title, paragraphs = make_article(rng, rng.choice([3, 8, 15, 40]))
+        corpus.append({"format": fmt, "text": render(title, paragraphs, rng)})
+    return corpus
+
+
+def load_corpus_dir(path: str) -> list[dict]:
+    """Loads recorded pages (*.html, *.md, *.txt) from a directory as a corpus."""
+    formats = {".html": "html", ".htm": "html", ".md": "markdown", ".txt": "text"}
+    corpus = []
+    for name in sorted(os.listdir(path)):
+        fmt = formats.get(os.path.splitext(name)[1].lower())
+        if fmt:
+            with open(os.path.join(path, name), encoding="utf-8", errors="replace") as f:
+                corpus.append({"format": fmt, "text": f.read()})
+    return corpus
+
+
+def build_summary_corpus(seed: int = SEED) -> list[dict]:
+    """
+    Cleaned article texts spanning the sizes the summarizer sees: short
+    briefs, regular stories, long reads and live blogs (with repeated
+    boilerplate lines, as left over from scraping). Each {"kind", "text"}.
+    """
+    rng = random.Random(seed)
+    corpus = []
+    for kind, paragraphs, copies in [("brief", 1, 10), ("story", 8, 20), ("long_read", 40, 6), ("live_blog", 150, 4)]:
+        for _ in range(copies):
+            _, body = make_article(rng, paragraphs)
+            if kind == "live_blog":
+                body = [f"{p} Follow our live coverage for updates." if i % 3 else "Follow our live coverage for updates."
+                        for i, p in enumerate(body)]
+            corpus.append({"kind": kind, "text": "\n\n".join(body)})
+    return corpus
+
+
+def build_articles(count: int, seed: int = SEED) -> list[dict]:
+    """Synthetic Firestore article documents with card fields and content."""
+    rng = random.Random(seed)
+    categories = ["business", "entertainment", "general", "health", "science", "sports", "technology"]
+    articles = []
+    for i in range(count):
+        title, paragraphs = make_article(rng, rng.choice([3, 8, 15]))
+        articles.append({
+            "id": f"{i:032x}",
+            "title": title,
+            "summary": "\n".join(f"* {_sentence(rng)}" for _ in range(4)),
+            "url": f"https://example.com/story/{i}",
+            "category": categories[i % len(categories)],
+            "publishedAt": f"2025-01-{1 + i % 28:02d}T{i % 24:02d}:00:00Z",
+            "urlToImage": f"https://cdn.example.com/{i}.jpg",
+            "content": "\n\n".join(paragraphs),
+        })
+    return articles
+
+
+# Sentences that recur across real summaries (attribution, follow-up lines)
+_SUMMARY_PHRASES = [
+    "Officials said more details would be released in the coming days.",
+    "The company did not immediately respond to a request for comment.",
+    "Analysts expect the decision to affect markets in the short term.",
+    "The investigation is ongoing.",
+    "Further updates are expected later this week.",
+]
+
+
+def build_tts_requests(count: int = 200, articles: int = 40, seed: int = SEED, summaries: list[str] | None = None) -> list[str]:
+    """
+    Texts sent to /tts: article summaries (bulleted, some with recurring
+    stock sentences), picked with a Zipf skew because popular articles are
+    replayed, and a third of them read with the title first, so they
+    partially overlap earlier requests. `summaries` replaces the generated
+    ones, e.g. with real summaries from load_summaries().
+    """
+    rng = random.Random(seed)
+    if summaries is None:
+        summaries = []
+        for article in build_articles(articles, seed):
+            lines = [rng.choice(_SUMMARY_PHRASES) if rng.random() < 0.25 else line[2:]
+                     for line in article["summary"].splitlines()]
+            summaries.append((article["title"], "\n".join(lines)))
+    else:
+        summaries = [("", summary) for summary in summaries]
+    weights = [1 / (rank + 1) for rank in range(len(summaries))]
+    requests = []
+    for _ in range(count):
+        title, summary = rng.choices(summaries, weights=weights)[0]
+        requests.append(f"{title}.\n{summary}" if title and rng.random() < 0.33 else summary)
+    return requests
+
+
+def load_summaries(path: str) -> list[str]:
+    """Summaries from a JSON export: a list of strings or of article objects with a 'summary' field."""
+    with open(path, encoding="utf-8") as f:
+        items = json.load(f)
+    summaries = [item.get("summary") if isinstance(item, dict) else item for item in items]
+    # Bullets are not read out
+    return ["\n".join(line.lstrip("*-• ").strip() for line in s.splitlines()) for s in summaries if s]
+
+
+def build_vectors(count: int, dim: int = 768, seed: int = SEED):
+    """Unit-normalised random float32 vectors (numpy)."""
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
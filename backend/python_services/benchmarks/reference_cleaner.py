@@ -0,0 +1,91 @@
+"""
+The article cleaner exactly as it was before format detection and the
+lxml fast path (clean_content.deep_clean_html), kept as the reference the
+'clean' benchmark checks the current cleaner's output against.
+"""
+
+import re
+from readability import Document
+from bs4 import BeautifulSoup
+
+
+def reference_clean(raw_text: str) -> str:
+    """
+    Cleans deeply mixed HTML/Markdown/news text into clean article prose.
+    Works even when the source is flattened or malformed.
+    """
+    if not raw_text or not isinstance(raw_text, str):
+        return ""
+
+    text = raw_text
+
+    # --- Use readability to isolate article (works on valid HTML) ---
+    try:
+        doc = Document(raw_text)
+        readable_html = doc.summary(html_partial=True)
+    except Exception:
+        readable_html = raw_text
+
+    soup = BeautifulSoup(readable_html, "lxml")
+    for tag in soup(["script", "style", "nav", "footer", "form", "aside", "header", "svg", "noscript"]):
+        tag.decompose()
+    text = soup.get_text(separator="\n")
+
+    # --- Strip tags if any remain ---
+    text = re.sub(r"<[^>]+>", " ", text)
+    text = re.sub(r"&[a-z]+;", " ", text)
+    text = re.sub(r"={2,}|-{2,}", " ", text)
+
+    # --- Remove Markdown & URLs ---
+    text = re.sub(r"!\[.*?\]\(.*?\)", " ", text)
+    text = re.sub(r"\[([^\]]+)\]\((?:https?:\/\/|mailto:)[^)]+\)", r"\1", text)
+    text = re.sub(r"https?:\/\/\S+", " ", text)
+
+    # --- Remove site UI & repeated boilerplate phrases ---
+    ui_phrases = [
+        "privacy policy", "terms of service", "advertisement", "advertising policy",
+        "subscribe", "sign up", "sign in", "accept cookies", "related stories",
+        "read next", "newsletter", "share this", "follow us", "menu", "footer",
+        "header", "disclaimer", "cookies", "back to top", "most popular",
+        "trending", "click here", "variety", "robb report", "futurism",
+        "9to5mac", "pmc", "about us", "contact us", "donate", "help", "jobs",
+        "site protected", "©", "202", "facebook", "instagram", "twitter",
+        "linkedin", "reddit", "bluesky", "youtube", "x ", "get the magazine",
+        "continue", "resend code", "forgot password", "email address",
+        "submit an event", "search for", "open dropdown", "read more",
+        "close advert", "newsletter signup", "advertise with us",
+    ]
+    for phrase in ui_phrases:
+        text = re.sub(rf"\b{re.escape(phrase)}\b", " ", text, flags=re.IGNORECASE)
+
+    # --- Remove bullets, checkboxes, misc symbols ---
+    text = re.sub(r"\[x\]", " ", text, flags=re.IGNORECASE)
+    text = re.sub(r"[-–—•▪◦·\*]\s+", " ", text)
+
+    # --- Normalize spacing ---
+    text = re.sub(r"\s{2,}", " ", text)
+    text = re.sub(r"\n{2,}", "\n", text)
+
+    # --- Filter only meaningful lines (>=6 words and contains punctuation) ---
+    lines = []
+    for line in text.split("\n"):
+        line = line.strip()
+        if len(line.split()) >= 6 and re.search(r"[.!?]", line):
+            lines.append(line)
+
+    cleaned = "\n\n".join(lines)
+
+    # --- Remove duplicate first paragraph (common double-title) ---
+    if cleaned:
+        paras = cleaned.split("\n\n")
+        if len(paras) >= 2 and paras[0].lower() == paras[1].lower():
+            paras = paras[1:]
+        cleaned = "\n\n".join(paras)
+
+    # --- Final normalization ---
+    cleaned = re.sub(r"\s([?.!,])", r"\1", cleaned)
+    cleaned = re.sub(r"\s{2,}", " ", cleaned)
+    cleaned = cleaned.strip()
+
+    return cleaned
+
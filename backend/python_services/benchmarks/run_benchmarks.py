@@ -0,0 +1,699 @@
+"""
+Offline Benchmark Suite
+-----------------------
+Measures throughput and latency of every hot path with recorded/generated
+fixtures and local fakes, so results are reproducible and cost nothing:
+
+  clean          deep_clean_html per format (HTML / markdown / plain text), vs the reference cleaner
+  summarize      get_summary with a fake LLM (prompt + chain overhead)
+  summary_budget prompt tokens and latency per article, token budget vs whole article
+  summary_packing Gemini requests per article, packed prompts vs one request each
+  summary_latency ingest-to-summary latency of the listener mode      (needs the Firestore emulator)
+  card_cache     ArticleCardCache hydration against an in-memory Firestore
+  content_store  article bodies through the local content store, document bytes per read before/after
+  feed_snapshots incremental feed snapshot merges, bytes and reads per feed load vs querying articles
+  work_queue     the pipeline's SQLite work queue, through every stage
+  keywords       TF-IDF keyword extraction per 50-article batch, array size vs legacy
+  trending       TrendingEngine observe/query, top-10 accuracy vs exact counts, burst detection
+  urls           canonicalize_url + make_doc_id
+  vector_local   LocalVectorStore queries (NumPy)
+  vector_chroma  Chroma queries against a local PersistentClient   (needs chromadb)
+  embed          create_hf_embedding with the real Nomic model       (needs a cached model)
+  tts            Kokoro speech generation                          (needs kokoro)
+  admission      2x overload of a simulated model with and without admission control (see admission_load.py)
+  tts_cache      /tts request mix through the phoneme and audio caches vs uncached (fake Kokoro without kokoro)
+  startup        import time of every entry point (python -X importtime, see startup.py)
+
+Components whose optional dependency is missing are reported as skipped.
+Each run is written to benchmarks/results/. --save-baseline stores the run
+as benchmarks/baseline.json; later runs are compared with it and any
+component whose p50 latency or throughput got worse than --tolerance is
+flagged as a regression (exit code 1 with --fail-on-regression). Baselines
+are only comparable on the same machine.
+
+Usage:
+    python run_benchmarks.py [--only clean,urls] [--save-baseline] [--fail-on-regression]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+from collections import Counter
+from datetime import datetime
+
+# --- Path Setup ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+python_services_dir = os.path.abspath(os.path.join(current_dir, '..'))
+for path in (current_dir, python_services_dir):
+    if path not in sys.path:
+        sys.path.append(path)
+
+# Never reach out to the network from a benchmark run.
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+os.environ.setdefault("SCRAPE_CACHE_ENABLED", "false")
+
+from fixtures import (build_corpus, load_corpus_dir, build_articles, build_summary_corpus, build_vectors,
+                      build_tts_requests, load_summaries)
+from fakes import InMemoryFirestore, FakeKPipeline, fake_chat_model
+from startup import measure_all as measure_startup_times
+from admission_load import compare as compare_admission
+from shared.observability.metrics import percentile
+
+RESULTS_DIR = os.path.join(current_dir, "results")
+BASELINE_PATH = os.path.join(current_dir, "baseline.json")
+
+
+class Skip(Exception):
+    """Raised by a component whose optional dependency is not available."""
+
+
+# ---------------- MEASUREMENT ----------------
+def measure(fn, inputs: list, warmup: int = 2, repeat: int = 1) -> dict:
+    """
+    Calls fn(x) for every input (`repeat` times), after `warmup` untimed calls,
+    and returns latency percentiles and throughput.
+    """
+    for x in inputs[:warmup]:
+        fn(x)
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for x in inputs:
+            t0 = time.perf_counter()
+            fn(x)
+            latencies.append(time.perf_counter() - t0)
+    total = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "n": len(latencies),
+        "total_s": round(total, 4),
+        "throughput_per_s": round(len(latencies) / total, 2) if total else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 4),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 4),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 4),
+    }
+
+
+# ---------------- COMPONENTS ----------------
+def bench_clean(args) -> dict:
+    """
+    deep_clean_html per input format, against the pre-fast-path cleaner
+    (reference_cleaner.py): speed-up per format and how many outputs differ.
+    """
+    try:
+        from clean_content.clean_content import deep_clean_html, detect_format
+        from reference_cleaner import reference_clean
+    except ImportError as e:
+        raise Skip(str(e))
+
+    corpus = load_corpus_dir(args.corpus) if args.corpus else build_corpus(args.corpus_size)
+    result = measure(lambda doc: deep_clean_html(doc["text"]), corpus, repeat=args.repeat)
+    total_bytes = sum(len(doc["text"].encode()) for doc in corpus) * args.repeat
+    result["mb_per_s"] = round(total_bytes / 1e6 / result["total_s"], 3) if result["total_s"] else 0.0
+
+    mismatches = [i for i, doc in enumerate(corpus) if deep_clean_html(doc["text"]) != reference_clean(doc["text"])]
+    result["equivalent"] = f"{len(corpus) - len(mismatches)}/{len(corpus)}"
+    result["mismatched_docs"] = mismatches[:20]
+    result["detected_formats"] = dict(Counter(detect_format(doc["text"]) for doc in corpus))
+
+    result["by_format"] = {}
+    for fmt in sorted({doc["format"] for doc in corpus}):
+        docs = [d for d in corpus if d["format"] == fmt]
+        current = measure(lambda doc: deep_clean_html(doc["text"]), docs, warmup=0)
+        reference = measure(lambda doc: reference_clean(doc["text"]), docs, warmup=0)
+        current["reference_p50_ms"] = reference["p50_ms"]
+        current["speedup"] = round(reference["total_s"] / current["total_s"], 2) if current["total_s"] else 0.0
+        result["by_format"][fmt] = current
+    if mismatches:
+        print(f"   ⚠️ {len(mismatches)} documents clean differently from the reference cleaner")
+    return result
+
+
+def _fake_summarizer(args, drop_every: int = 0):
+    """Imports the summary engine with Gemini replaced by a metered fake model and no rate limit."""
+    os.environ.setdefault("GEMINI_API_KEY", "offline-benchmark")
+    try:
+        from summarizer.summary_engine import langgraph_agent
+        from summarizer.summary_engine.rate_limiter import gemini_limiter
+        from summarizer.summary_engine.token_budget import count_tokens
+        model = fake_chat_model(args.llm_latency, args.llm_latency_per_1k, count_tokens, drop_every)
+    except ImportError as e:
+        raise Skip(str(e))
+    gemini_limiter.set_rpm(0)
+    langgraph_agent.ChatGoogleGenerativeAI = lambda **kwargs: model
+    langgraph_agent._chains.clear()
+    return langgraph_agent, model, count_tokens
+
+
+def bench_summarize(args) -> dict:
+    langgraph_agent, _, _ = _fake_summarizer(args)
+    articles = [a["content"] for a in build_articles(args.corpus_size)]
+    return measure(langgraph_agent.get_summary, articles, repeat=args.repeat)
+
+
+def bench_summary_budget(args) -> dict:
+    """
+    Tokens sent per article and summary latency with the token budget
+    (get_summary) versus sending the whole article in one prompt, as before.
+    """
+    langgraph_agent, model, count_tokens = _fake_summarizer(args)
+    from summarizer.summary_engine.token_budget import plan_summary
+
+    corpus = build_summary_corpus()
+    whole = langgraph_agent._get_chain("whole", langgraph_agent.SUMMARY_PROMPT)
+
+    def run(fn):
+        model.calls = model.prompt_tokens = 0
+        result = measure(fn, corpus, warmup=0)
+        result["llm_calls"] = model.calls
+        result["prompt_tokens_per_article"] = round(model.prompt_tokens / len(corpus), 1)
+        return result
+
+    before = run(lambda doc: whole.invoke({"article": doc["text"]}))
+    after = run(lambda doc: langgraph_agent.get_summary(doc["text"]))
+    after["modes"] = dict(Counter(plan_summary(doc["text"])[0] for doc in corpus))
+    after["article_tokens_by_kind"] = {
+        kind: round(sum(count_tokens(d["text"]) for d in corpus if d["kind"] == kind) /
+                    sum(1 for d in corpus if d["kind"] == kind))
+        for kind in sorted({d["kind"] for d in corpus})
+    }
+    return {**after, "before": before}
+
+
+def bench_summary_packing(args) -> dict:
+    """
+    Gemini requests and articles per minute under the RPM quota when short
+    articles are packed several to a request, versus one request each.
+    """
+    corpus = [doc for doc in build_summary_corpus() if doc["kind"] in ("brief", "story")]
+    articles = {f"doc-{i}": doc["text"] for i, doc in enumerate(corpus)}
+
+    def run(summarize, drop_every=0):
+        langgraph_agent, model, _ = _fake_summarizer(args, drop_every)
+        started = time.perf_counter()
+        summaries = summarize(langgraph_agent)
+        elapsed = time.perf_counter() - started
+        failed = sum(1 for s in summaries.values() if s == langgraph_agent.SUMMARY_FAILED_MESSAGE)
+        return {
+            "articles": len(articles),
+            "llm_calls": model.calls,
+            "failed": failed,
+            "compute_s": round(elapsed, 4),
+            # Throughput when the quota, not latency, is the limit
+            "articles_per_minute_at_quota": round(args.rpm * len(articles) / max(model.calls, 1), 1),
+        }
+
+    single = run(lambda agent: {doc_id: agent.get_summary(text) for doc_id, text in articles.items()})
+    packed = run(lambda agent: agent.get_summaries(articles))
+    with_fallbacks = run(lambda agent: agent.get_summaries(articles), drop_every=5)
+
+    # The common result keys track the packed path, per article
+    per_article_ms = round(packed["compute_s"] * 1000 / packed["articles"], 4)
+    return {
+        "n": packed["articles"],
+        "total_s": packed["compute_s"],
+        "throughput_per_s": round(packed["articles"] / packed["compute_s"], 2),
+        "p50_ms": per_article_ms,
+        "p95_ms": per_article_ms,
+        "p99_ms": per_article_ms,
+        "packed": packed,
+        "single": single,
+        "packed_with_20pct_malformed": with_fallbacks,
+        "speedup_at_quota": round(packed["articles_per_minute_at_quota"] / single["articles_per_minute_at_quota"], 2),
+    }
+
+
+def bench_summary_latency(args) -> dict:
+    """Listener-mode summarizer against the Firestore emulator (see summary_latency.py)."""
+    if not os.getenv("FIRESTORE_EMULATOR_HOST"):
+        raise Skip("FIRESTORE_EMULATOR_HOST is not set")
+    try:
+        from summary_latency import measure_latency
+        result = measure_latency(llm_latency=args.llm_latency or 0.2)
+    except ImportError as e:
+        raise Skip(str(e))
+    if not result["completed"]:
+        raise Skip("no article was summarized before the timeout")
+    # Common keys, so the run is printed and compared with the baseline like every other component
+    result.update({
+        "n": result["completed"],
+        "p50_ms": result["latency_p50_s"] * 1000,
+        "p95_ms": result["latency_p95_s"] * 1000,
+        "throughput_per_s": round(1 / result["latency_p50_s"], 2) if result["latency_p50_s"] else 0.0,
+    })
+    return result
+
+
+def bench_card_cache(args) -> dict:
+    from shared.database.article_cache import ArticleCardCache
+
+    db = InMemoryFirestore(rpc_latency=args.rpc_latency)
+    articles = build_articles(2000)
+    db.load("articles", articles)
+    rng = random.Random(7)
+    pages = [[rng.choice(articles)["id"] for _ in range(20)] for _ in range(200)]
+
+    cold = measure(lambda ids: ArticleCardCache(db=db).get_many(ids), pages, warmup=0)
+    cache = ArticleCardCache(db=db)
+    for ids in pages:
+        cache.get_many(ids)
+    db.rpc_count = 0
+    warm = measure(cache.get_many, pages, warmup=0, repeat=args.repeat)
+    return {**warm, "cold": cold, "warm_rpcs": db.rpc_count}
+
+
+def bench_feed_snapshots(args) -> dict:
+    """Merging a stored batch into the feeds, and what one feed page load transfers vs the articles query."""
+    from shared.database.feed_snapshots import to_feed_card, merge_cards, _group_by_feed, FEED_SIZE, ALL_FEED
+
+    articles = sorted(build_articles(2000), key=lambda a: a["publishedAt"])
+    feeds = {}
+    batches = [articles[i:i + 10] for i in range(0, len(articles), 10)]
+
+    def store_batch(batch):
+        for name, cards in _group_by_feed([to_feed_card(a["id"], a) for a in batch]).items():
+            feeds[name] = merge_cards(feeds.get(name, []), cards)
+
+    result = measure(store_batch, batches, warmup=0)
+
+    # What the homepage transfers for a 20-article page, either way
+    page = 20
+    newest = sorted(articles, key=lambda a: a["publishedAt"], reverse=True)[:page]
+    query_bytes = sum(len(json.dumps(a).encode("utf-8")) for a in newest)
+    feed_bytes = len(json.dumps({"articles": feeds[ALL_FEED]}).encode("utf-8"))
+    result.update({
+        "feed_size": FEED_SIZE,
+        "query_reads_per_page": page,
+        "query_bytes_per_page": query_bytes,
+        "snapshot_reads_per_page": 1,
+        "snapshot_bytes_per_page": feed_bytes,
+        "feeds_match_query": [c["id"] for c in feeds[ALL_FEED][:page]] == [a["id"] for a in newest],
+    })
+    return result
+
+
+def bench_content_store(args) -> dict:
+    """Body writes and reads through LocalContentStore, and what a full article read transfers with and without bodies."""
+    from shared.storage.content_store import LocalContentStore, store_bodies, load_body
+
+    articles = build_articles(1000)
+    with tempfile.TemporaryDirectory() as directory:
+        store = LocalContentStore(directory)
+        store.shared = True  # lay documents out as with the gcs backend, on local disk
+        refs = {}
+        result = measure(lambda a: refs.update({a["id"]: store_bodies(
+            {"content": a["content"], "full_clean_content": a["content"]}, inline_content=True, store=store)}),
+            articles, warmup=0)
+        read = measure(lambda a: load_body({"content_ref": refs[a["id"]]["content_ref"]}, store=store), articles,
+                       warmup=0, repeat=args.repeat)
+        blob_bytes = sum(os.path.getsize(os.path.join(root, name))
+                         for root, _, names in os.walk(directory) for name in names)
+
+    def doc_bytes(doc):
+        return len(json.dumps(doc).encode("utf-8"))
+
+    # Document layouts with a shared (gcs) backend. Before: cleaned and raw body
+    # inline. After: references only (ARTICLE_INLINE_CONTENT=false)
+    ref_fields = ("content_ref", "raw_content_ref")
+    before = sum(doc_bytes({**a, "full_clean_content": a["content"]}) for a in articles)
+    inline = sum(doc_bytes({**a, **{k: refs[a["id"]][k] for k in ref_fields}}) for a in articles)
+    after = sum(doc_bytes({**{k: v for k, v in a.items() if k != "content"},
+                           **{k: refs[a["id"]][k] for k in ref_fields}}) for a in articles)
+    body_bytes = sum(len(a["content"].encode("utf-8")) for a in articles)
+    result.update({
+        "read_p50_ms": read["p50_ms"],
+        "bytes_per_read_before": before // len(articles),
+        "bytes_per_read_inline_content": inline // len(articles),
+        "bytes_per_read_after": after // len(articles),
+        "compression_ratio": round(body_bytes / blob_bytes, 2),
+    })
+    return result
+
+
+def bench_work_queue(args) -> dict:
+    from shared.pipeline.work_queue import WorkQueue, STAGES
+
+    articles = build_articles(500)
+    with tempfile.TemporaryDirectory() as directory:
+        queue = WorkQueue(os.path.join(directory, "queue.sqlite3"))
+
+        def run_item(article):
+            queue.enqueue(article["id"], article["category"], article)
+            for completed, following in zip(STAGES, STAGES[1:]):
+                item = queue.claim(completed, "bench", limit=1)[0]
+                queue.advance(item, following, **({"content": article["content"]} if following == "cleaned" else {}))
+
+        return measure(run_item, articles, warmup=0)
+
+
+def _legacy_keywords(title: str, description: str) -> list[str]:
+    """The keyword generator the ingest paths used before shared/search/keywords.py."""
+    import string
+    stop_words = {'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'he', 'in', 'is',
+                  'it', 'its', 'of', 'on', 'that', 'the', 'to', 'was', 'were', 'will', 'with'}
+    words = (title + " " + description).lower().translate(str.maketrans('', '', string.punctuation)).split()
+    return list(set(word for word in words if word not in stop_words and len(word) > 2))
+
+
+def bench_keywords(args) -> dict:
+    """TF-IDF keyword extraction in ingest-sized batches, and keyword array size vs the legacy generator."""
+    from shared.search.keywords import KeywordExtractor, DocumentFrequencyTable
+
+    articles = build_articles(1000)
+    with tempfile.TemporaryDirectory() as directory:
+        extractor = KeywordExtractor(DocumentFrequencyTable(os.path.join(directory, "df.sqlite3")))
+        batches = [articles[i:i + 50] for i in range(0, len(articles), 50)]
+        keywords = {}
+        result = measure(lambda batch: keywords.update(extractor.extract_many(
+            {a["id"]: {"title": a["title"], "body": a["content"]} for a in batch})), batches, warmup=0)
+
+    result["per_article_ms"] = round(result["total_s"] * 1000 / len(articles), 4)
+    result["keywords_per_article"] = round(sum(map(len, keywords.values())) / len(keywords), 1)
+    result["legacy_keywords_per_article"] = round(
+        sum(len(_legacy_keywords(a["title"], a["content"])) for a in articles) / len(articles), 1)
+    return result
+
+
+def bench_trending(args) -> dict:
+    """Sketch-based trending over two days of Zipf-distributed keywords with one injected burst."""
+    try:
+        from shared.search.trending import TrendingEngine
+    except ImportError as e:
+        raise Skip(str(e))
+
+    rng = random.Random(11)
+    vocabulary = [f"topic{i:04d}" for i in range(5000)]
+    zipf = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    now = 1_760_000_000.0
+    engine = TrendingEngine(path=None)
+    hours = engine.buckets * engine.bucket_seconds / 3600
+
+    # 48h of articles, 12 keywords each; "outbreak" only shows up in the current window
+    articles, exact = [], Counter()
+    for i in range(args.trending_articles):
+        published = now - rng.random() * hours * 3600
+        keywords = set(rng.choices(vocabulary, weights=zipf, k=12))
+        in_current = published > now - engine.current_buckets * engine.bucket_seconds
+        if in_current and rng.random() < 0.15:
+            keywords.add("outbreak")
+        if in_current:
+            exact.update(keywords)
+        articles.append((f"a{i}", {"keywords": sorted(keywords), "publishedAt": published}))
+    articles.sort(key=lambda a: a[1]["publishedAt"])
+
+    batches = [dict(articles[i:i + 50]) for i in range(0, len(articles), 50)]
+    result = measure(lambda batch: engine.observe(batch, now=now), batches, warmup=0)
+    result["per_article_ms"] = round(result["total_s"] * 1000 / len(articles), 4)
+
+    engine.trending(10, now=now)  # builds the cached ranking
+    query = measure(lambda k: engine.trending(k, now=now), [10] * 200, warmup=0)
+    top = [item["term"] for item in engine.trending(10, now=now)]
+    bursts = [item["term"] for item in engine.trending(10, bursting_only=True, now=now)]
+    result.update({
+        "query_p50_ms": query["p50_ms"],
+        "top10_overlap_with_exact": len(set(top) & {term for term, _ in exact.most_common(10)}) / 10,
+        "burst_detected": bursts[:1] == ["outbreak"],
+        "bursting_topics": len(bursts),
+        "memory_bytes": engine.stats()["memory_bytes"],
+    })
+    return result
+
+
+def bench_urls(args) -> dict:
+    from shared.utils.urls import make_doc_id
+
+    rng = random.Random(3)
+    hosts = ["www.example.com", "m.news.co.uk", "amp.site.org", "example-com.cdn.ampproject.org"]
+    urls = [
+        f"https://{rng.choice(hosts)}/{'amp/' if i % 5 == 0 else ''}world/story-{i}/?utm_source=x&id={i}&ref=home#top"
+        for i in range(5000)
+    ]
+    return measure(make_doc_id, urls, repeat=args.repeat)
+
+
+def _bench_vector_store(store, dim: int, size: int, args) -> dict:
+    vectors = build_vectors(size, dim)
+    categories = ["business", "health", "sports", "technology"]
+    ids = [f"doc-{i}" for i in range(size)]
+    metadatas = [{"category": categories[i % len(categories)], "published_ts": 1.7e9 + i * 60} for i in range(size)]
+    for start in range(0, size, 5000):
+        chunk = vectors[start:start + 5000]
+        store.add(ids[start:start + 5000], chunk.tolist() if store.name == "chroma" else chunk,
+                  metadatas[start:start + 5000])
+
+    queries = [[q.tolist()] for q in build_vectors(200, dim, seed=99)]
+    result = measure(lambda q: store.query(q, n_results=10), queries)
+    result["filtered"] = measure(lambda q: store.query(q, n_results=10, category="health", since=1.7e9 + size * 30),
+                                 queries, warmup=0)
+    result["size"] = size
+    return result
+
+
+def bench_vector_local(args) -> dict:
+    try:
+        from shared.database.local_vector_store import LocalVectorStore
+    except ImportError as e:
+        raise Skip(str(e))
+    with tempfile.TemporaryDirectory() as directory:
+        return _bench_vector_store(LocalVectorStore(path=directory), 768, args.vector_size, args)
+
+
+def bench_vector_chroma(args) -> dict:
+    try:
+        import chromadb
+        from shared.database.vector_store import ChromaVectorStore
+    except ImportError as e:
+        raise Skip(str(e))
+    with tempfile.TemporaryDirectory() as directory:
+        client = chromadb.PersistentClient(path=directory)
+        store = ChromaVectorStore(client.get_or_create_collection(name="benchmark"))
+        return _bench_vector_store(store, 768, args.vector_size, args)
+
+
+def bench_embed(args) -> dict:
+    try:
+        from shared.llm import embedding_client
+    except ImportError as e:
+        raise Skip(str(e))
+    if embedding_client.get_model() is None:
+        raise Skip("Nomic model is not in the local Hugging Face cache")
+    texts = [a["title"] + ". " + a["content"][:1000] for a in build_articles(50)]
+    return measure(lambda text: embedding_client.create_hf_embedding(text, embedding_client.TASK_TYPE_DOCUMENT), texts)
+
+
+def bench_tts(args) -> dict:
+    try:
+        from kokoro import KPipeline
+        pipeline = KPipeline(lang_code="a")
+    except Exception as e:
+        raise Skip(f"Kokoro unavailable: {e}")
+
+    def speak(text):
+        for _ in pipeline(text, voice="af_heart", speed=1):
+            pass
+
+    texts = [a["summary"].replace("* ", "") for a in build_articles(10)]
+    return measure(speak, texts, warmup=1)
+
+
+def bench_tts_cache(args) -> dict:
+    """
+    A replayed, partially overlapping mix of summaries through
+    CachedSpeechPipeline, against the same requests through the bare
+    pipeline. Uses Kokoro when it is installed, otherwise FakeKPipeline.
+    """
+    tts_dir = os.path.join(python_services_dir, "tts_service")
+    if tts_dir not in sys.path:
+        sys.path.append(tts_dir)
+    try:
+        from speech_cache import CachedSpeechPipeline
+    except ImportError as e:
+        raise Skip(str(e))
+
+    try:
+        from kokoro import KPipeline
+        pipeline, backend = KPipeline(lang_code="a"), "kokoro"
+    except Exception:
+        pipeline, backend = FakeKPipeline(infer_per_phoneme=args.tts_latency_per_phoneme), "fake"
+
+    summaries = load_summaries(args.summaries) if args.summaries else None
+    requests = build_tts_requests(args.tts_requests, summaries=summaries)
+
+    def uncached(text):
+        for _ in pipeline(text, voice="af_heart", speed=1):
+            pass
+
+    speech = CachedSpeechPipeline(pipeline)
+    baseline = measure(uncached, requests, warmup=0)
+    result = measure(lambda text: speech.synthesize(text, voice="af_heart", speed=1), requests, warmup=0)
+    stats = speech.stats()
+    result.update({
+        "backend": backend,
+        "uncached_p50_ms": baseline["p50_ms"],
+        "uncached_total_s": baseline["total_s"],
+        "speedup": round(baseline["total_s"] / result["total_s"], 2) if result["total_s"] else None,
+        "segment_hit_rate": stats["segment_hit_rate"],
+        "audio_hit_rate": stats["audio_hit_rate"],
+        "seconds_saved": stats["seconds_saved"],
+        "audio_cache_bytes": stats["audio_cache"]["bytes"],
+    })
+    return result
+
+
+def bench_admission(args) -> dict:
+    """Interactive/batch mix at twice the capacity of a 20 ms model; p99 of admitted requests vs uncontrolled."""
+    runs = compare_admission(rate=100, duration=3, service_ms=20)
+    admitted, uncontrolled = runs["admission"]["interactive"], runs["uncontrolled"]["interactive"]
+    return {
+        "n": admitted["sent"],
+        "p50_ms": admitted["p50_ms"],
+        "p95_ms": admitted["p95_ms"],
+        "p99_ms": admitted["p99_ms"],
+        "throughput_per_s": admitted["goodput_per_s"],
+        "uncontrolled_p99_ms": uncontrolled["p99_ms"],
+        "uncontrolled_goodput_per_s": uncontrolled["goodput_per_s"],
+        "rejected": admitted["rejected_429"] + admitted["rejected_503"],
+        "batch_shed": runs["admission"]["batch"]["rejected_503"],
+        "p99_bounded": runs["bounded"],
+    }
+
+
+def bench_startup(args) -> dict:
+    """Import time per entry point; the common keys summarise the ones that imported."""
+    entries = measure_startup_times(runs=args.repeat)
+    times = sorted(r["import_ms"] for r in entries if r["ok"])
+    if not times:
+        raise Skip("no entry point could be imported (missing dependencies)")
+    return {
+        "n": len(times),
+        "total_s": round(sum(times) / 1000, 4),
+        "throughput_per_s": round(1000 / percentile(times, 50), 2),
+        "p50_ms": percentile(times, 50),
+        "p95_ms": percentile(times, 95),
+        "p99_ms": percentile(times, 99),
+        "entry_points": entries,
+    }
+
+
+COMPONENTS = {
+    "clean": bench_clean,
+    "summarize": bench_summarize,
+    "summary_budget": bench_summary_budget,
+    "summary_packing": bench_summary_packing,
+    "summary_latency": bench_summary_latency,
+    "card_cache": bench_card_cache,
+    "feed_snapshots": bench_feed_snapshots,
+    "content_store": bench_content_store,
+    "work_queue": bench_work_queue,
+    "keywords": bench_keywords,
+    "trending": bench_trending,
+    "urls": bench_urls,
+    "vector_local": bench_vector_local,
+    "vector_chroma": bench_vector_chroma,
+    "embed": bench_embed,
+    "tts": bench_tts,
+    "tts_cache": bench_tts_cache,
+    "admission": bench_admission,
+    "startup": bench_startup,
+}
+
+
+# ---------------- BASELINES ----------------
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Returns a description of every component that is slower than the baseline by more than `tolerance`."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get("components", {}).get(name)
+        if not previous or "p50_ms" not in current or "p50_ms" not in previous:
+            continue
+        if current["p50_ms"] > previous["p50_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p50 {previous['p50_ms']:.3f} -> {current['p50_ms']:.3f} ms")
+        if current["throughput_per_s"] < previous["throughput_per_s"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {previous['throughput_per_s']:.1f} -> "
+                               f"{current['throughput_per_s']:.1f} /s")
+    return regressions
+
+
+# ---------------- MAIN ----------------
+def main():
+    parser = argparse.ArgumentParser(description="Run the offline benchmark suite.")
+    parser.add_argument("--only", help=f"Comma-separated components ({', '.join(COMPONENTS)}).")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the inputs for fast components.")
+    parser.add_argument("--corpus", help="Directory of recorded pages (*.html, *.md, *.txt) for 'clean'.")
+    parser.add_argument("--corpus-size", type=int, default=60)
+    parser.add_argument("--trending-articles", type=int, default=5000)
+    parser.add_argument("--vector-size", type=int, default=20000)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Simulated Gemini latency per call (seconds).")
+    parser.add_argument("--llm-latency-per-1k", type=float, default=0.0,
+                        help="Simulated extra Gemini latency per 1000 prompt tokens (seconds).")
+    parser.add_argument("--rpm", type=float, default=15, help="Gemini quota used to report articles per minute.")
+    parser.add_argument("--summaries", help="JSON export of real summaries for 'tts_cache' (strings or articles).")
+    parser.add_argument("--tts-requests", type=int, default=200)
+    parser.add_argument("--tts-latency-per-phoneme", type=float, default=2e-4,
+                        help="Simulated Kokoro inference time per phoneme when kokoro is not installed (seconds).")
+    parser.add_argument("--rpc-latency", type=float, default=0.002, help="Simulated Firestore RPC latency (seconds).")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown before flagging (0.2 = 20%%).")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the baseline.")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    selected = args.only.split(",") if args.only else list(COMPONENTS)
+    unknown = [name for name in selected if name not in COMPONENTS]
+    if unknown:
+        parser.error(f"Unknown components: {', '.join(unknown)}")
+
+    print("=" * 60)
+    print("  OFFLINE BENCHMARK SUITE")
+    print("=" * 60)
+    results, skipped = {}, {}
+    for name in selected:
+        print(f"\n▶ {name}")
+        try:
+            results[name] = COMPONENTS[name](args)
+            r = results[name]
+            print(f"   p50 {r['p50_ms']:.3f} ms | p95 {r['p95_ms']:.3f} ms | {r['throughput_per_s']:.1f}/s (n={r['n']})")
+        except Skip as e:
+            skipped[name] = str(e)
+            print(f"   skipped: {e}")
+
+    run = {
+        "run_at": datetime.utcnow().isoformat(),
+        "machine": {"platform": platform.platform(), "python": platform.python_version(),
+                    "processor": platform.processor(), "cpus": os.cpu_count()},
+        "components": results,
+        "skipped": skipped,
+    }
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    results_path = os.path.join(RESULTS_DIR, f"benchmark_{datetime.utcnow():%Y%m%d%H%M%S}.json")
+    with open(results_path, "w") as f:
+        json.dump(run, f, indent=1)
+    print(f"\nResults saved to {results_path}")
+
+    regressions = []
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"\n⚠️ Regressions against {BASELINE_PATH}:")
+            for line in regressions:
+                print(f"   {line}")
+        else:
+            print("\n✅ No regressions against the baseline.")
+
+    if args.save_baseline:
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(run, f, indent=1)
+        print(f"Baseline saved to {BASELINE_PATH}")
+
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Startup Benchmark
+-----------------
+Measures how long each entry point takes to import, using
+`python -X importtime` in a fresh interpreter per run. Each script is
+imported the way `python <script>` would load it (its own directory first on
+sys.path), but without running its __main__ block, so the numbers are pure
+import-time cost: module-level work, client creation and heavy libraries.
+
+For every entry point it reports the median import time (interpreter
+startup excluded), its heaviest direct imports, and which heavy
+libraries (torch, chromadb, LangChain, Firebase, ...) got loaded. A CLI job
+that doesn't use a client should not pay for it.
+
+Usage:
+    python startup.py [--runs 3] [--only daily_pipeline,summarizer]
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+python_services_dir = os.path.abspath(os.path.join(current_dir, '..'))
+scripts_dir = os.path.abspath(os.path.join(python_services_dir, '..', 'scripts'))
+
+# name -> script path
+ENTRY_POINTS = {
+    "daily_pipeline": os.path.join(python_services_dir, "daily_pipeline.py"),
+    "data_fetcher": os.path.join(python_services_dir, "data_fetcher", "main.py"),
+    "clean_content": os.path.join(python_services_dir, "clean_content", "clean_content.py"),
+    "summarizer": os.path.join(python_services_dir, "summarizer", "main.py"),
+    "embedding_service": os.path.join(python_services_dir, "embedding_service", "main.py"),
+    "search_query_service": os.path.join(python_services_dir, "search_query_service", "main.py"),
+    "tts_service": os.path.join(python_services_dir, "tts_service", "main.py"),
+}
+if os.path.isdir(scripts_dir):
+    for file_name in sorted(os.listdir(scripts_dir)):
+        if file_name.endswith(".py"):
+            ENTRY_POINTS[f"scripts/{file_name[:-3]}"] = os.path.join(scripts_dir, file_name)
+
+# Libraries that cost hundreds of milliseconds (or a network connection) to load
+HEAVY_MODULES = [
+    "torch", "sentence_transformers", "transformers", "chromadb", "kokoro",
+    "langchain_google_genai", "langchain_core", "firebase_admin", "google.cloud.firestore",
+    "readability", "lxml", "numpy", "hnswlib",
+]
+
+_IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)")
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int]]:
+    """Returns (module, cumulative µs, nesting depth) for every line of -X importtime output."""
+    entries = []
+    for line in stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match:
+            depth = len(match.group(3)) // 2
+            entries.append((match.group(4), int(match.group(2)), depth))
+    return entries
+
+
+def _run(code: str, env: dict) -> tuple[float, int, str]:
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          capture_output=True, text=True, env=env, cwd=python_services_dir)
+    return time.perf_counter() - started, proc.returncode, proc.stderr
+
+
+def _env() -> dict:
+    env = dict(os.environ)
+    # Importing must never need the network; make any accidental download fail fast.
+    env.setdefault("HF_HUB_OFFLINE", "1")
+    env.setdefault("TRANSFORMERS_OFFLINE", "1")
+    return env
+
+
+def measure_startup(name: str, script: str, runs: int = 3, baseline_modules: set | None = None) -> dict:
+    """
+    Imports `script` in `runs` fresh interpreters and returns the median
+    import time of everything it pulled in beyond interpreter startup.
+    """
+    env = _env()
+    if baseline_modules is None:
+        baseline_modules = {module for module, _, _ in parse_importtime(_run("pass", env)[2])}
+
+    script_dir, module = os.path.split(script)
+    code = f"import sys; sys.path.insert(0, {script_dir!r}); import {module[:-3]}"
+    import_ms, wall_ms, entries, error = [], [], [], None
+    for _ in range(runs):
+        wall, returncode, stderr = _run(code, env)
+        entries = [e for e in parse_importtime(stderr) if e[0] not in baseline_modules]
+        if returncode != 0:
+            error = [line for line in stderr.splitlines() if not line.startswith("import time:")][-1:]
+            error = error[0] if error else f"exit code {returncode}"
+            break
+        import_ms.append(sum(us for _, us, depth in entries if depth == 0) / 1000)
+        wall_ms.append(wall * 1000)
+
+    loaded = {module for module, _, _ in entries}
+    # Depth 0 is the entry point itself; its direct imports show where the time goes.
+    top = sorted(((module, us) for module, us, depth in entries if depth == 1), key=lambda e: -e[1])[:5]
+    result = {
+        "name": name,
+        "ok": error is None,
+        "import_ms": round(statistics.median(import_ms), 1) if import_ms else None,
+        "wall_ms": round(statistics.median(wall_ms), 1) if wall_ms else None,
+        "heaviest_imports": [{"module": module, "ms": round(us / 1000, 1)} for module, us in top],
+        "heavy_modules_loaded": [module for module in HEAVY_MODULES if module in loaded],
+    }
+    if error:
+        result["error"] = error
+    return result
+
+
+def measure_all(names: list[str] | None = None, runs: int = 3) -> list[dict]:
+    """Measures every entry point (or only `names`)."""
+    baseline_modules = {module for module, _, _ in parse_importtime(_run("pass", _env())[2])}
+    return [measure_startup(name, ENTRY_POINTS[name], runs, baseline_modules)
+            for name in (names or ENTRY_POINTS)]
+
+
+def print_report(results: list[dict]):
+    print(f"{'entry point':<34}{'import ms':>10}{'wall ms':>10}  heavy modules loaded")
+    for r in results:
+        if r["ok"]:
+            heavy = ", ".join(r["heavy_modules_loaded"]) or "-"
+            print(f"{r['name']:<34}{r['import_ms']:>10.1f}{r['wall_ms']:>10.1f}  {heavy}")
+        else:
+            print(f"{r['name']:<34}{'failed':>10}{'':>10}  {r['error'][:70]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import time of every entry point.")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--only", help=f"Comma-separated entry points ({', '.join(ENTRY_POINTS)}).")
+    args = parser.parse_args()
+
+    names = args.only.split(",") if args.only else None
+    unknown = [name for name in names or [] if name not in ENTRY_POINTS]
+    if unknown:
+        parser.error(f"Unknown entry points: {', '.join(unknown)}")
+    print_report(measure_all(names, args.runs))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Ingest-to-Summary Latency (Firestore emulator)
+----------------------------------------------
+Runs the summarizer in listener mode (summarizer/main.py --listen) against
+the Firestore emulator, with Gemini replaced by the fake chat model, then
+writes pending articles the way data_fetcher does and measures how long
+each one takes to come back 'completed'. It also exercises what the
+listener has to survive: a full in-process queue (--queue-size smaller
+than --articles) and a forced re-subscription halfway through. It checks
+that every article was summarized exactly once.
+
+Never run it against a real project: it refuses to start unless
+FIRESTORE_EMULATOR_HOST is set.
+
+Usage:
+    firebase emulators:start --only firestore
+    FIRESTORE_EMULATOR_HOST=localhost:8081 python summary_latency.py [--articles 40] [--interval 0.1]
+"""
+
+import os
+import sys
+import time
+import uuid
+import argparse
+import threading
+import importlib.util
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+python_services_dir = os.path.abspath(os.path.join(current_dir, '..'))
+summarizer_dir = os.path.join(python_services_dir, "summarizer")
+for path in (current_dir, python_services_dir, summarizer_dir):
+    if path not in sys.path:
+        sys.path.append(path)
+
+from fixtures import build_articles
+from fakes import fake_chat_model
+from shared.observability.metrics import percentile
+
+
+def _load_summarizer(queue_size: int, llm_latency: float):
+    """Imports summarizer/main.py with the fake model and no rate limit."""
+    os.environ.setdefault("GEMINI_API_KEY", "offline-benchmark")
+    os.environ["SUMMARY_LISTEN_QUEUE_SIZE"] = str(queue_size)
+    from summary_engine import langgraph_agent
+    from summary_engine.token_budget import count_tokens
+    model = fake_chat_model(llm_latency, count_tokens=count_tokens)
+    langgraph_agent.ChatGoogleGenerativeAI = lambda **kwargs: model
+    langgraph_agent._chains.clear()
+
+    spec = importlib.util.spec_from_file_location("summarizer_main", os.path.join(summarizer_dir, "main.py"))
+    summarizer = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(summarizer)
+    return summarizer, model
+
+
+def measure_latency(articles: int = 40, interval: float = 0.1, queue_size: int = 10, llm_latency: float = 0.2,
+                    timeout: float = 120.0) -> dict:
+    if not os.getenv("FIRESTORE_EMULATOR_HOST"):
+        raise RuntimeError("FIRESTORE_EMULATOR_HOST is not set; this benchmark only runs against the emulator.")
+
+    summarizer, model = _load_summarizer(queue_size, llm_latency)
+    db = summarizer.get_db()
+    run_id = uuid.uuid4().hex[:8]
+
+    # Patch the listener class before the worker creates it, to count summary
+    # writes and to reach the listener for the forced reconnect.
+    listeners = []
+    original_init = summarizer.PendingArticleListener.__init__
+
+    def tracking_init(self, *a, **kw):
+        original_init(self, *a, **kw)
+        listeners.append(self)
+    summarizer.PendingArticleListener.__init__ = tracking_init
+
+    writes = {}
+    original_write = summarizer._write_results_in_transaction
+
+    def counting_write(transaction, results):
+        written = original_write(transaction, results)
+        for doc_id in written:
+            writes[doc_id] = writes.get(doc_id, 0) + 1
+        return written
+    summarizer._write_results_in_transaction = counting_write
+
+    worker = threading.Thread(target=summarizer.run_listener, kwargs={"concurrency": 2, "rpm": 0}, daemon=True)
+    worker.start()
+    while not (listeners and listeners[0].is_active()):
+        time.sleep(0.05)
+
+    # --- Ingest, like data_fetcher: pending articles with their raw content ---
+    written_at = {}
+    for i, article in enumerate(build_articles(articles)):
+        doc_id = f"latency-{run_id}-{i:04d}"
+        db.collection("articles").document(doc_id).set({
+            "title": article["title"], "url": article["url"], "category": article["category"],
+            "publishedAt": article["publishedAt"], "full_clean_content": article["content"],
+            "processing_status": "pending",
+        })
+        written_at[doc_id] = time.time()
+        if i == articles // 2:
+            listeners[0]._watch.unsubscribe()  # the worker has to notice and subscribe again
+        time.sleep(interval)
+
+    # --- Wait for every summary ---
+    completed_at = {}
+    deadline = time.time() + timeout
+    refs = [db.collection("articles").document(doc_id) for doc_id in written_at]
+    while len(completed_at) < len(refs) and time.time() < deadline:
+        now = time.time()
+        for snapshot in db.get_all(refs, field_paths=["processing_status"]):
+            if snapshot.id not in completed_at and (snapshot.to_dict() or {}).get("processing_status") == "completed":
+                completed_at[snapshot.id] = now
+        time.sleep(0.05)
+
+    summarizer._stop.set()
+    worker.join(timeout=10)
+    for ref in refs:
+        ref.delete()
+
+    latencies = sorted(completed_at[i] - written_at[i] for i in completed_at)
+    return {
+        "articles": articles,
+        "completed": len(completed_at),
+        "summarized_more_than_once": sum(1 for count in writes.values() if count > 1),
+        "latency_p50_s": round(percentile(latencies, 50), 3) if latencies else None,
+        "latency_p95_s": round(percentile(latencies, 95), 3) if latencies else None,
+        "latency_max_s": round(latencies[-1], 3) if latencies else None,
+        "poll_mode_interval_s": summarizer.IDLE_POLL_SECONDS,
+        "llm_calls": model.calls,
+        "listener": listeners[0].stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure ingest-to-summary latency of the listener mode.")
+    parser.add_argument("--articles", type=int, default=40)
+    parser.add_argument("--interval", type=float, default=0.1, help="Seconds between article writes.")
+    parser.add_argument("--queue-size", type=int, default=10, help="Listener queue size (small to force overflow).")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Simulated Gemini latency per call (seconds).")
+    args = parser.parse_args()
+    result = measure_latency(args.articles, args.interval, args.queue_size, args.llm_latency)
+    for key, value in result.items():
+        print(f"{key:<28}{value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,106 +1,327 @@
 """
 Daily Automated News Pipeline
 ------------------------------
-Fetches fresh news → cleans → summarizes → stores in Firestore.
+Fetches fresh news → scrapes → cleans → summarizes → embeds → stores in Firestore.
 Works with your existing service modules.
+
+Every article moves through a durable local work queue
+(shared/pipeline/work_queue.py), and each stage's result is saved there
+before the next stage starts. If a run crashes or is killed, the next run
+picks up every article exactly where it stopped, so finished scrapes and
+summaries are never paid for twice.
+
+Usage:
+    python daily_pipeline.py [--resume-only] [--release-claims] [--profile]
 """
 
 import os
 import sys
-import time
+import socket
+import argparse
 from datetime import datetime
 from dotenv import load_dotenv
 
 # --- Import local modules ---
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '.')))
 
-from data_fetcher.main import fetch_latest_news
+# --- Load Environment Variables ---
+# Before the shared imports: several of them read their settings at import time.
+load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
+
+from data_fetcher.sources.newsapi_client import IncrementalNewsFetcher, NEWS_COUNTRIES
+from data_fetcher.sources.jina_scraper import scrape_articles
+from data_fetcher.sources.scrape_cache import get_scrape_cache
 from clean_content.clean_content import deep_clean_html
-from summarizer.main import get_summary
-from shared.database.firestore_client import db
+from shared.database.firestore_client import get_db
+from shared.database.article_cache import notify_articles_updated, notify_trending
+from shared.database.feed_snapshots import update_feeds
+from shared.database.vector_store import build_vector_metadata
+from shared.observability.metrics import metrics
+from shared.observability.profiling import profile_run
+from shared.pipeline.work_queue import WorkQueue
+from shared.search.keywords import get_keyword_extractor
+from shared.storage.content_store import store_bodies
+from shared.utils.urls import canonicalize_url, make_doc_id
 
 
 # ---------------- SETUP ----------------
-load_dotenv(os.path.join(os.path.dirname(__file__), '..', '.env'))
-
 CATEGORIES = ['business', 'entertainment', 'general', 'health', 'science', 'sports', 'technology']
+MIN_CONTENT_LENGTH = 300
+SCRAPE_BATCH_SIZE = 50
+STAGE_BATCH_SIZE = 10
+SUMMARY_BATCH_SIZE = 24
+EMBED_BATCH_SIZE = 50
+WORKER_ID = f"{socket.gethostname()}-{os.getpid()}"
 
 
-# ---------------- MAIN PIPELINE ----------------
-def run_daily_pipeline():
-    print("=" * 60)
-    print("🚀 STARTING DAILY NEWS PIPELINE")
-    print("=" * 60)
-    total_articles = 0
-    total_cleaned = 0
-    total_summarized = 0
+# ---------------- STAGES ----------------
+def enqueue_new_articles(queue: WorkQueue) -> int:
+    """Fetches headlines newer than the last run and adds unseen ones to the queue."""
+    news_fetcher = IncrementalNewsFetcher()
+    db = get_db()
+    articles_ref = db.collection("articles")
+    queued = 0
 
     for category in CATEGORIES:
         print(f"\n📰 Fetching articles for category: {category.upper()}")
 
-        try:
-            articles = fetch_latest_news(category=category, country="us")
-        except Exception as e:
-            print(f"❌ Failed to fetch news for {category}: {e}")
-            continue
+        # Only headlines newer than the last run, across all configured countries
+        candidates = {}
+        for country in NEWS_COUNTRIES:
+            for article in news_fetcher.fetch(category, country):
+                doc_id = make_doc_id(article.get("url"))
+                if doc_id and not queue.contains(doc_id):
+                    candidates.setdefault(doc_id, article)
 
-        if not articles:
-            print(f"⚠️ No articles fetched for {category}.")
+        if not candidates:
+            print(f"⚠️ No new articles for {category}.")
             continue
 
-        for article in articles:
-            url = article.get("url")
-            if not url:
+        # Skip articles already stored, in one round trip
+        existing = {
+            snapshot.id for snapshot in db.get_all([articles_ref.document(i) for i in candidates], field_paths=["url"])
+            if snapshot.exists
+        }
+        for doc_id, article in candidates.items():
+            if doc_id not in existing and queue.enqueue(doc_id, category, article):
+                queued += 1
+
+    # The articles are durable in the queue now, so the watermarks can move on.
+    news_fetcher.commit()
+    return queued
+
+
+def scrape_stage(queue: WorkQueue) -> int:
+    """fetched → scraped: pulls full article text through the Jina Reader, concurrently."""
+    done = 0
+    while items := queue.claim("fetched", WORKER_ID, limit=SCRAPE_BATCH_SIZE):
+        contents = scrape_articles([item["payload"]["article"]["url"] for item in items])
+        for item in items:
+            article = item["payload"]["article"]
+            # Fall back to whatever text NewsAPI gave us when scraping fails
+            raw_content = contents.get(article["url"]) or article.get("content") or ""
+            if not raw_content:
+                queue.fail(item, "scrape returned no content")
                 continue
+            queue.advance(item, "scraped", raw_content=raw_content)
+            done += 1
+    return done
 
-            doc_id = url.replace("/", "_").replace(".", "_")
-            doc_ref = db.collection("articles").document(doc_id)
 
-            # Skip existing articles
-            if doc_ref.get().exists:
+def clean_stage(queue: WorkQueue) -> int:
+    """scraped → cleaned"""
+    done = 0
+    while items := queue.claim("scraped", WORKER_ID, limit=STAGE_BATCH_SIZE):
+        for item in items:
+            with metrics.timed("clean"):
+                cleaned = deep_clean_html(item["payload"]["raw_content"])
+            metrics.count_bytes("clean", len(item["payload"]["raw_content"]))
+            if len(cleaned) < MIN_CONTENT_LENGTH:
+                metrics.count_items("clean", outcome="too_short")
+                queue.skip(item, "content too short")
                 continue
+            metrics.count_items("clean")
+            # The raw scrape is no longer needed once cleaned
+            item["payload"].pop("raw_content", None)
+            queue.advance(item, "cleaned", content=cleaned)
+            done += 1
+    return done
+
 
-            # --- Step 1: Clean Content ---
-            raw_content = article.get("full_clean_content", "")
-            cleaned = deep_clean_html(raw_content)
+def summarize_stage(queue: WorkQueue) -> int:
+    """cleaned → summarized: Gemini, several articles per request, rate limited by the summary engine."""
+    # Imported here so runs with nothing to summarize never load LangChain
+    from summarizer.summary_engine.langgraph_agent import get_summaries, SUMMARY_FAILED_MESSAGE
 
-            if len(cleaned) < 300:
+    done = 0
+    while items := queue.claim("cleaned", WORKER_ID, limit=SUMMARY_BATCH_SIZE):
+        try:
+            with metrics.timed("summarize"):
+                summaries = get_summaries({item["doc_id"]: item["payload"]["content"] for item in items})
+        except Exception as e:
+            print(f"⚠️ Failed to summarize articles: {e}")
+            summaries = {}
+
+        for item in items:
+            summary = summaries.get(item["doc_id"])
+            if not summary or summary == SUMMARY_FAILED_MESSAGE:
+                metrics.count_error("summarize")
+                queue.fail(item, "summary could not be generated")
                 continue
+            queue.advance(item, "summarized", summary=summary)
+            metrics.count_items("summarize")
+            done += 1
+            print(f"✅ Summarized: {item['payload']['article'].get('title', '')[:80]}")
+    return done
+
+
+def embed_stage(queue: WorkQueue) -> int:
+    """summarized → embedded: writes the article's vector to the vector store."""
+    items = queue.claim("summarized", WORKER_ID, limit=EMBED_BATCH_SIZE)
+    if not items:
+        return 0
 
-            # --- Step 2: Generate Summary (Gemini, rate limited) ---
-            try:
-                summary = get_summary(cleaned)
-                total_summarized += 1
-            except Exception as e:
-                print(f"⚠️ Failed to summarize article: {e}")
-                summary = ""
+    # Load the model and the vector store only once there is something to embed
+    try:
+        from shared.llm.embedding_client import create_hf_embedding, get_model, TASK_TYPE_DOCUMENT
+        from shared.database.vector_store import get_vector_store
+        if get_model() is None:
+            print("⚠️ Embedding model unavailable; articles will be stored without vectors.")
+            vector_store = None
+        else:
+            vector_store = get_vector_store()
+    except RuntimeError as e:
+        print(f"⚠️ Vector store unavailable ({e}); articles will be stored without vectors.")
+        vector_store = None
 
-            # --- Step 3: Save to Firestore ---
-            doc_ref.set({
+    done = 0
+    while items:
+        embedded, vectors = [], 0
+        for item in items:
+            if vector_store is not None:
+                with metrics.timed("embed"):
+                    embedding = create_hf_embedding(item["payload"]["content"], TASK_TYPE_DOCUMENT)
+                if embedding is None:
+                    # Store the article anyway; it can be re-embedded later
+                    metrics.count_error("embed")
+                    print(f"⚠️ Embedding failed, storing without a vector: {item['doc_id']}")
+                else:
+                    vector_store.add(
+                        ids=[item["doc_id"]],
+                        embeddings=[embedding],
+                        metadatas=[build_vector_metadata(item["payload"]["article"], item["category"])]
+                    )
+                    vectors += 1
+            embedded.append(item)
+
+        # Vectors must be durable before the queue records them as embedded
+        if vectors:
+            with metrics.timed("store", target="vector_store"):
+                vector_store.persist()
+        metrics.count_items("embed", vectors)
+        for item in embedded:
+            queue.advance(item, "embedded")
+        done += len(embedded)
+        items = queue.claim("summarized", WORKER_ID, limit=EMBED_BATCH_SIZE)
+    return done
+
+
+def store_stage(queue: WorkQueue) -> int:
+    """embedded → stored: writes the finished article to Firestore, its body to the content store."""
+    db = get_db()
+    done = 0
+    while items := queue.claim("embedded", WORKER_ID, limit=STAGE_BATCH_SIZE):
+        keywords_by_id = get_keyword_extractor().extract_many({
+            item["doc_id"]: {
+                "title": item["payload"]["article"].get("title"),
+                "description": item["payload"]["article"].get("description"),
+                "body": item["payload"]["content"],
+            }
+            for item in items
+        })
+
+        batch, stored = db.batch(), {}
+        contents = {item["doc_id"]: item["payload"]["content"] for item in items}
+        for item in items:
+            payload = item["payload"]
+            article = payload["article"]
+            stored[item["doc_id"]] = {
                 "title": article.get("title", ""),
-                "url": url,
-                "category": category,
-                "content": cleaned,
-                "summary": summary,
-                "publishedAt": article.get("publishedAt", datetime.utcnow()),
+                "url": article["url"],
+                "canonical_url": canonicalize_url(article["url"]),
+                "category": item["category"],
+                **store_bodies({"content": payload["content"]}),
+                "summary": payload["summary"],
+                "keywords": keywords_by_id[item["doc_id"]],
+                "publishedAt": article.get("publishedAt") or datetime.utcnow(),
                 "processing_status": "completed",
                 "createdAt": datetime.utcnow(),
                 "updatedAt": datetime.utcnow(),
-            }, merge=True)
+            }
+            batch.set(db.collection("articles").document(item["doc_id"]), stored[item["doc_id"]], merge=True)
+        try:
+            with metrics.timed("store", target="firestore"):
+                batch.commit()
+        except Exception as e:
+            print(f"⚠️ Failed to store articles: {e}")
+            for item in items:
+                queue.fail(item, e)
+            continue
+
+        for item in items:
+            queue.advance(item, "stored")
+        metrics.count_items("store", len(items))
+        done += len(items)
+
+        # --- Refresh the feed snapshots, the search service's cached cards and trending topics ---
+        update_feeds({doc_id: {**data, "content": contents[doc_id]} for doc_id, data in stored.items()})
+        notify_articles_updated([item["doc_id"] for item in items])
+        notify_trending(stored)
+    return done
+
+
+def release_dead_claims(queue: WorkQueue) -> int:
+    """Frees items claimed by earlier runs on this host whose process is gone, without waiting for their leases."""
+    host = socket.gethostname()
+    released = 0
+    for claimant in queue.claimants():
+        claim_host, _, pid = (claimant or "").rpartition("-")
+        if claim_host != host or not pid.isdigit() or int(pid) == os.getpid():
+            continue
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            released += queue.release_claims(claimant)
+        except PermissionError:
+            pass  # the process exists under another user
+    return released
+
+
+# ---------------- MAIN PIPELINE ----------------
+def run_daily_pipeline(resume_only: bool = False, release_claims: bool = False):
+    print("=" * 60)
+    print("🚀 STARTING DAILY NEWS PIPELINE")
+    print("=" * 60)
+    queue = WorkQueue()
+
+    released = queue.release_claims() if release_claims else release_dead_claims(queue)
+    if released:
+        print(f"♻️ Resuming {released} articles claimed by an interrupted run.")
+
+    queued = 0 if resume_only else enqueue_new_articles(queue)
 
-            total_articles += 1
-            total_cleaned += 1
-            print(f"✅ Processed: {article.get('title', '')[:80]}")
+    print("\n⚙️ Processing the work queue...")
+    scraped = scrape_stage(queue)
+    cleaned = clean_stage(queue)
+    summarized = summarize_stage(queue)
+    embedded = embed_stage(queue)
+    stored = store_stage(queue)
 
-            # --- Respect Gemini API rate limit (≈ 15 requests/min) ---
-            time.sleep(4)
+    scrape_cache = get_scrape_cache()
+    if scrape_cache:
+        scrape_cache.report()
 
     print("\n🎯 DAILY PIPELINE COMPLETE!")
-    print(f"→ Articles processed: {total_articles}")
-    print(f"→ Cleaned: {total_cleaned}")
-    print(f"→ Summarized: {total_summarized}")
+    print(f"→ New articles queued: {queued}")
+    print(f"→ Scraped: {scraped}")
+    print(f"→ Cleaned: {cleaned}")
+    print(f"→ Summarized: {summarized}")
+    print(f"→ Embedded: {embedded}")
+    print(f"→ Stored: {stored}")
+    print(f"→ Queue state: {queue.counts()}")
+    metrics.write_run_report("daily_pipeline", extra={"queue": queue.counts()})
     print("=" * 60)
 
 
 if __name__ == "__main__":
-    run_daily_pipeline()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run the daily news pipeline.")
+    parser.add_argument("--resume-only", action="store_true",
+                        help="Only finish articles already in the queue; do not fetch new headlines.")
+    parser.add_argument("--release-claims", action="store_true",
+                        help="Return every claimed item to the queue, e.g. after a crash on another host. "
+                             "Only use when no other run is active.")
+    parser.add_argument("--profile", action="store_true",
+                        help="Sample the run and write a flamegraph-ready profile to .cache/profiles.")
+    args = parser.parse_args()
+    with profile_run("daily_pipeline", enabled=args.profile):
+        run_daily_pipeline(resume_only=args.resume_only, release_claims=args.release_claims)
@@ -1,8 +1,5 @@
 import sys
 import os
-import time
-import re
-import string
 from dotenv import load_dotenv
 
 # This block ensures Python can find the 'shared' directory
@@ -11,40 +8,30 @@ parent_dir = os.path.abspath(os.path.join(current_dir, '..'))
 if parent_dir not in sys.path:
     sys.path.append(parent_dir)
 
+# --- Load Environment Variables ---
+# Before the shared imports: several of them read their settings at import time.
+load_dotenv(dotenv_path=os.path.join(current_dir, '..', '..', '.env'))
+
 #  IMPORT ALL OUR CLIENTS 
-from shared.database.firestore_client import db
+from shared.database.firestore_client import get_db
+from shared.utils.urls import canonicalize_url, make_doc_id
+from shared.observability.metrics import metrics
+from shared.search.keywords import get_keyword_extractor
+from shared.storage.content_store import store_bodies
 # (No ChromaDB or embedding clients needed anymore)
 
 # Import local source clients
-from sources.newsapi_client import fetch_latest_news
-from sources.jina_scraper import scrape_article_content
-
-# A simple list of common "stop words" to ignore in keywords
-STOP_WORDS = set([
-    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'he',
-    'in', 'is', 'it', 'its', 'of', 'on', 'that', 'the', 'to', 'was', 'were', 'will', 'with'
-])
-
-def _generate_keywords(title: str, description: str) -> list[str]:
-    """
-    Generates a list of unique, lowercase keywords from a title and description
-    for Firestore 'array-contains-any' search.
-    """
-    if not title: title = ""
-    if not description: description = ""
-    
-    # Combine title and description for a richer keyword set
-    full_text = title + " " + description
-    
-    # Remove punctuation and convert to lowercase
-    full_text = full_text.lower().translate(str.maketrans('', '', string.punctuation))
-    
-    # Split into individual words
-    words = re.split(r'\s+', full_text)
-    
-    # Filter out stop words and create a unique set, then convert to list
-    keywords = list(set(word for word in words if word and word not in STOP_WORDS and len(word) > 2))
-    return keywords
+from sources.newsapi_client import IncrementalNewsFetcher, NEWS_COUNTRIES
+from sources.jina_scraper import scrape_articles
+from sources.scrape_cache import get_scrape_cache
+
+def _existing_doc_ids(doc_ids: list[str]) -> set[str]:
+    """Checks which article IDs already exist, with batched reads instead of one get() per article."""
+    existing = set()
+    for start in range(0, len(doc_ids), 100):
+        refs = [get_db().collection('articles').document(doc_id) for doc_id in doc_ids[start:start + 100]]
+        existing.update(snapshot.id for snapshot in get_db().get_all(refs, field_paths=['url']) if snapshot.exists)
+    return existing
 
 
 def main():
@@ -59,57 +46,93 @@ def main():
     ]
     
     total_new_articles_processed = 0
+    news_fetcher = IncrementalNewsFetcher()
+    failed_saves = set()  # (category, country) with an article that could not be stored
 
     for category in categories_to_fetch:
         print(f"\n--- Processing category: {category.upper()} ---")
         
-        articles_to_process = fetch_latest_news(category=category, country='us')
+        # Only headlines published since the last run, for every configured country
+        articles_to_process = []
+        for country in NEWS_COUNTRIES:
+            articles_to_process.extend(news_fetcher.fetch(category, country))
         if not articles_to_process:
             print(f"No new articles found for '{category}'. Skipping.")
             continue
 
+        candidates = {}
         for article in articles_to_process:
-            doc_id = article.get('url', '').replace('/', '_').replace('.', '_')
+            doc_id = make_doc_id(article.get('url', ''))
             if not doc_id:
                 print("  -> Skipping article with no URL.")
                 continue
-            
-            doc_ref = db.collection('articles').document(doc_id)
+            candidates.setdefault(doc_id, article)
 
-            if doc_ref.get().exists:
+        existing_ids = _existing_doc_ids(list(candidates))
+        new_articles = []
+        for doc_id, article in candidates.items():
+            if doc_id in existing_ids:
                 print(f"  -> Article '{article.get('title', 'Untitled')[:50]}...' already in Firestore. Skipping.")
                 continue
+            new_articles.append((get_db().collection('articles').document(doc_id), article))
 
-            # 1. SCRAPE with JinaAI
-            print(f"\nScraping: {article.get('title', 'Untitled')[:50]}...")
-            full_content = scrape_article_content(article.get('url'))
-            
-            # 2. GENERATE KEYWORDS
-            keywords = _generate_keywords(
-                article.get('title'), 
-                article.get('description') or article.get('content')
-            )
+        # 1. SCRAPE with JinaAI, all new articles of the category concurrently
+        print(f"\nScraping {len(new_articles)} new articles...")
+        scraped = scrape_articles([article.get('url') for _, article in new_articles])
+
+        # 2. GENERATE KEYWORDS (top TF-IDF terms, the whole batch at once), from the
+        #    full scrape; NewsAPI's 'content' is a truncated snippet. The corpus
+        #    frequencies only learn the articles that were actually saved (below).
+        extractor = get_keyword_extractor()
+        analyzed = extractor.analyze_many({
+            doc_ref.id: {
+                'title': article.get('title'),
+                'description': article.get('description'),
+                'body': scraped.get(article.get('url')) or article.get('content'),
+            }
+            for doc_ref, article in new_articles
+        })
+        keywords_by_id = extractor.select_many(analyzed)
+        saved_ids = []
+
+        for doc_ref, article in new_articles:
+            full_content = scraped.get(article.get('url'), "")
+            keywords = keywords_by_id[doc_ref.id]
 
             # 3. ASSEMBLE & SAVE to Firestore
             article['category'] = category
-            article['full_clean_content'] = full_content if full_content else ""
+            article['canonical_url'] = canonicalize_url(article.get('url'))
+            # The raw scrape stays inline, or goes to the content store when it is shared (gcs)
+            article.update(store_bodies({'full_clean_content': full_content}))
             article['processing_status'] = 'pending'
             article['keywords'] = keywords  # <-- ADD THE NEW KEYWORDS FIELD
             
             try:
-                doc_ref.set(article)
+                with metrics.timed("store"):
+                    doc_ref.set(article)
                 print(f"  -> Saved article with keywords to Firestore.")
+                metrics.count_items("store")
                 total_new_articles_processed += 1
+                saved_ids.append(doc_ref.id)
             except Exception as e:
                 print(f"  -> FAILED to save article. Error: {e}")
-
-            time.sleep(1) 
+                failed_saves.add((category, article.get('country')))
+        extractor.learn({doc_id: analyzed[doc_id] for doc_id in saved_ids})
         
+    # Advance the "since last run" window only where everything was stored,
+    # so failed articles are fetched again next run
+    for category, country in failed_saves:
+        news_fetcher.hold_back(category, country)
+    news_fetcher.commit()
+
+    scrape_cache = get_scrape_cache()
+    if scrape_cache:
+        scrape_cache.report()
+
     print("\n" + "=" * 45)
     print(f"  Data pipeline finished. Processed {total_new_articles_processed} new articles.")
+    metrics.write_run_report("data_fetcher")
     print("=" * 45)
 
 if __name__ == '__main__':
-    env_path = os.path.join(os.path.dirname(__file__), '..', '..', '.env')
-    load_dotenv(dotenv_path=env_path)
     main()
\ No newline at end of file
@@ -1,42 +1,196 @@
 import os
-import requests
+import random
+import asyncio
+from collections import deque
+from urllib.parse import urlparse
+import httpx
 
-def scrape_article_content(url: str) -> str:
+from .scrape_cache import ScrapeCache, get_scrape_cache
+from shared.observability.metrics import metrics
+
+# --- Configuration ---
+# The JinaAI Reader API is accessed by prepending its URL to the article URL.
+JINA_READER_URL = os.getenv("JINA_READER_URL", "https://r.jina.ai/")
+SCRAPE_MAX_CONCURRENCY = int(os.getenv("SCRAPE_MAX_CONCURRENCY", 8))
+SCRAPE_PER_HOST_CONCURRENCY = int(os.getenv("SCRAPE_PER_HOST_CONCURRENCY", 2))
+SCRAPE_MAX_RETRIES = int(os.getenv("SCRAPE_MAX_RETRIES", 3))
+SCRAPE_MIN_TIMEOUT = float(os.getenv("SCRAPE_MIN_TIMEOUT", 10))
+SCRAPE_MAX_TIMEOUT = float(os.getenv("SCRAPE_MAX_TIMEOUT", 60))
+RETRY_BASE_DELAY = 1.0
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class AdaptiveTimeout:
     """
-    Uses the JinaAI Reader API to scrape the full, clean content of a given URL.
-    
+    Per-request timeout that follows observed latencies: a few times the
+    recent p95, clamped to [SCRAPE_MIN_TIMEOUT, SCRAPE_MAX_TIMEOUT]. One slow
+    site then costs seconds instead of a full minute.
+    """
+
+    def __init__(self, minimum: float = SCRAPE_MIN_TIMEOUT, maximum: float = SCRAPE_MAX_TIMEOUT,
+                 factor: float = 3.0, window: int = 50):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.factor = factor
+        self.latencies = deque(maxlen=window)
+
+    def observe(self, seconds: float):
+        self.latencies.append(seconds)
+
+    def current(self) -> float:
+        if len(self.latencies) < 5:
+            return self.maximum
+        ordered = sorted(self.latencies)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        return max(self.minimum, min(self.maximum, p95 * self.factor))
+
+
+def _retry_delay(attempt: int, retry_after: str | None) -> float:
+    """Exponential backoff with jitter, honouring a numeric Retry-After header."""
+    if retry_after:
+        try:
+            return min(float(retry_after), SCRAPE_MAX_TIMEOUT)
+        except ValueError:
+            pass
+    return RETRY_BASE_DELAY * (2 ** attempt) * (0.5 + random.random())
+
+
+def _stale_or_empty(cached: dict | None, url: str) -> str:
+    """What a failed scrape returns: the stale cached copy when there is one, else ""."""
+    if cached:
+        print(f"  -> Serving the stale cached copy of {url}.")
+        return cached["content"]
+    return ""
+
+
+async def _scrape_one(client: httpx.AsyncClient, url: str, reader_url: str, global_limit: asyncio.Semaphore,
+                      host_limits: dict, timeout: AdaptiveTimeout, cache: ScrapeCache | None) -> str:
+    # Serve fresh cache entries without a request; revalidate stale ones conditionally.
+    cached = cache.lookup(url) if cache else None
+    if cached and cached["is_fresh"]:
+        cache.record_hit(cached)
+        print(f"  -> Scrape cache hit: {url}")
+        return cached["content"]
+    conditional_headers = cache.conditional_headers(cached) if cache else {}
+
+    host = urlparse(url).netloc
+    if host not in host_limits:
+        host_limits[host] = asyncio.Semaphore(SCRAPE_PER_HOST_CONCURRENCY)
+
+    for attempt in range(SCRAPE_MAX_RETRIES + 1):
+        retry_after = None
+        async with host_limits[host], global_limit:
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            try:
+                response = await client.get(f"{reader_url}{url}", headers=conditional_headers,
+                                            timeout=timeout.current())
+                timeout.observe(loop.time() - started)
+
+                if response.status_code == 304 and cached:
+                    cache.touch(url)
+                    cache.record_revalidated(cached)
+                    print(f"  -> Not modified since last scrape: {url}")
+                    return cached["content"]
+                if response.status_code == 200:
+                    print(f"  -> Successfully scraped: {url}")
+                    metrics.count_bytes("scrape", len(response.content))
+                    content = response.json().get('data', {}).get('content', '')
+                    if cache:
+                        cache.record_miss()
+                        if content:
+                            cache.store(url, content, response.headers.get("ETag"),
+                                        response.headers.get("Last-Modified"), len(response.content))
+                    return content
+                if response.status_code not in RETRYABLE_STATUS:
+                    print(f"  -> Failed to scrape {url}. Status: {response.status_code}, Response: {response.text[:200]}")
+                    return _stale_or_empty(cached, url)
+                retry_after = response.headers.get("Retry-After")
+                reason = f"status {response.status_code}"
+            except httpx.TimeoutException:
+                reason = f"timeout after {timeout.current():.0f}s"
+                # Count the timeout as a latency, so repeated timeouts raise the limit
+                timeout.observe(loop.time() - started)
+            except (httpx.HTTPError, ValueError) as e:
+                reason = str(e)
+
+        # Back off outside the semaphores so other URLs keep flowing.
+        if attempt < SCRAPE_MAX_RETRIES:
+            delay = _retry_delay(attempt, retry_after)
+            print(f"  -> Retrying {url} in {delay:.1f}s ({reason}).")
+            await asyncio.sleep(delay)
+
+    print(f"  -> Giving up on {url} after {SCRAPE_MAX_RETRIES + 1} attempts ({reason}).")
+    return _stale_or_empty(cached, url)
+
+
+async def _scrape_one_timed(*args) -> str:
+    """Runs _scrape_one and records its latency and outcome under the 'scrape' stage."""
+    with metrics.timed("scrape"):
+        content = await _scrape_one(*args)
+    metrics.count_items("scrape", outcome="ok" if content else "empty")
+    return content
+
+
+async def scrape_many(urls: list[str], max_concurrency: int = SCRAPE_MAX_CONCURRENCY,
+                      reader_url: str = None, use_cache: bool = True) -> dict[str, str]:
+    """
+    Scrapes many URLs concurrently through the JinaAI Reader API.
+
+    Uses one pooled HTTP client, bounds concurrency globally and per article
+    host, retries 429/5xx responses and timeouts with exponential backoff,
+    and adapts the per-request timeout to observed latencies. Results are
+    served from / saved to the on-disk scrape cache unless use_cache is False.
+
     Args:
-        url (str): The URL of the news article to scrape.
-        
+        urls (list[str]): Article URLs to scrape.
+        max_concurrency (int): Maximum requests in flight at once.
+        reader_url (str): Reader endpoint prefix (defaults to JINA_READER_URL).
+        use_cache (bool): Whether to use the scrape cache (see scrape_cache.py).
+
     Returns:
-        str: The clean, full content of the article in Markdown format, 
-             or an empty string if scraping fails.
+        dict[str, str]: Markdown content per URL; empty string where scraping failed.
     """
     api_key = os.getenv("JINA_API_KEY")
     if not api_key:
         print("Warning: JINA_API_KEY is not set. Cannot scrape full content.")
-        return ""
+        return {url: "" for url in urls}
 
-    # The JinaAI Reader API is accessed by prepending its URL
-    reader_url = f"https://r.jina.ai/{url}"
-    
     headers = {
         "Authorization": f"Bearer {api_key}",
         "Accept": "application/json"
     }
+    limits = httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency)
+    global_limit = asyncio.Semaphore(max_concurrency)
+    host_limits = {}
+    timeout = AdaptiveTimeout()
+    cache = get_scrape_cache() if use_cache else None
+    unique_urls = list(dict.fromkeys(urls))
+
+    async with httpx.AsyncClient(headers=headers, limits=limits, follow_redirects=True) as client:
+        contents = await asyncio.gather(*(
+            _scrape_one_timed(client, url, reader_url or JINA_READER_URL, global_limit, host_limits, timeout, cache)
+            for url in unique_urls
+        ))
+    return dict(zip(unique_urls, contents))
+
+
+def scrape_articles(urls: list[str], max_concurrency: int = SCRAPE_MAX_CONCURRENCY) -> dict[str, str]:
+    """Synchronous wrapper around scrape_many for the batch pipelines."""
+    if not urls:
+        return {}
+    return asyncio.run(scrape_many(urls, max_concurrency=max_concurrency))
 
-    try:
-        response = requests.get(reader_url, headers=headers, timeout=60)
-        
-        # Check if the request was successful
-        if response.status_code == 200:
-            data = response.json()
-            print(f"  -> Successfully scraped: {url}")
-            return data.get('data', {}).get('content', '')
-        else:
-            print(f"  -> Failed to scrape {url}. Status: {response.status_code}, Response: {response.text}")
-            return ""
-            
-    except requests.RequestException as e:
-        print(f"  -> An error occurred while scraping {url}: {e}")
-        return ""
+
+def scrape_article_content(url: str) -> str:
+    """
+    Uses the JinaAI Reader API to scrape the full, clean content of a given URL.
+
+    Args:
+        url (str): The URL of the news article to scrape.
+
+    Returns:
+        str: The clean, full content of the article in Markdown format,
+             or an empty string if scraping fails.
+    """
+    return scrape_articles([url]).get(url, "")
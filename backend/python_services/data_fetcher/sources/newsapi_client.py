@@ -1,44 +1,181 @@
 import os
+import sys
+import json
+import math
+from concurrent.futures import ThreadPoolExecutor
+import requests
 from newsapi import NewsApiClient
 
+# This block ensures Python can find the 'shared' directory
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+from shared.observability.metrics import metrics
+
+# --- Configuration ---
+NEWS_PAGE_SIZE = 100  # NewsAPI's maximum page size
+NEWS_MAX_PAGES = int(os.getenv("NEWS_MAX_PAGES", 5))
+NEWS_PAGE_CONCURRENCY = int(os.getenv("NEWS_PAGE_CONCURRENCY", 4))
+# Comma-separated country codes fetched by the pipelines, e.g. "us,in,gb".
+NEWS_COUNTRIES = [c.strip() for c in os.getenv("NEWS_COUNTRIES", "us").split(",") if c.strip()]
+WATERMARK_PATH = os.getenv(
+    "NEWS_WATERMARK_PATH",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '.cache', 'newsapi_watermarks.json'))
+)
+
+_client = None
+
+def _get_client() -> NewsApiClient:
+    """Returns one NewsApiClient for the process, sharing a pooled HTTP session."""
+    global _client
+    if _client is None:
+        api_key = os.getenv("NEWS_API_KEY")
+        if not api_key:
+            raise ValueError("FATAL: NEWS_API_KEY is not set in your .env file.")
+        _client = NewsApiClient(api_key=api_key, session=requests.Session())
+    return _client
+
+
+def _fetch_page(category: str, country: str, page: int) -> dict:
+    with metrics.timed("fetch"):
+        response = _get_client().get_top_headlines(
+            category=category,
+            language='en',
+            country=country,
+            page_size=NEWS_PAGE_SIZE,
+            page=page
+        )
+    metrics.count_items("fetch", len(response.get('articles') or []))
+    return response
+
+
+def _fetch_later_page(category: str, country: str, page: int) -> dict:
+    """_fetch_page() for pages after the first: an error is returned, not raised, so the other pages are kept."""
+    try:
+        return _fetch_page(category, country, page)
+    except Exception as e:
+        metrics.count_error("fetch")
+        return {'status': 'error', 'message': f"page {page}: {e}"}
+
+
+def fetch_top_headlines(category: str, country: str, newer_than: str | None = None) -> list[dict]:
+    """
+    Fetches every page of top headlines for a category and country.
+
+    The first page tells us how many results exist; the remaining pages are
+    then requested concurrently. When `newer_than` (an ISO publishedAt) is
+    given, articles at or before it are dropped, and no further pages are
+    requested once the first page already reaches back past it.
+
+    Returns:
+        list: Article dictionaries, newest first.
+    """
+    return _fetch_top_headlines(category, country, newer_than)[0]
+
+
+def _fetch_top_headlines(category: str, country: str, newer_than: str | None = None) -> tuple[list[dict], bool]:
+    """fetch_top_headlines(), also returning whether every page was fetched."""
+    first = _fetch_page(category, country, 1)
+    if first.get('status') != 'ok':
+        print(f"Error from NewsAPI: {first.get('message')}")
+        return [], False
+
+    articles = first.get('articles', [])
+    reached_watermark = newer_than is not None and any(
+        (a.get('publishedAt') or '') <= newer_than for a in articles
+    )
+    total_pages = min(NEWS_MAX_PAGES, math.ceil(first.get('totalResults', 0) / NEWS_PAGE_SIZE))
+
+    complete = True
+    if total_pages > 1 and not reached_watermark:
+        with ThreadPoolExecutor(max_workers=NEWS_PAGE_CONCURRENCY) as pool:
+            pages = pool.map(lambda page: _fetch_later_page(category, country, page), range(2, total_pages + 1))
+            for response in pages:
+                if response.get('status') == 'ok':
+                    articles.extend(response.get('articles', []))
+                else:
+                    complete = False
+                    print(f"Error from NewsAPI on a later page: {response.get('message')}")
+
+    if newer_than is not None:
+        articles = [a for a in articles if (a.get('publishedAt') or '') > newer_than]
+    articles.sort(key=lambda a: a.get('publishedAt') or '', reverse=True)
+    return articles, complete
+
+
+class IncrementalNewsFetcher:
+    """
+    Fetches only headlines newer than the previous run.
+
+    Keeps a high-water mark (the newest publishedAt seen) per (category,
+    country) in a small JSON file. New marks are held back until commit() is
+    called, so a run that crashes before storing its articles fetches them
+    again next time.
+    """
+
+    def __init__(self, path: str = WATERMARK_PATH):
+        self.path = path
+        self.watermarks = {}
+        self._pending = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.watermarks = json.load(f)
+
+    def fetch(self, category: str, country: str) -> list[dict]:
+        key = f"{category}|{country}"
+        newer_than = self.watermarks.get(key)
+        print(f"Fetching '{category}' news from '{country}'" + (f" newer than {newer_than}..." if newer_than else "..."))
+        try:
+            articles, complete = _fetch_top_headlines(category, country, newer_than)
+        except Exception as e:
+            print(f"An unexpected error occurred while fetching news: {e}")
+            return []
+
+        # A page is missing: keep the old mark so its articles are fetched again next run
+        if articles and complete:
+            self._pending[key] = max(a.get('publishedAt') or '' for a in articles)
+        elif articles:
+            print(f"⚠️ Incomplete fetch for '{category}' from '{country}'; not advancing its watermark.")
+        for article in articles:
+            article['country'] = country
+        print(f"Successfully fetched {len(articles)} new articles from NewsAPI.")
+        return articles
+
+    def hold_back(self, category: str, country: str):
+        """Keeps the previous mark for (category, country), e.g. when some of its articles failed to save."""
+        if self._pending.pop(f"{category}|{country}", None) is not None:
+            print(f"⚠️ Not advancing the watermark for '{category}' from '{country}'.")
+
+    def commit(self):
+        """Persists the high-water marks of everything fetched so far (and not held back)."""
+        if not self._pending:
+            return
+        self.watermarks.update(self._pending)
+        self._pending = {}
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path + ".tmp", "w") as f:
+            json.dump(self.watermarks, f, indent=1, sort_keys=True)
+        os.replace(self.path + ".tmp", self.path)
+
+
 def fetch_latest_news(category='business', country='in'):
     """
     Fetches the latest news articles for a given category and country.
-    
+
     Args:
         category (str): The category of news to fetch (e.g., 'business', 'technology').
         country (str): The country code (e.g., 'in' for India, 'us' for USA).
-        
+
     Returns:
         list: A list of article dictionaries, or an empty list if an error occurs.
     """
-    api_key = os.getenv("NEWS_API_KEY")
-    if not api_key:
-        raise ValueError("FATAL: NEWS_API_KEY is not set in your .env file.")
-
     print(f"Fetching latest '{category}' news from '{country}'...")
-    
-    try:
-        # Initialize the client with the API key
-        newsapi = NewsApiClient(api_key=api_key)
-        
-        # Make the API request for top headlines
-        top_headlines = newsapi.get_top_headlines(
-            category=category,
-            language='en',
-            country=country,
-            page_size=50  # Get up to 50 articles per request
-        )
 
-        # Check if the request was successful
-        if top_headlines.get('status') == 'ok':
-            articles = top_headlines.get('articles', [])
-            print(f"Successfully fetched {len(articles)} articles from NewsAPI.")
-            return articles
-        else:
-            print(f"Error from NewsAPI: {top_headlines.get('message')}")
-            return []
-            
+    try:
+        articles = fetch_top_headlines(category, country)
+        print(f"Successfully fetched {len(articles)} articles from NewsAPI.")
+        return articles
     except Exception as e:
         print(f"An unexpected error occurred while fetching news: {e}")
-        return []
\ No newline at end of file
+        return []
@@ -0,0 +1,159 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+from datetime import datetime
+
+# This block ensures Python can find the 'shared' directory
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+from shared.observability.metrics import metrics
+from shared.storage.compression import compress_text, decompress_text
+from shared.utils.urls import canonicalize_url
+
+# --- Configuration ---
+SCRAPE_CACHE_ENABLED = os.getenv("SCRAPE_CACHE_ENABLED", "true").lower() == "true"
+SCRAPE_CACHE_PATH = os.getenv(
+    "SCRAPE_CACHE_PATH",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '.cache', 'scrape_cache.sqlite3'))
+)
+# How long a cached scrape is served without asking Jina again. After that the
+# entry is revalidated with a conditional request when it has an ETag/Last-Modified.
+SCRAPE_CACHE_TTL_SECONDS = float(os.getenv("SCRAPE_CACHE_TTL_SECONDS", 7 * 86400))
+
+
+def cache_key(url: str) -> str:
+    """Cache key for an article URL: its canonical form, so tracking/AMP variants share one entry."""
+    return canonicalize_url(url)
+
+
+class ScrapeCache:
+    """
+    Persistent on-disk cache of Jina Reader results, keyed by canonical URL.
+
+    Content is stored compressed (zstd, zlib fallback) together with the
+    response's ETag / Last-Modified validators and the time it was fetched.
+    Also counts what it saved during the current run.
+    """
+
+    def __init__(self, path: str = SCRAPE_CACHE_PATH, ttl_seconds: float = SCRAPE_CACHE_TTL_SECONDS):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS scrape_cache (
+                url_key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                content BLOB NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                raw_bytes INTEGER NOT NULL,
+                stored_bytes INTEGER NOT NULL
+            )
+        """)
+        self.conn.commit()
+        self.stats = {
+            "hits": 0,              # served from cache, no request sent
+            "revalidated": 0,       # conditional request answered 304 Not Modified
+            "misses": 0,            # full fetch needed
+            "stored": 0,
+            "requests_saved": 0,
+            "bytes_saved": 0,       # response bytes not downloaded thanks to the cache
+        }
+
+    # --- Reads ---
+    def lookup(self, url: str) -> dict | None:
+        """Returns the cached entry for url (with an 'is_fresh' flag), or None."""
+        row = self.conn.execute(
+            "SELECT content, etag, last_modified, fetched_at, raw_bytes FROM scrape_cache WHERE url_key = ?",
+            (cache_key(url),)
+        ).fetchone()
+        if not row:
+            return None
+        content, etag, last_modified, fetched_at, raw_bytes = row
+        return {
+            "content": decompress_text(content),
+            "etag": etag,
+            "last_modified": last_modified,
+            "raw_bytes": raw_bytes,
+            "is_fresh": time.time() - fetched_at < self.ttl_seconds,
+        }
+
+    def conditional_headers(self, entry: dict | None) -> dict:
+        """If-None-Match / If-Modified-Since headers for revalidating a stale entry."""
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    # --- Writes ---
+    def store(self, url: str, content: str, etag: str | None, last_modified: str | None, raw_bytes: int):
+        blob = compress_text(content)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO scrape_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (cache_key(url), url, blob, etag, last_modified, time.time(), raw_bytes, len(blob))
+        )
+        self.conn.commit()
+        self.stats["stored"] += 1
+
+    def touch(self, url: str):
+        """Marks a revalidated (304) entry as fresh again."""
+        self.conn.execute("UPDATE scrape_cache SET fetched_at = ? WHERE url_key = ?", (time.time(), cache_key(url)))
+        self.conn.commit()
+
+    # --- Accounting ---
+    def record_hit(self, entry: dict):
+        self.stats["hits"] += 1
+        self.stats["requests_saved"] += 1
+        self.stats["bytes_saved"] += entry["raw_bytes"]
+        metrics.count_cache("scrape", hit=True)
+
+    def record_revalidated(self, entry: dict):
+        self.stats["revalidated"] += 1
+        self.stats["bytes_saved"] += entry["raw_bytes"]
+        metrics.count_cache("scrape", hit=True)
+
+    def record_miss(self):
+        self.stats["misses"] += 1
+        metrics.count_cache("scrape", hit=False)
+
+    def report(self, log_runs: bool = True) -> dict:
+        """
+        Prints this run's cache savings and appends them to scrape_cache_runs.jsonl
+        next to the cache file. Returns the stats.
+        """
+        size_row = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(raw_bytes), 0), COALESCE(SUM(stored_bytes), 0) FROM scrape_cache").fetchone()
+        report = {
+            "run_at": datetime.utcnow().isoformat(),
+            **self.stats,
+            "entries": size_row[0],
+            "cached_raw_bytes": size_row[1],
+            "cached_stored_bytes": size_row[2],
+        }
+        print(f"Scrape cache: {self.stats['hits']} hits, {self.stats['revalidated']} revalidated, "
+              f"{self.stats['misses']} misses; saved {self.stats['requests_saved']} requests and "
+              f"{self.stats['bytes_saved'] / 1024:.1f} KiB this run.")
+        if log_runs:
+            with open(os.path.join(os.path.dirname(self.path), "scrape_cache_runs.jsonl"), "a") as f:
+                f.write(json.dumps(report) + "\n")
+        return report
+
+
+_scrape_cache = None
+
+def get_scrape_cache() -> ScrapeCache | None:
+    """Returns the process-wide scrape cache, or None when SCRAPE_CACHE_ENABLED is false."""
+    global _scrape_cache
+    if not SCRAPE_CACHE_ENABLED:
+        return None
+    if _scrape_cache is None:
+        _scrape_cache = ScrapeCache()
+    return _scrape_cache
@@ -18,10 +18,13 @@ if os.path.exists(dotenv_path):
 # --- Import Auth Decorator ---
 # This import MUST happen after path setup
 from shared.auth.token_verifier import require_auth
+from shared.observability.metrics import metrics, PROMETHEUS_CONTENT_TYPE
+from shared.observability.profiling import register_flask_profiling
+from shared.runtime.admission import AdmissionController, admission_controlled
 
 # --- Import Hugging Face Embedding Function ---
 try:
-    from shared.llm.embedding_client import create_hf_embedding, TASK_TYPE_QUERY
+    from shared.llm.embedding_client import create_hf_embedding, get_model, TASK_TYPE_QUERY
 except ImportError as e:
     print(f"FATAL: Could not import or initialize embedding client. Service cannot run. Error: {e}")
     create_hf_embedding = None
@@ -29,26 +32,40 @@ except Exception as e:
     print(f"FATAL: Unexpected error during embedding client setup. Error: {e}")
     create_hf_embedding = None
 
+# --- Admission Control (see shared/runtime/admission.py) ---
+# Sized for gunicorn's 8 threads: 2 embedding at once, 4 waiting, the rest rejected fast.
+embed_admission = AdmissionController.from_env("embed", "EMBED", max_in_flight=2, max_queue=4)
+
 # --- Flask App Initialization ---
 app = Flask(__name__)
+# Opt-in /debug/profile endpoints (PROFILING_ENABLED=true, internal token)
+register_flask_profiling(app)
 
 # --- Health Check Endpoint (Public) ---
 @app.route('/health', methods=['GET'])
 def health_check():
-    """Basic health check endpoint."""
-    if create_hf_embedding:
+    """Basic health check endpoint. The first call loads the model."""
+    if create_hf_embedding and get_model():
         return jsonify({"status": "ok", "message": "Embedding model loaded"}), 200
     else:
         return jsonify({"status": "error", "message": "Embedding model failed to load"}), 503
 
+# --- Metrics Endpoint (Public, Prometheus text format) ---
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    return app.response_class(metrics.render_prometheus(), mimetype=PROMETHEUS_CONTENT_TYPE)
+
 # --- API Endpoint Definition (Protected) ---
 @app.route('/embed', methods=['POST'])
 @require_auth  # <-- THIS IS THE NEW AUTHENTICATION CHECK
+@admission_controlled(embed_admission)  # interactive before batch; 429/503 with Retry-After when saturated
 def get_hf_embedding():
     """
     Receives text via POST request and returns its Nomic embedding vector
     generated using the locally loaded Hugging Face model (task type: query).
     This endpoint is protected and requires a valid Firebase ID token.
+    Indexing jobs send 'X-Priority: batch' so interactive queries go first;
+    callers may send 'X-Request-Deadline' (Unix seconds) to have late work dropped.
     """
     if not create_hf_embedding:
         print("ERROR: /embed called but embedding model is not available.")
@@ -66,17 +83,21 @@ def get_hf_embedding():
     print(f"Embedding Service: Received authenticated request to embed query: '{text_to_embed[:60]}...'")
 
     # 2. Generate Embedding
-    embedding_vector = create_hf_embedding(
-        text_to_embed=text_to_embed,
-        task_type=TASK_TYPE_QUERY
-    )
+    with metrics.timed("embed"):
+        embedding_vector = create_hf_embedding(
+            text_to_embed=text_to_embed,
+            task_type=TASK_TYPE_QUERY
+        )
+    metrics.count_bytes("embed", len(text_to_embed))
 
     # 3. Return Result or Error
     if embedding_vector:
         print("  -> Embedding generated successfully.")
+        metrics.count_items("embed")
         return jsonify({"embedding": embedding_vector}), 200
     else:
         print("  -> Embedding generation failed.")
+        metrics.count_error("embed")
         return jsonify({"error": "Failed to generate embedding for the provided text"}), 500
 
 # --- Run Flask App ---
@@ -1,5 +1,6 @@
 import sys
 import os
+import time
 from flask import Flask, request, jsonify
 from dotenv import load_dotenv
 
@@ -16,40 +17,96 @@ if os.path.exists(dotenv_path):
 
 # --- Import Auth Decorator ---
 from shared.auth.token_verifier import require_auth
+from shared.observability.metrics import metrics, PROMETHEUS_CONTENT_TYPE
+from shared.observability.profiling import register_flask_profiling
 
-# --- Import ChromaDB Client ---
+# --- Import Vector Store (ChromaDB or local index, see VECTOR_STORE_BACKEND) ---
 try:
-    from shared.database.chromadb_client import article_collection
+    from shared.database.vector_store import get_vector_store, to_timestamp
+    vector_store = get_vector_store()
 except ImportError as e:
-    print(f"FATAL: Could not import ChromaDB client. Error: {e}")
-    article_collection = None
+    print(f"FATAL: Could not import vector store client. Error: {e}")
+    vector_store = None
 except Exception as e:
-    print(f"FATAL: Error initializing ChromaDB client. Error: {e}")
-    article_collection = None
+    print(f"FATAL: Error initializing vector store. Error: {e}")
+    vector_store = None
+
+# --- Article Card Cache (for hydrated results) ---
+from shared.database.article_cache import ArticleCardCache
+article_cards = ArticleCardCache()
+
+# --- Trending Topics (sketches over ingested keywords, see shared/search/trending.py) ---
+from shared.search.trending import get_trending_engine
+trending_engine = get_trending_engine()
+MAX_TRENDING = int(os.environ.get('MAX_TRENDING', 100))
 
 # --- Flask App Initialization ---
 app = Flask(__name__)
+# Opt-in /debug/profile endpoints (PROFILING_ENABLED=true, internal token)
+register_flask_profiling(app)
+
+# Recency window applied when a query gives neither 'since' nor 'since_days' (0 = whole corpus).
+DEFAULT_WINDOW_DAYS = float(os.environ.get('SEARCH_DEFAULT_WINDOW_DAYS', 0))
+
+def _resolve_since(query: dict) -> float | None:
+    """
+    Returns the recency cutoff (epoch seconds) for a query from its 'since_days'
+    or 'since' (ISO date or epoch seconds) field, falling back to the default window.
+    Relative windows are floored to the minute so batched queries share a cutoff.
+    """
+    if query.get('since') is not None and query.get('since_days') is None:
+        since = to_timestamp(query['since'])
+        if since is None:
+            raise ValueError(f"unparseable 'since': {query['since']!r}")
+        return since
+    window_days = query.get('since_days')
+    if window_days is None:
+        window_days = DEFAULT_WINDOW_DAYS or None
+    if window_days is None:
+        return None
+    return (time.time() - float(window_days) * 86400) // 60 * 60
+
+def _is_internal_request() -> bool:
+    """True when the request carries the shared INTERNAL_API_TOKEN (ingestion callbacks)."""
+    expected_token = os.environ.get('INTERNAL_API_TOKEN')
+    return bool(expected_token) and request.headers.get('X-Internal-Token') == expected_token
+
+def _hydrate(doc_ids: list[str]) -> list[dict] | None:
+    """Returns the cached article cards for doc_ids, or None if Firestore is unreachable."""
+    try:
+        return article_cards.get_many(doc_ids)
+    except Exception as e:
+        print(f"Error hydrating search results: {e}")
+        return None
 
 # --- Health Check Endpoint (Public) ---
 @app.route('/health', methods=['GET'])
 def health_check():
     """Basic health check endpoint."""
-    if article_collection:
-        return jsonify({"status": "ok", "message": "ChromaDB connection ok"}), 200
+    if vector_store:
+        return jsonify({"status": "ok", "message": f"Vector store ok (backend: {vector_store.name})"}), 200
     else:
-        return jsonify({"status": "error", "message": "ChromaDB connection failed"}), 503
+        return jsonify({"status": "error", "message": "Vector store connection failed"}), 503
+
+# --- Metrics Endpoint (Public, Prometheus text format) ---
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    return app.response_class(metrics.render_prometheus(), mimetype=PROMETHEUS_CONTENT_TYPE)
 
 # --- API Endpoint Definition (Protected) ---
 @app.route('/query', methods=['POST'])
 @require_auth  # <-- THIS IS THE NEW AUTHENTICATION CHECK
 def query_chromadb_route(): # Renamed function to avoid conflict
     """
-    Receives a query embedding and optional category filter,
-    queries ChromaDB, and returns the matching document IDs.
+    Receives a query embedding with optional category and recency
+    ('since' or 'since_days') filters, queries the vector store, and
+    returns the matching document IDs. With "hydrate": true the response
+    also carries the article cards under 'articles', so the client can
+    render results without reading Firestore itself.
     This endpoint is protected and requires a valid Firebase ID token.
     """
-    if not article_collection:
-        return jsonify({"error": "ChromaDB connection not available"}), 503
+    if not vector_store:
+        return jsonify({"error": "Vector store not available"}), 503
 
     # 1. Get data from the request
     data = request.get_json()
@@ -59,29 +116,201 @@ def query_chromadb_route(): # Renamed function to avoid conflict
     query_embedding = data['query_embedding']
     category_filter = data.get('category')
     num_results = data.get('n_results', 10)
+    try:
+        since = _resolve_since(data)
+    except (TypeError, ValueError):
+        return jsonify({"error": "'since_days' must be a number and 'since' an ISO date or epoch seconds"}), 400
 
-    # 2. Prepare ChromaDB query arguments
-    query_args = {
-        "query_embeddings": [query_embedding],
-        "n_results": num_results
-    }
     if category_filter:
-        query_args["where"] = {"category": category_filter}
         print(f"Authenticated query with category filter: '{category_filter}'")
     else:
         print("Authenticated query without category filter.")
 
-    # 3. Query ChromaDB
+    # 2. Query the vector store
     try:
-        results = article_collection.query(**query_args)
+        with metrics.timed("query", endpoint="query"):
+            results = vector_store.query([query_embedding], n_results=num_results, category=category_filter, since=since)
+        metrics.count_items("query")
         result_ids = []
         if results and results.get('ids') and results['ids'][0]:
              result_ids = results['ids'][0]
-        print(f"ChromaDB returned {len(result_ids)} results.")
-        return jsonify({"ids": result_ids}), 200
+        print(f"Vector store returned {len(result_ids)} results.")
+    except Exception as e:
+        print(f"Error querying vector store: {e}")
+        return jsonify({"error": "Failed to query vector store"}), 500
+
+    response = {"ids": result_ids}
+    if data.get('hydrate'):
+        articles = _hydrate(result_ids)
+        if articles is None:
+            return jsonify({"error": "Failed to load article details"}), 502
+        response["articles"] = articles
+    return jsonify(response), 200
+
+# --- Batch Query Endpoint (Protected) ---
+MAX_BATCH_QUERIES = int(os.environ.get('MAX_BATCH_QUERIES', 50))
+
+@app.route('/query/batch', methods=['POST'])
+@require_auth
+def batch_query_chromadb_route():
+    """
+    Receives several query embeddings, each with its own optional category
+    filter, recency filter and n_results, and answers all of them in one
+    round trip.
+
+    Queries sharing the same category and recency filters are grouped into a single
+    vector store call (it accepts many query embeddings per call), using the
+    largest n_results of the group and trimming each result afterwards.
+
+    Expected body:
+        {"queries": [{"id": "tech", "query_embedding": [...],
+                      "category": "technology", "n_results": 5}, ...]}
+
+    Returns:
+        {"results": {"<id>": {"ids": [...]}, ...}}
+        Queries without an 'id' are keyed by their position in the list.
+        With "hydrate": true at the top level, each result also carries its
+        article cards, loaded for the whole batch at once.
+    """
+    if not vector_store:
+        return jsonify({"error": "Vector store not available"}), 503
+
+    # 1. Get and validate the batch
+    data = request.get_json()
+    if not data or not isinstance(data.get('queries'), list) or not data['queries']:
+        return jsonify({"error": "Missing non-empty 'queries' list in request body"}), 400
+
+    queries = data['queries']
+    if len(queries) > MAX_BATCH_QUERIES:
+        return jsonify({"error": f"Too many queries in batch (max {MAX_BATCH_QUERIES})"}), 400
+
+    # 2. Group queries by their category and recency filters
+    groups, seen_keys = {}, set()
+    for position, query in enumerate(queries):
+        if not isinstance(query, dict) or 'query_embedding' not in query:
+            return jsonify({"error": f"Query at position {position} is missing 'query_embedding'"}), 400
+        query_key = str(query.get('id', position))
+        if query_key in seen_keys:
+            return jsonify({"error": f"Duplicate query id '{query_key}'"}), 400
+        seen_keys.add(query_key)
+
+        category_filter = query.get('category')
+        if category_filter is not None and not isinstance(category_filter, str):
+            return jsonify({"error": f"Query '{query_key}' has a non-string 'category'"}), 400
+        n_results = query.get('n_results', 10)
+        if isinstance(n_results, bool) or not isinstance(n_results, int) or n_results < 1:
+            return jsonify({"error": f"Query '{query_key}' needs a positive integer 'n_results'"}), 400
+        try:
+            since = _resolve_since(query)
+        except (TypeError, ValueError):
+            return jsonify({"error": f"Query '{query_key}' has an invalid 'since' or 'since_days'"}), 400
+        groups.setdefault((category_filter, since), []).append(
+            (query_key, query['query_embedding'], n_results)
+        )
+
+    print(f"Authenticated batch query: {len(queries)} queries in {len(groups)} vector store call(s).")
+
+    # 3. One vector store call per distinct (category, recency) filter
+    results_by_key = {}
+    try:
+        for (category_filter, since), members in groups.items():
+            with metrics.timed("query", endpoint="batch"):
+                results = vector_store.query(
+                    [embedding for _, embedding, _ in members],
+                    n_results=max(n_results for _, _, n_results in members),
+                    category=category_filter,
+                    since=since
+                )
+            metrics.count_items("query", len(members))
+            ids_per_query = (results or {}).get('ids') or []
+
+            for index, (query_key, _, n_results) in enumerate(members):
+                result_ids = ids_per_query[index] if index < len(ids_per_query) else []
+                results_by_key[query_key] = {"ids": result_ids[:n_results]}
+    except Exception as e:
+        print(f"Error querying vector store in batch: {e}")
+        return jsonify({"error": "Failed to query vector store"}), 500
+
+    if data.get('hydrate'):
+        all_ids = [doc_id for result in results_by_key.values() for doc_id in result["ids"]]
+        articles = _hydrate(all_ids)
+        if articles is None:
+            return jsonify({"error": "Failed to load article details"}), 502
+        cards_by_id = {card["id"]: card for card in articles}
+        for result in results_by_key.values():
+            result["articles"] = [cards_by_id[doc_id] for doc_id in result["ids"] if doc_id in cards_by_id]
+
+    return jsonify({"results": results_by_key}), 200
+
+# --- Card Cache Refresh Endpoint (Internal) ---
+@app.route('/cache/refresh', methods=['POST'])
+def refresh_card_cache_route():
+    """
+    Called by ingestion (see notify_articles_updated) after articles are
+    written, so cached cards pick up new summaries straight away.
+    Protected by the shared INTERNAL_API_TOKEN rather than a user token.
+    """
+    if not _is_internal_request():
+        return jsonify({"error": "Forbidden"}), 403
+
+    data = request.get_json()
+    if not data or not isinstance(data.get('ids'), list):
+        return jsonify({"error": "Missing 'ids' list in request body"}), 400
+
+    try:
+        refreshed = article_cards.refresh(data['ids'])
     except Exception as e:
-        print(f"Error querying ChromaDB: {e}")
-        return jsonify({"error": "Failed to query ChromaDB"}), 500
+        print(f"Error refreshing card cache: {e}")
+        return jsonify({"error": "Failed to refresh card cache"}), 502
+
+    print(f"Card cache refreshed for {len(data['ids'])} articles ({refreshed} found).")
+    return jsonify({"refreshed": refreshed, "cache": article_cards.stats()}), 200
+
+# --- Trending Topics Endpoint (Protected) ---
+@app.route('/trending', methods=['GET'])
+@require_auth
+def trending_route():
+    """
+    Returns the most frequent article keywords of the current window
+    (TRENDING_CURRENT_BUCKETS hours by default), each with its baseline
+    count and burst ratio. Query parameters:
+        k        number of topics (default 10, max MAX_TRENDING)
+        bursting "true" for only the topics bursting above their baseline
+    Served from the engine's cached ranking, so the cost is O(k).
+    """
+    try:
+        k = min(max(int(request.args.get('k', 10)), 1), MAX_TRENDING)
+    except ValueError:
+        return jsonify({"error": "'k' must be an integer"}), 400
+    bursting_only = request.args.get('bursting', '').lower() in ('1', 'true', 'yes')
+
+    with metrics.timed("query", endpoint="trending"):
+        topics = trending_engine.trending(k, bursting_only=bursting_only)
+    return jsonify({"topics": topics, "window": trending_engine.stats()}), 200
+
+# --- Trending Observation Endpoint (Internal) ---
+@app.route('/trending/observe', methods=['POST'])
+def observe_trending_route():
+    """
+    Called by ingestion (see notify_trending) with the keywords and
+    publishedAt of newly completed articles:
+        {"articles": {"<doc_id>": {"keywords": [...], "publishedAt": "..."}}}
+    Protected by the shared INTERNAL_API_TOKEN rather than a user token.
+    """
+    if not _is_internal_request():
+        return jsonify({"error": "Forbidden"}), 403
+
+    data = request.get_json()
+    if not data or not isinstance(data.get('articles'), dict):
+        return jsonify({"error": "Missing 'articles' object in request body"}), 400
+    for doc_id, article in data['articles'].items():
+        keywords = article.get('keywords') or [] if isinstance(article, dict) else None
+        if not isinstance(keywords, list) or not all(isinstance(word, str) for word in keywords):
+            return jsonify({"error": f"Article '{doc_id}' must be an object with a list of string 'keywords'"}), 400
+
+    counted = trending_engine.observe(data['articles'])
+    metrics.count_items("trending_observe", counted)
+    return jsonify({"counted": counted, "window": trending_engine.stats()}), 200
 
 # --- Run Flask App ---
 if __name__ == '__main__':
@@ -1,7 +1,6 @@
 import sys
 import os
-from dotenv import load_dotenv
-from fastapi import Header, HTTPException, status
+import functools
 
 # --- Path Setup ---
 current_dir = os.path.dirname(__file__)  # shared/auth
@@ -9,20 +8,38 @@ parent_dir = os.path.abspath(os.path.join(current_dir, '..', '..'))  # python_se
 if parent_dir not in sys.path:
     sys.path.append(parent_dir)
 
-# --- Firebase Admin Initialization ---
+# FastAPI is only installed for the TTS service; the Flask services use require_auth.
 try:
-    from shared.database.firestore_client import db as _db_check
-    from firebase_admin import auth
+    from fastapi import Header, HTTPException, status
+except ImportError:
+    Header = None
+
+
+# --- Firebase Admin Initialization ---
+_auth = None
+
+
+def _get_auth():
+    """
+    Returns firebase_admin.auth once the Firebase app is initialized (through
+    the shared Firestore client), or None if that fails. Runs on the first
+    token verification rather than at import.
+    """
+    global _auth
+    if _auth is None:
+        try:
+            from shared.database.firestore_client import get_db
+            from firebase_admin import auth
 
-    if not _db_check:
-        raise ImportError("firestore_client.db was not initialized.")
-    print("Firebase Admin SDK initialized successfully for auth verification.")
-except ImportError as e:
-    print(f"CRITICAL: Could not import or initialize Firebase Admin SDK: {e}")
-    auth = None
-except Exception as e:
-    print(f"CRITICAL: Unexpected error during Firebase setup for auth: {e}")
-    auth = None
+            if not get_db():
+                raise ImportError("firestore_client.db was not initialized.")
+            print("Firebase Admin SDK initialized successfully for auth verification.")
+            _auth = auth
+        except ImportError as e:
+            print(f"CRITICAL: Could not import or initialize Firebase Admin SDK: {e}")
+        except Exception as e:
+            print(f"CRITICAL: Unexpected error during Firebase setup for auth: {e}")
+    return _auth
 
 
 # --- Firebase Token Verification ---
@@ -36,6 +53,7 @@ def verify_firebase_token(id_token: str):
     Returns:
         dict | None: Decoded token payload if verification succeeds, None otherwise.
     """
+    auth = _get_auth()
     if not auth:
         print("Error: Firebase Admin Auth module is not available.")
         return None
@@ -58,8 +76,32 @@ def verify_firebase_token(id_token: str):
         return None
 
 
+# --- Flask Decorator ---
+def require_auth(view):
+    """
+    Flask route decorator that verifies the 'Authorization: Bearer <token>'
+    header and stores the decoded token in flask.g.user.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        from flask import request, jsonify, g
+
+        authorization = request.headers.get("Authorization", "")
+        if not authorization.startswith("Bearer "):
+            return jsonify({"error": "Missing or invalid Authorization header."}), 401
+
+        decoded_token = verify_firebase_token(authorization.split("Bearer ")[1])
+        if not decoded_token:
+            return jsonify({"error": "Invalid or expired authentication token."}), 403
+
+        g.user = decoded_token
+        return view(*args, **kwargs)
+
+    return wrapper
+
+
 # --- FastAPI Dependency ---
-async def firebase_auth_dependency(authorization: str = Header(None)):
+async def firebase_auth_dependency(authorization: str = Header(None) if Header else None):
     """
     FastAPI dependency for verifying the Authorization header.
     Expects 'Authorization: Bearer <token>'.
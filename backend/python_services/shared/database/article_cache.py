@@ -0,0 +1,178 @@
+import os
+import json
+import time
+import threading
+import urllib.request
+from collections import OrderedDict
+from datetime import datetime
+
+from shared.observability.metrics import metrics
+
+# --- CONFIGURATION ---
+# The subset of article fields needed to render a result card.
+CARD_FIELDS = ["title", "summary", "url", "category", "publishedAt", "urlToImage"]
+ARTICLE_CACHE_MAX_ENTRIES = int(os.getenv("ARTICLE_CACHE_MAX_ENTRIES", 5000))
+ARTICLE_CACHE_TTL_SECONDS = float(os.getenv("ARTICLE_CACHE_TTL_SECONDS", 900))
+# Firestore's get_all is happiest with modest batches.
+GET_ALL_BATCH_SIZE = 100
+
+
+def _to_card(doc_id: str, data: dict) -> dict:
+    """Projects a Firestore document onto the card fields, JSON-friendly."""
+    card = {"id": doc_id}
+    for field in CARD_FIELDS:
+        value = data.get(field)
+        card[field] = value.isoformat() if isinstance(value, datetime) else value
+    return card
+
+
+class ArticleCardCache:
+    """
+    Local read-through cache of article cards, bounded by LRU and a TTL.
+
+    Misses are fetched from Firestore with batched get_all calls that only
+    transfer CARD_FIELDS, so hydrating N search results costs at most
+    ceil(misses / 100) round trips instead of N document reads.
+    """
+
+    def __init__(self, db=None, max_entries: int = ARTICLE_CACHE_MAX_ENTRIES,
+                 ttl_seconds: float = ARTICLE_CACHE_TTL_SECONDS):
+        self._db = db
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # doc_id -> (expires_at, card or None)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def db(self):
+        if self._db is None:
+            from shared.database.firestore_client import get_db
+            self._db = get_db()
+        return self._db
+
+    # --- Reads ---
+    def get_many(self, doc_ids: list[str]) -> list[dict]:
+        """
+        Returns the cards for doc_ids in the same order, skipping documents
+        that no longer exist.
+        """
+        now = time.monotonic()
+        found, missing = {}, []
+        with self._lock:
+            for doc_id in dict.fromkeys(doc_ids):
+                entry = self._entries.get(doc_id)
+                if entry and entry[0] > now:
+                    self._entries.move_to_end(doc_id)
+                    found[doc_id] = entry[1]
+                    self.hits += 1
+                else:
+                    missing.append(doc_id)
+                    self.misses += 1
+
+        metrics.count_cache("article_cards", hit=True, n=len(found))
+        if missing:
+            metrics.count_cache("article_cards", hit=False, n=len(missing))
+            found.update(self._fetch(missing))
+
+        return [found[doc_id] for doc_id in doc_ids if found.get(doc_id)]
+
+    def _fetch(self, doc_ids: list[str]) -> dict:
+        """Loads cards from Firestore in batches and stores them (including misses) in the cache."""
+        fetched = {doc_id: None for doc_id in doc_ids}
+        collection = self.db.collection("articles")
+        for start in range(0, len(doc_ids), GET_ALL_BATCH_SIZE):
+            refs = [collection.document(doc_id) for doc_id in doc_ids[start:start + GET_ALL_BATCH_SIZE]]
+            for snapshot in self.db.get_all(refs, field_paths=CARD_FIELDS):
+                if snapshot.exists:
+                    fetched[snapshot.id] = _to_card(snapshot.id, snapshot.to_dict())
+
+        for doc_id, card in fetched.items():
+            self.put(doc_id, card)
+        return fetched
+
+    # --- Writes ---
+    def put(self, doc_id: str, card: dict | None):
+        """Stores a card (None caches a missing document) and evicts the least recently used entries."""
+        with self._lock:
+            self._entries[doc_id] = (time.monotonic() + self.ttl_seconds, card)
+            self._entries.move_to_end(doc_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, doc_ids: list[str]):
+        with self._lock:
+            for doc_id in doc_ids:
+                self._entries.pop(doc_id, None)
+
+    def refresh(self, doc_ids: list[str]) -> int:
+        """Re-reads the given articles from Firestore. Returns how many still exist."""
+        self.invalidate(doc_ids)
+        return sum(1 for card in self._fetch(list(dict.fromkeys(doc_ids))).values() if card)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+# --- INGESTION HOOKS ---
+def _post_to_search_service(path: str, payload: dict):
+    """
+    POSTs payload to the search service with the internal token. Returns the
+    response status, or None when the service isn't configured or the call
+    failed (logged, never raised).
+    """
+    service_url = os.getenv("SEARCH_SERVICE_URL")
+    token = os.getenv("INTERNAL_API_TOKEN")
+    if not service_url or not token:
+        return None
+
+    request = urllib.request.Request(
+        service_url.rstrip("/") + path,
+        data=json.dumps(payload, default=str).encode("utf-8"),
+        headers={"Content-Type": "application/json", "X-Internal-Token": token},
+        method="POST",
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status
+    except Exception as e:
+        print(f"  -> WARNING: Search service call to {path} failed: {e}")
+        return None
+
+
+def notify_articles_updated(doc_ids: list[str]):
+    """
+    Tells the search service to refresh its cached cards for doc_ids.
+    Called by ingestion after it writes articles. Best effort: does nothing
+    unless SEARCH_SERVICE_URL and INTERNAL_API_TOKEN are set, and never raises.
+    """
+    if not doc_ids:
+        return
+    status = _post_to_search_service("/cache/refresh", {"ids": list(doc_ids)})
+    if status is not None:
+        print(f"  -> Refreshed {len(doc_ids)} cached article cards (status {status}).")
+
+
+def notify_trending(articles: dict):
+    """
+    Feeds newly completed articles (doc_id -> article data) to the search
+    service's trending engine (shared/search/trending.py). Only their
+    keywords and publishedAt are sent. Best effort, like notify_articles_updated.
+    """
+    observations = {
+        doc_id: {"keywords": data.get("keywords") or [], "publishedAt": data.get("publishedAt")}
+        for doc_id, data in articles.items()
+    }
+    if not observations:
+        return
+    status = _post_to_search_service("/trending/observe", {"articles": observations})
+    if status is not None:
+        print(f"  -> Sent {len(observations)} articles to the trending engine (status {status}).")
@@ -1,20 +1,57 @@
-import chromadb
 import os
+import threading
 
 # --- INITIALIZATION ---
-# This creates a persistent client that saves its database to a folder 
-# named 'chroma_db' in your project's root directory.
+# The persistent client saves its database to a folder named 'chroma_db' in
+# your project's root directory. It is opened on first use
+# (get_article_collection()), not at import.
 db_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', 'chroma_db'))
-client = chromadb.PersistentClient(path=db_path)
+
+_client = None
+_article_collection = None
+_lock = threading.Lock()
+
+
+def get_client():
+    """Returns the shared ChromaDB PersistentClient, opening it on the first call."""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                import chromadb
+                _client = chromadb.PersistentClient(path=db_path)
+    return _client
+
 
 # --- GET OR CREATE THE COLLECTION ---
-try:
-    # This is like a "table" in a SQL database. It holds our article vectors.
-    article_collection = client.get_or_create_collection(name="news_articles")
-    print(f"ChromaDB client initialized. Collection 'news_articles' is ready at {db_path}")
-except Exception as e:
-    print(f"FATAL: Could not initialize ChromaDB client. Error: {e}")
-    article_collection = None
+def get_article_collection():
+    """
+    Returns the 'news_articles' collection (like a "table" in a SQL database;
+    it holds our article vectors), or None if ChromaDB could not be opened.
+    A failed attempt is retried on the next call.
+    """
+    global _article_collection
+    if _article_collection is None:
+        try:
+            collection = get_client().get_or_create_collection(name="news_articles")
+        except Exception as e:
+            print(f"FATAL: Could not initialize ChromaDB client. Error: {e}")
+            return None
+        with _lock:
+            if _article_collection is None:
+                _article_collection = collection
+                print(f"ChromaDB client initialized. Collection 'news_articles' is ready at {db_path}")
+    return _article_collection
+
+
+def __getattr__(name):
+    # Keeps `from shared.database.chromadb_client import client, article_collection` working.
+    if name == "client":
+        return get_client()
+    if name == "article_collection":
+        return get_article_collection()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 # --- CORE FUNCTIONALITY ---
 def save_embedding_to_chroma(document_id: str, embedding_vector: list[float], metadata: dict):
@@ -26,10 +63,12 @@ def save_embedding_to_chroma(document_id: str, embedding_vector: list[float], me
         embedding_vector (list[float]): The vector embedding of the article's content.
         metadata (dict): A dictionary of filterable data (e.g., category).
     """
+    article_collection = get_article_collection()
     if not article_collection:
         print("  -> ERROR: ChromaDB collection is not available. Skipping save.")
         return
 
+    import chromadb
     try:
         # Add the embedding, metadata, and ID to the collection.
         article_collection.add(
@@ -41,4 +80,4 @@ def save_embedding_to_chroma(document_id: str, embedding_vector: list[float], me
     except chromadb.errors.IDAlreadyExistsError:
         print(f"  -> Embedding for doc '{document_id}' already exists in ChromaDB. Skipping.")
     except Exception as e:
-        print(f"  -> FAILED to save embedding to ChromaDB. Error: {e}")
\ No newline at end of file
+        print(f"  -> FAILED to save embedding to ChromaDB. Error: {e}")
@@ -0,0 +1,145 @@
+import os
+import json
+from datetime import datetime
+
+from shared.database.article_cache import _to_card
+from shared.observability.metrics import metrics
+from shared.storage.content_store import load_body
+
+# --- CONFIGURATION ---
+# One document per category (plus ALL_FEED) holding the newest completed
+# articles as an ordered array of cards, so a feed page is a single read.
+FEEDS_COLLECTION = os.getenv("FEEDS_COLLECTION", "feeds")
+FEED_SIZE = int(os.getenv("FEED_SIZE", 50))
+# Cards carry the start of the article so list views can show an excerpt.
+FEED_SNIPPET_CHARS = int(os.getenv("FEED_SNIPPET_CHARS", 200))
+# Firestore documents are capped at 1 MiB; stay well under it.
+FEED_MAX_BYTES = int(os.getenv("FEED_MAX_BYTES", 900_000))
+ALL_FEED = "all"
+FEED_CATEGORIES = ['business', 'entertainment', 'general', 'health', 'science', 'sports', 'technology']
+
+# Fields read from an article to build its card
+SOURCE_FIELDS = ["title", "summary", "url", "category", "publishedAt", "urlToImage", "description", "content",
+                 "content_ref"]
+
+
+def to_feed_card(doc_id: str, data: dict) -> dict:
+    """
+    Builds the compact card stored in the feed documents: the search card
+    fields, the description and a short excerpt of the content. `feedCard`
+    tells the frontend the full article still has to be read by ID.
+    """
+    card = _to_card(doc_id, data)
+    card["description"] = data.get("description")
+    content = data.get("content") or ""
+    if len(content) > FEED_SNIPPET_CHARS:
+        content = content[:FEED_SNIPPET_CHARS].rsplit(None, 1)[0]
+    card["content"] = content
+    card["feedCard"] = True
+    return card
+
+
+def _feed_bytes(cards: list[dict]) -> int:
+    return len(json.dumps(cards, default=str).encode("utf-8"))
+
+
+def merge_cards(existing: list[dict], new_cards: list[dict], size: int = FEED_SIZE) -> list[dict]:
+    """
+    Merges new or updated cards into a feed: newer cards replace older ones
+    with the same ID, the result is ordered by publishedAt (newest first)
+    and trimmed to `size` cards and FEED_MAX_BYTES.
+    """
+    by_id = {card["id"]: card for card in existing if card.get("id")}
+    by_id.update((card["id"], card) for card in new_cards)
+    cards = sorted(by_id.values(), key=lambda card: str(card.get("publishedAt") or ""), reverse=True)[:size]
+    while cards and _feed_bytes(cards) > FEED_MAX_BYTES:
+        cards.pop()
+    return cards
+
+
+def _group_by_feed(cards: list[dict]) -> dict:
+    """feed name -> the cards that belong in it (every card goes to ALL_FEED and its category)."""
+    feeds = {}
+    for card in cards:
+        feeds.setdefault(ALL_FEED, []).append(card)
+        if card.get("category"):
+            feeds.setdefault(card["category"], []).append(card)
+    return feeds
+
+
+def update_feeds(articles: dict, db=None) -> dict:
+    """
+    Adds newly completed articles to the feed documents of their category
+    and to the "all" feed, in one transaction (read, merge, write), so
+    concurrent workers never overwrite each other's cards.
+    Best effort: a failure is logged, never raised; rebuild_feeds() repairs
+    the feeds from the articles collection.
+
+    Args:
+        articles (dict): doc_id -> article data (as stored in Firestore).
+
+    Returns:
+        dict: feed name -> number of cards now in that feed.
+    """
+    if not articles:
+        return {}
+    from firebase_admin import firestore
+    if db is None:
+        from shared.database.firestore_client import get_db
+        db = get_db()
+
+    new_cards = _group_by_feed([to_feed_card(doc_id, data) for doc_id, data in articles.items()])
+    refs = [db.collection(FEEDS_COLLECTION).document(name) for name in new_cards]
+
+    @firestore.transactional
+    def _merge_in_transaction(transaction) -> dict:
+        sizes = {}
+        for snapshot in transaction.get_all(refs):
+            existing = (snapshot.to_dict() or {}).get("articles", []) if snapshot.exists else []
+            cards = merge_cards(existing, new_cards[snapshot.id])
+            transaction.set(snapshot.reference, {"articles": cards, "count": len(cards), "updatedAt": datetime.utcnow()})
+            sizes[snapshot.id] = len(cards)
+        return sizes
+
+    try:
+        with metrics.timed("store", target="feeds"):
+            sizes = _merge_in_transaction(db.transaction())
+        print(f"  -> Updated {len(sizes)} feed snapshots with {len(articles)} articles.")
+        return sizes
+    except Exception as e:
+        print(f"  -> WARNING: Could not update feed snapshots: {e}")
+        return {}
+
+
+def rebuild_feeds(db=None, categories: list[str] = FEED_CATEGORIES, size: int = FEED_SIZE) -> dict:
+    """
+    Rebuilds every feed document from scratch out of the newest completed
+    articles (one query per feed, only SOURCE_FIELDS transferred). Use it to
+    create the feeds the first time, or after articles were edited or deleted.
+
+    Returns:
+        dict: feed name -> number of cards written.
+    """
+    from firebase_admin import firestore
+    if db is None:
+        from shared.database.firestore_client import get_db
+        db = get_db()
+
+    articles_ref = db.collection("articles")
+    batch, sizes = db.batch(), {}
+    for name in [ALL_FEED, *categories]:
+        query = articles_ref.where("processing_status", "==", "completed")
+        if name != ALL_FEED:
+            query = query.where("category", "==", name)
+        query = query.order_by("publishedAt", direction=firestore.Query.DESCENDING).limit(size)
+        cards = []
+        for doc in query.select(SOURCE_FIELDS).stream():
+            data = doc.to_dict() or {}
+            # Articles without inline content get their excerpt from the content store
+            cards.append(to_feed_card(doc.id, {**data, "content": load_body(data) or ""}))
+        cards = merge_cards([], cards, size)
+        batch.set(db.collection(FEEDS_COLLECTION).document(name),
+                  {"articles": cards, "count": len(cards), "updatedAt": datetime.utcnow()})
+        sizes[name] = len(cards)
+    batch.commit()
+    return sizes
@@ -1,15 +1,27 @@
 import os
-import firebase_admin
-from firebase_admin import credentials, firestore
+import threading
 from dotenv import load_dotenv
 
+# The client is created on first use (get_db()), not at import, so scripts
+# that never touch Firestore don't pay for the Firebase SDK.
+_db = None
+_db_lock = threading.Lock()
+
+
 def initialize_firebase():
     """
     Finds the .env file, loads environment variables, and initializes the
     Firebase Admin SDK using a service account key.
-    
-    This function is designed to be called once when the application starts.
+
+    When FIRESTORE_EMULATOR_HOST is set, no service account key is needed:
+    the app is initialized for the emulator's project (FIREBASE_PROJECT_ID,
+    default 'demo-news-platform') and the client talks to the emulator.
+
+    Prefer get_db(), which calls this once and caches the client.
     """
+    import firebase_admin
+    from firebase_admin import credentials, firestore
+
     # Check if the Firebase app is already initialized to avoid errors.
     if firebase_admin._apps:
         return firestore.client()
@@ -18,18 +30,26 @@ def initialize_firebase():
     # This robust path logic allows scripts to be run from any directory
     project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
     dotenv_path = os.path.join(project_root, '.env')
+    emulator_host = os.getenv("FIRESTORE_EMULATOR_HOST")
 
-    if not os.path.exists(dotenv_path):
+    if os.path.exists(dotenv_path):
+        load_dotenv(dotenv_path)
+        print("Successfully loaded environment variables from .env file.")
+    elif not emulator_host:
         raise FileNotFoundError(f"FATAL: .env file not found at {dotenv_path}. Please create it.")
-    
-    load_dotenv(dotenv_path)
-    print("Successfully loaded environment variables from .env file.")
+
+    # --- Local emulator: no credentials required ---
+    if emulator_host:
+        project_id = os.getenv("FIREBASE_PROJECT_ID", "demo-news-platform")
+        firebase_admin.initialize_app(options={"projectId": project_id})
+        print(f"Firebase Admin SDK initialized against the Firestore emulator at {emulator_host} ({project_id}).")
+        return firestore.client()
 
     # --- Get the service account key path from the environment ---
     service_account_key_path = os.getenv("FIREBASE_SERVICE_ACCOUNT_KEY_PATH")
     if not service_account_key_path:
         raise ValueError("FATAL: FIREBASE_SERVICE_ACCOUNT_KEY_PATH is not set in your .env file.")
-    
+
     if not os.path.exists(service_account_key_path):
         raise FileNotFoundError(f"FATAL: The Firebase service account key file was not found at the path: {service_account_key_path}")
 
@@ -41,10 +61,26 @@ def initialize_firebase():
     except Exception as e:
         print(f"FATAL: Error initializing Firebase Admin SDK: {e}")
         raise
-        
+
     return firestore.client()
 
-# Initialize the connection and create a global 'db' client
-# that other scripts can import and use directly.
-db = initialize_firebase()
 
+def get_db():
+    """
+    Returns the shared Firestore client, initializing Firebase on the first
+    call. Safe to call from several threads.
+    """
+    global _db
+    if _db is None:
+        with _db_lock:
+            if _db is None:
+                _db = initialize_firebase()
+    return _db
+
+
+def __getattr__(name):
+    # Keeps `from shared.database.firestore_client import db` working; the
+    # client is still only created when that import actually runs.
+    if name == "db":
+        return get_db()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
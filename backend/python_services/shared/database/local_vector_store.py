@@ -0,0 +1,460 @@
+import os
+import json
+import shutil
+import hashlib
+import threading
+from datetime import datetime, timedelta, timezone
+import numpy as np
+
+from shared.database.vector_store import VectorStore
+
+# hnswlib is optional: without it every partition is searched by brute force,
+# which is exact and fast enough for the partition sizes we see per category.
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+# --- CONFIGURATION ---
+# Stored next to the 'chroma_db' folder in the project root by default.
+DEFAULT_INDEX_PATH = os.getenv(
+    "LOCAL_VECTOR_STORE_PATH",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', 'vector_index'))
+)
+# Distance space, matching ChromaDB's names: 'l2' (Chroma's default), 'cosine' or 'ip'.
+DEFAULT_SPACE = os.getenv("VECTOR_STORE_SPACE", "l2")
+# Partitions smaller than this are searched by brute force even when hnswlib is installed.
+HNSW_MIN_PARTITION_SIZE = int(os.getenv("HNSW_MIN_PARTITION_SIZE", 5000))
+HNSW_M = 16
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 100
+# Time bucket for new shards: 'day' or 'week'. compact() later folds old day shards into weeks.
+TIME_BUCKET = os.getenv("VECTOR_TIME_BUCKET", "day")
+
+UNCATEGORIZED = "_uncategorized"
+UNDATED = "undated"
+DAY_SECONDS = 86400
+
+
+def _bucket_for(published_ts: float | None, granularity: str = TIME_BUCKET) -> tuple[str, float | None, float | None]:
+    """Returns (label, start_ts, end_ts) of the UTC day or ISO week containing published_ts."""
+    if published_ts is None:
+        return UNDATED, None, None
+    day = datetime.fromtimestamp(published_ts, tz=timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularity == "week":
+        monday = day - timedelta(days=day.weekday())
+        return f"week-{monday.date().isoformat()}", monday.timestamp(), monday.timestamp() + 7 * DAY_SECONDS
+    return f"day-{day.date().isoformat()}", day.timestamp(), day.timestamp() + DAY_SECONDS
+
+
+def _partition_key(metadata: dict, granularity: str = TIME_BUCKET) -> tuple[str, str, float | None, float | None]:
+    """
+    Vectors are sharded by (category, time bucket) so filtered and recency-bounded
+    queries only scan the sub-indexes that can contain matches.
+    Returns (key, category, bucket_start, bucket_end).
+    """
+    metadata = metadata or {}
+    category = metadata.get("category") or UNCATEGORIZED
+    label, start, end = _bucket_for(metadata.get("published_ts"), granularity)
+    return f"{category}|{label}", category, start, end
+
+
+class _Partition:
+    """
+    One sub-index: a float32 matrix of vectors (memory-mapped when loaded from
+    disk), the matching IDs and metadata, and an optional HNSW graph.
+    """
+
+    def __init__(self, key: str, dim: int, space: str, category: str = UNCATEGORIZED,
+                 bucket_start: float | None = None, bucket_end: float | None = None):
+        self.key = key
+        self.dim = dim
+        self.space = space
+        self.category = category
+        self.bucket_start = bucket_start
+        self.bucket_end = bucket_end
+        self.ids = []
+        self.metadatas = []
+        self.vectors = np.empty((0, dim), dtype=np.float32)
+        self.sq_norms = np.empty((0,), dtype=np.float32)
+        self.timestamps = np.empty((0,), dtype=np.float64)
+        self.hnsw = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    # --- Writes ---
+    def add(self, ids: list[str], vectors: np.ndarray, metadatas: list[dict]):
+        if self.space == "cosine":
+            vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+        start = len(self.ids)
+        self.ids.extend(ids)
+        self.metadatas.extend(metadatas)
+        # np.concatenate also copies a memory-mapped matrix into RAM before appending.
+        self.vectors = np.concatenate([self.vectors, vectors])
+        self.sq_norms = np.concatenate([self.sq_norms, np.einsum("ij,ij->i", vectors, vectors)])
+        self.timestamps = np.concatenate([self.timestamps, _timestamps_of(metadatas)])
+
+        if self.hnsw is not None:
+            self._hnsw_add(vectors, start)
+        elif hnswlib is not None and len(self.ids) >= HNSW_MIN_PARTITION_SIZE:
+            self._build_hnsw()
+
+    def remove_rows(self, rows: list[int]):
+        """Deletes rows from the shard. The HNSW graph is keyed by row, so it is rebuilt."""
+        drop = set(rows)
+        keep = np.array([r for r in range(len(self.ids)) if r not in drop], dtype=np.int64)
+        self.ids = [self.ids[r] for r in keep]
+        self.metadatas = [self.metadatas[r] for r in keep]
+        self.vectors = np.asarray(self.vectors)[keep]
+        self.sq_norms = self.sq_norms[keep]
+        self.timestamps = self.timestamps[keep]
+        self.hnsw = None
+        if hnswlib is not None and len(self.ids) >= HNSW_MIN_PARTITION_SIZE:
+            self._build_hnsw()
+
+    def _build_hnsw(self):
+        self.hnsw = hnswlib.Index(space=self.space, dim=self.dim)
+        self.hnsw.init_index(
+            max_elements=max(len(self.ids) * 2, 1024), ef_construction=HNSW_EF_CONSTRUCTION, M=HNSW_M
+        )
+        self._hnsw_add(self.vectors, 0)
+
+    def _hnsw_add(self, vectors: np.ndarray, start: int):
+        needed = start + len(vectors)
+        if needed > self.hnsw.get_max_elements():
+            self.hnsw.resize_index(needed * 2)
+        self.hnsw.add_items(vectors, np.arange(start, needed))
+
+    # --- Reads ---
+    def overlaps(self, category: str | None, since: float | None) -> bool:
+        """Whether this shard can hold vectors matching the category and recency filters."""
+        if category and self.category != category:
+            return False
+        if since is not None and (self.bucket_end is None or self.bucket_end <= since):
+            return False
+        return True
+
+    def search(self, queries: np.ndarray, k: int, since: float | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns (row_indices, distances), each of shape (n_queries, min(k, len)).
+        Distances follow Chroma's conventions: squared L2, 1 - cosine, or 1 - dot.
+        When `since` falls inside this shard's bucket, older rows get an infinite
+        distance so the caller can drop them.
+        """
+        k = min(k, len(self.ids))
+        if k == 0:
+            empty = np.empty((len(queries), 0))
+            return empty.astype(np.int64), empty.astype(np.float32)
+
+        straddles_since = since is not None and (self.bucket_start is None or since > self.bucket_start)
+        if self.hnsw is not None and not straddles_since:
+            self.hnsw.set_ef(max(HNSW_EF_SEARCH, k))
+            rows, distances = self.hnsw.knn_query(queries, k=k)
+            return rows.astype(np.int64), distances
+
+        if self.space == "cosine":
+            queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        dots = queries @ self.vectors.T
+        if self.space == "l2":
+            distances = np.einsum("ij,ij->i", queries, queries)[:, None] - 2 * dots + self.sq_norms[None, :]
+        else:
+            distances = 1.0 - dots
+        if straddles_since:
+            distances[:, self.timestamps < since] = np.inf
+
+        rows = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        row_distances = np.take_along_axis(distances, rows, axis=1)
+        order = np.argsort(row_distances, axis=1)
+        return np.take_along_axis(rows, order, axis=1), np.take_along_axis(row_distances, order, axis=1)
+
+    # --- Persistence ---
+    def save(self, directory: str):
+        # Every file is written then renamed: the current vectors.npy may be memory-mapped
+        # by this very partition, and other processes may be loading the shard.
+        os.makedirs(directory, exist_ok=True)
+        vectors_path = os.path.join(directory, "vectors.npy")
+        with open(vectors_path + ".tmp", "wb") as f:
+            np.save(f, np.ascontiguousarray(self.vectors))
+        os.replace(vectors_path + ".tmp", vectors_path)
+        _write_json_atomic(os.path.join(directory, "ids.json"), {
+            "key": self.key,
+            "category": self.category,
+            "bucket_start": self.bucket_start,
+            "bucket_end": self.bucket_end,
+            "ids": self.ids,
+            "metadatas": self.metadatas,
+        })
+        hnsw_path = os.path.join(directory, "hnsw.bin")
+        if self.hnsw is not None:
+            self.hnsw.save_index(hnsw_path + ".tmp")
+            os.replace(hnsw_path + ".tmp", hnsw_path)
+        elif os.path.exists(hnsw_path):
+            os.remove(hnsw_path)
+
+    @classmethod
+    def load(cls, directory: str, dim: int, space: str) -> "_Partition":
+        with open(os.path.join(directory, "ids.json")) as f:
+            stored = json.load(f)
+        partition = cls(stored["key"], dim, space, stored.get("category", UNCATEGORIZED),
+                        stored.get("bucket_start"), stored.get("bucket_end"))
+        partition.ids = stored["ids"]
+        partition.metadatas = stored["metadatas"]
+        partition.vectors = np.load(os.path.join(directory, "vectors.npy"), mmap_mode="r")
+        if len(partition.vectors) != len(partition.ids):
+            # Caught between two files of a concurrent persist()
+            raise ValueError(f"Shard {directory} is being rewritten ({len(partition.vectors)} vectors, "
+                             f"{len(partition.ids)} ids).")
+        partition.sq_norms = np.einsum("ij,ij->i", partition.vectors, partition.vectors)
+        partition.timestamps = _timestamps_of(partition.metadatas)
+
+        hnsw_path = os.path.join(directory, "hnsw.bin")
+        if hnswlib is not None and os.path.exists(hnsw_path):
+            partition.hnsw = hnswlib.Index(space=space, dim=dim)
+            partition.hnsw.load_index(hnsw_path, max_elements=max(len(partition.ids) * 2, 1024))
+        return partition
+
+
+def _write_json_atomic(path: str, data: dict):
+    with open(path + ".tmp", "w") as f:
+        json.dump(data, f)
+    os.replace(path + ".tmp", path)
+
+
+def _timestamps_of(metadatas: list[dict]) -> np.ndarray:
+    """published_ts per row; undated rows get -inf so recency filters always exclude them."""
+    return np.array(
+        [m.get("published_ts") if m.get("published_ts") is not None else -np.inf for m in metadatas],
+        dtype=np.float64
+    )
+
+
+class LocalVectorStore(VectorStore):
+    """
+    In-process vector index sharded by (category, time bucket).
+
+    Each shard is a NumPy matrix searched by brute force, upgraded to an
+    hnswlib graph once it grows past HNSW_MIN_PARTITION_SIZE (if hnswlib is
+    installed). A query only probes the shards matching its category and
+    `since` filters and merges their per-shard top-k, so latency tracks the
+    working set rather than the whole history. compact() and evict_before()
+    keep old buckets from accumulating.
+
+    Call persist() after writes to save the index to disk. Other processes
+    using the same path (the search service) reload it on their next query
+    once the manifest changes, as long as they have no unsaved writes.
+    """
+
+    name = "local"
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH, space: str = DEFAULT_SPACE):
+        if space not in ("l2", "cosine", "ip"):
+            raise ValueError(f"Unsupported vector space '{space}'. Use 'l2', 'cosine' or 'ip'.")
+        self.path = path
+        self.space = space
+        self.dim = None
+        self.partitions = {}
+        self._id_to_partition = {}
+        self._lock = threading.Lock()
+        self._manifest_mtime = None  # of the manifest last loaded or written
+        self._dirty = False          # writes not persisted yet
+        self._load()
+
+    # --- Persistence ---
+    def _manifest_path(self):
+        return os.path.join(self.path, "manifest.json")
+
+    def _manifest_mtime_now(self) -> int | None:
+        try:
+            return os.stat(self._manifest_path()).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _read_index(self) -> tuple:
+        """Reads the index on disk: (manifest mtime, dim, space, partitions, id -> partition key)."""
+        mtime = self._manifest_mtime_now()
+        with open(self._manifest_path()) as f:
+            manifest = json.load(f)
+        dim, space = manifest["dim"], manifest.get("space", self.space)
+        partitions, id_to_partition = {}, {}
+        for key, directory in manifest["partitions"].items():
+            partition = _Partition.load(os.path.join(self.path, directory), dim, space)
+            partitions[key] = partition
+            for doc_id in partition.ids:
+                id_to_partition[doc_id] = key
+        return mtime, dim, space, partitions, id_to_partition
+
+    def _load(self):
+        if not os.path.exists(self._manifest_path()):
+            return
+        self._manifest_mtime, self.dim, self.space, self.partitions, self._id_to_partition = self._read_index()
+        print(f"Local vector store loaded: {self.count()} vectors in {len(self.partitions)} partitions from {self.path}")
+
+    def _reload_if_changed(self):
+        """Picks up an index persisted by another process since it was last loaded."""
+        mtime = self._manifest_mtime_now()
+        if mtime is None or mtime == self._manifest_mtime or self._dirty:
+            return
+        try:
+            index = self._read_index()
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not reload the local vector store yet ({e}); will retry.")
+            return
+        with self._lock:
+            if self._dirty:
+                return
+            self._manifest_mtime, self.dim, self.space, self.partitions, self._id_to_partition = index
+        print(f"Local vector store reloaded: {self.count()} vectors in {len(self.partitions)} partitions.")
+
+    def persist(self):
+        with self._lock:
+            os.makedirs(self.path, exist_ok=True)
+            directories = {}
+            for key, partition in self.partitions.items():
+                directory = "p" + hashlib.md5(key.encode("utf-8")).hexdigest()[:16]
+                partition.save(os.path.join(self.path, directory))
+                directories[key] = directory
+            # The manifest goes last, so a reader never sees it name a shard not yet written
+            _write_json_atomic(self._manifest_path(),
+                               {"dim": self.dim, "space": self.space, "partitions": directories})
+            self._manifest_mtime = self._manifest_mtime_now()
+            self._dirty = False
+
+            # Remove shard folders left behind by evicted or compacted partitions.
+            for entry in os.listdir(self.path):
+                if entry.startswith("p") and entry not in directories.values():
+                    shutil.rmtree(os.path.join(self.path, entry), ignore_errors=True)
+
+    # --- VectorStore interface ---
+    def add(self, ids, embeddings, metadatas):
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if vectors.ndim != 2 or len(vectors) != len(ids) or len(metadatas) != len(ids):
+            raise ValueError("ids, embeddings and metadatas must have the same length.")
+
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match index dimension {self.dim}.")
+
+            self._dirty = True
+            grouped = {}
+            for row, (doc_id, metadata) in enumerate(zip(ids, metadatas)):
+                if doc_id in self._id_to_partition:
+                    continue
+                shard = _partition_key(metadata)
+                grouped.setdefault(shard, []).append(row)
+                self._id_to_partition[doc_id] = shard[0]
+
+            for (key, category, start, end), rows in grouped.items():
+                self._append(key, category, start, end, [ids[r] for r in rows], vectors[rows],
+                             [metadatas[r] for r in rows])
+
+    def _append(self, key, category, start, end, ids, vectors, metadatas):
+        partition = self.partitions.get(key)
+        if partition is None:
+            partition = self.partitions[key] = _Partition(key, self.dim, self.space, category, start, end)
+        partition.add(ids, vectors, metadatas)
+
+    def query(self, query_embeddings, n_results=10, category=None, since=None):
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        self._reload_if_changed()
+        # add(), compact() and friends replace shard arrays and grow HNSW graphs under the lock
+        with self._lock:
+            partitions = [p for p in self.partitions.values() if len(p) and p.overlaps(category, since)]
+            if not partitions or len(queries) == 0:
+                return {"ids": [[] for _ in queries], "distances": [[] for _ in queries]}
+
+            candidate_ids, candidate_distances = [], []
+            for partition in partitions:
+                rows, distances = partition.search(queries, n_results, since)
+                partition_ids = np.asarray(partition.ids, dtype=object)
+                candidate_ids.append(partition_ids[rows])
+                candidate_distances.append(distances)
+
+        all_ids = np.concatenate(candidate_ids, axis=1)
+        all_distances = np.concatenate(candidate_distances, axis=1)
+        order = np.argsort(all_distances, axis=1, kind="stable")[:, :n_results]
+        merged_ids = np.take_along_axis(all_ids, order, axis=1)
+        merged_distances = np.take_along_axis(all_distances, order, axis=1).astype(float)
+
+        # Drop rows masked out by the `since` filter (infinite distance).
+        keep = np.isfinite(merged_distances)
+        return {
+            "ids": [row[mask].tolist() for row, mask in zip(merged_ids, keep)],
+            "distances": [row[mask].tolist() for row, mask in zip(merged_distances, keep)],
+        }
+
+    # --- Maintenance ---
+    def compact(self, before_ts: float) -> int:
+        """
+        Folds day shards that ended before `before_ts` into week shards of the
+        same category. Returns the number of day shards merged.
+        """
+        merged = 0
+        with self._lock:
+            self._dirty = True
+            for key, partition in list(self.partitions.items()):
+                if not key.rsplit("|", 1)[1].startswith("day-") or partition.bucket_end > before_ts:
+                    continue
+                week_key, category, start, end = _partition_key(partition.metadatas[0], "week") \
+                    if partition.metadatas else (None, None, None, None)
+                del self.partitions[key]
+                if week_key:
+                    self._append(week_key, category, start, end, partition.ids,
+                                 np.asarray(partition.vectors), partition.metadatas)
+                    for doc_id in partition.ids:
+                        self._id_to_partition[doc_id] = week_key
+                merged += 1
+        print(f"Compacted {merged} day shards into week shards.")
+        return merged
+
+    def evict_before(self, cutoff_ts: float) -> int:
+        """Drops every dated shard whose bucket ended before `cutoff_ts`. Returns vectors removed."""
+        removed = 0
+        with self._lock:
+            self._dirty = True
+            for key, partition in list(self.partitions.items()):
+                if partition.bucket_end is None or partition.bucket_end > cutoff_ts:
+                    continue
+                del self.partitions[key]
+                for doc_id in partition.ids:
+                    self._id_to_partition.pop(doc_id, None)
+                removed += len(partition)
+        print(f"Evicted {removed} vectors from shards older than {datetime.fromtimestamp(cutoff_ts, tz=timezone.utc)}.")
+        return removed
+
+    def count(self):
+        with self._lock:
+            return sum(len(partition) for partition in self.partitions.values())
+
+    def rename_ids(self, mapping):
+        renamed = 0
+        with self._lock:
+            self._dirty = True
+            for partition in self.partitions.values():
+                duplicate_rows = []
+                for row, doc_id in enumerate(partition.ids):
+                    new_id = mapping.get(doc_id)
+                    if new_id is None:
+                        continue
+                    key = self._id_to_partition.pop(doc_id)
+                    if new_id in self._id_to_partition:
+                        duplicate_rows.append(row)
+                        continue
+                    partition.ids[row] = new_id
+                    self._id_to_partition[new_id] = key
+                    renamed += 1
+                if duplicate_rows:
+                    partition.remove_rows(duplicate_rows)
+        return renamed
+
+    def get_all(self):
+        with self._lock:
+            partitions = [p for p in self.partitions.values() if len(p)]
+            if not partitions:
+                return [], np.empty((0, self.dim or 0), dtype=np.float32), []
+            ids = [doc_id for p in partitions for doc_id in p.ids]
+            metadatas = [metadata for p in partitions for metadata in p.metadatas]
+            return ids, np.concatenate([p.vectors for p in partitions]), metadatas
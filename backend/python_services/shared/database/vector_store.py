@@ -0,0 +1,194 @@
+import os
+from datetime import datetime, timezone
+
+# --- CONFIGURATION ---
+# Which vector store backend the services should use:
+#   'chroma' -> the existing ChromaDB PersistentClient (default)
+#   'local'  -> the in-process partitioned index in local_vector_store.py
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "chroma").lower()
+
+
+# --- METADATA HELPERS ---
+def to_timestamp(value) -> float | None:
+    """
+    Converts a publishedAt value (datetime, Firestore timestamp, NewsAPI ISO
+    string such as '2025-10-18T12:34:56Z', or epoch seconds) to epoch seconds.
+    """
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+    return None
+
+
+def build_vector_metadata(article: dict, category: str | None = None) -> dict:
+    """
+    Builds the filterable metadata stored with an article vector: its category
+    and publishedAt as epoch seconds ('published_ts'), which drives the
+    time-bucketed sharding and the `since` filter.
+    """
+    metadata = {"category": category or article.get("category") or ""}
+    published_ts = to_timestamp(article.get("publishedAt"))
+    if published_ts is not None:
+        metadata["published_ts"] = published_ts
+    return metadata
+
+
+# --- INTERFACE ---
+class VectorStore:
+    """
+    Minimal interface every vector store backend implements.
+
+    Query results use the same shape as ChromaDB so callers can switch
+    backends without changing how they read results:
+        {"ids": [[...], ...], "distances": [[...], ...]}
+    with one inner list per query embedding.
+    """
+
+    name = "base"
+
+    def add(self, ids: list[str], embeddings: list[list[float]], metadatas: list[dict]):
+        """Adds vectors with their metadata. Existing IDs are skipped."""
+        raise NotImplementedError
+
+    def query(self, query_embeddings: list[list[float]], n_results: int = 10, category: str | None = None,
+              since: float | None = None) -> dict:
+        """
+        Returns the nearest neighbours of each query embedding, optionally
+        restricted to one category and to articles published at or after
+        `since` (epoch seconds).
+        """
+        raise NotImplementedError
+
+    def count(self) -> int:
+        """Returns the number of vectors stored."""
+        raise NotImplementedError
+
+    def get_all(self) -> tuple[list[str], list[list[float]], list[dict]]:
+        """Returns every (ids, embeddings, metadatas) in the store, for offline jobs."""
+        raise NotImplementedError
+
+    def rename_ids(self, mapping: dict[str, str]) -> int:
+        """
+        Re-keys vectors from old to new IDs. When the new ID already exists
+        (a duplicate article), the old vector is dropped instead.
+        Returns the number of vectors renamed.
+        """
+        raise NotImplementedError
+
+    def persist(self):
+        """Flushes any in-memory state to disk. A no-op for self-persisting backends."""
+        return None
+
+
+# --- CHROMA BACKEND ---
+class ChromaVectorStore(VectorStore):
+    """Wraps the shared ChromaDB 'news_articles' collection."""
+
+    name = "chroma"
+
+    def __init__(self, collection=None):
+        if collection is None:
+            from shared.database.chromadb_client import get_article_collection
+            collection = get_article_collection()
+        if collection is None:
+            raise RuntimeError("ChromaDB collection 'news_articles' is not available.")
+        self.collection = collection
+
+    def add(self, ids, embeddings, metadatas):
+        self.collection.add(ids=ids, embeddings=embeddings, metadatas=metadatas)
+
+    def query(self, query_embeddings, n_results=10, category=None, since=None):
+        query_args = {
+            "query_embeddings": query_embeddings,
+            "n_results": n_results,
+            "include": ["distances"],
+        }
+        # Chroma has no sharding, so recency is a metadata filter on 'published_ts'.
+        filters = []
+        if category:
+            filters.append({"category": category})
+        if since is not None:
+            filters.append({"published_ts": {"$gte": since}})
+        if len(filters) == 1:
+            query_args["where"] = filters[0]
+        elif filters:
+            query_args["where"] = {"$and": filters}
+        results = self.collection.query(**query_args) or {}
+        return {
+            "ids": results.get("ids") or [[] for _ in query_embeddings],
+            "distances": results.get("distances") or [[] for _ in query_embeddings],
+        }
+
+    def count(self):
+        return self.collection.count()
+
+    def rename_ids(self, mapping, page_size: int = 500):
+        # Chroma cannot rename in place: copy each vector under its new ID, then delete the old one.
+        renamed = 0
+        old_ids = list(mapping)
+        for start in range(0, len(old_ids), page_size):
+            page = self.collection.get(ids=old_ids[start:start + page_size], include=["embeddings", "metadatas"])
+            if not page.get("ids"):
+                continue
+            existing = set(self.collection.get(ids=[mapping[i] for i in page["ids"]], include=[])["ids"])
+            new_ids, new_embeddings, new_metadatas = [], [], []
+            for doc_id, embedding, metadata in zip(page["ids"], page["embeddings"], page["metadatas"]):
+                new_id = mapping[doc_id]
+                if new_id in existing:
+                    continue
+                existing.add(new_id)
+                new_ids.append(new_id)
+                new_embeddings.append(embedding)
+                new_metadatas.append(metadata)
+            if new_ids:
+                self.collection.add(ids=new_ids, embeddings=new_embeddings, metadatas=new_metadatas)
+            self.collection.delete(ids=page["ids"])
+            renamed += len(new_ids)
+        return renamed
+
+    def get_all(self, page_size: int = 5000):
+        ids, embeddings, metadatas = [], [], []
+        offset = 0
+        while True:
+            page = self.collection.get(include=["embeddings", "metadatas"], limit=page_size, offset=offset)
+            if not page.get("ids"):
+                break
+            ids.extend(page["ids"])
+            embeddings.extend(page["embeddings"])
+            metadatas.extend(page["metadatas"])
+            offset += len(page["ids"])
+        return ids, embeddings, metadatas
+
+
+# --- FACTORY ---
+_vector_store = None
+
+def get_vector_store() -> VectorStore:
+    """
+    Returns the process-wide vector store selected by VECTOR_STORE_BACKEND,
+    creating it on first use.
+    """
+    global _vector_store
+    if _vector_store is not None:
+        return _vector_store
+
+    if VECTOR_STORE_BACKEND == "local":
+        from shared.database.local_vector_store import LocalVectorStore
+        _vector_store = LocalVectorStore()
+    elif VECTOR_STORE_BACKEND == "chroma":
+        _vector_store = ChromaVectorStore()
+    else:
+        raise ValueError(f"FATAL: Unknown VECTOR_STORE_BACKEND '{VECTOR_STORE_BACKEND}'. Use 'chroma' or 'local'.")
+
+    print(f"Vector store ready (backend: {_vector_store.name}).")
+    return _vector_store
@@ -1,6 +1,5 @@
 import os
-from sentence_transformers import SentenceTransformer
-import torch # Import torch to check for CUDA availability
+import threading
 
 # --- Model Configuration ---
 # Use the specific Hugging Face identifier for Nomic Embed Text v1.5
@@ -9,27 +8,52 @@ MODEL_NAME = "nomic-ai/nomic-embed-text-v1.5"
 TASK_TYPE_DOCUMENT = "search_document"
 TASK_TYPE_QUERY = "search_query"
 
+# Nomic expects inputs to be prefixed based on task type for best results
+# See model card: https://huggingface.co/nomic-ai/nomic-embed-text-v1.5
+prefix_map = {
+    TASK_TYPE_DOCUMENT: "search_document: ",
+    TASK_TYPE_QUERY: "search_query: "
+}
+
 # --- Model Loading ---
-# Determine device (use GPU if available, otherwise CPU)
-device = 'cuda' if torch.cuda.is_available() else 'cpu'
-print(f"Loading SentenceTransformer model '{MODEL_NAME}' onto device: {device}")
-
-# Load the model. This might take a moment the first time it downloads.
-# Set trust_remote_code=True as required by this specific model.
-try:
-    # It's generally better to load the model once when the service starts
-    model = SentenceTransformer(MODEL_NAME, trust_remote_code=True, device=device)
-    print(f"Model '{MODEL_NAME}' loaded successfully.")
-    # Nomic expects inputs to be prefixed based on task type for best results
-    # See model card: https://huggingface.co/nomic-ai/nomic-embed-text-v1.5
-    prefix_map = {
-        TASK_TYPE_DOCUMENT: "search_document: ",
-        TASK_TYPE_QUERY: "search_query: "
-    }
-
-except Exception as e:
-    print(f"CRITICAL: Failed to load SentenceTransformer model '{MODEL_NAME}'. Error: {e}")
-    model = None # Mark model as unavailable
+# torch and the model are loaded on first use (get_model()), not at import,
+# so importing this module is cheap for code paths that never embed.
+_model = None
+_model_failed = False
+_model_lock = threading.Lock()
+
+
+def get_model():
+    """
+    Returns the shared SentenceTransformer model, loading it on the first call
+    (downloading it the very first time). Returns None if loading failed; the
+    failure is remembered so later calls don't retry a multi-second load.
+    """
+    global _model, _model_failed
+    if _model is None and not _model_failed:
+        with _model_lock:
+            if _model is None and not _model_failed:
+                try:
+                    import torch  # Import torch to check for CUDA availability
+                    from sentence_transformers import SentenceTransformer
+
+                    # Determine device (use GPU if available, otherwise CPU)
+                    device = 'cuda' if torch.cuda.is_available() else 'cpu'
+                    print(f"Loading SentenceTransformer model '{MODEL_NAME}' onto device: {device}")
+                    # Set trust_remote_code=True as required by this specific model.
+                    _model = SentenceTransformer(MODEL_NAME, trust_remote_code=True, device=device)
+                    print(f"Model '{MODEL_NAME}' loaded successfully.")
+                except Exception as e:
+                    print(f"CRITICAL: Failed to load SentenceTransformer model '{MODEL_NAME}'. Error: {e}")
+                    _model_failed = True  # Mark model as unavailable
+    return _model
+
+
+def __getattr__(name):
+    # Keeps `from shared.llm.embedding_client import model` working.
+    if name == "model":
+        return get_model()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def create_hf_embedding(text_to_embed: str, task_type: str = TASK_TYPE_DOCUMENT) -> list[float] | None:
@@ -44,12 +68,13 @@ def create_hf_embedding(text_to_embed: str, task_type: str = TASK_TYPE_DOCUMENT)
     Returns:
         list[float] | None: A list of floats representing the vector embedding, or None on error.
     """
-    if not model:
-        print("  -> ERROR: Embedding model is not loaded. Cannot create embedding.")
-        return None
     if not text_to_embed:
         print("  -> Skipping embedding: Input text is empty.")
         return None
+    model = get_model()
+    if not model:
+        print("  -> ERROR: Embedding model is not loaded. Cannot create embedding.")
+        return None
 
     # Apply the task-specific prefix recommended by Nomic
     prefix = prefix_map.get(task_type, "") # Default to no prefix if task type is unknown
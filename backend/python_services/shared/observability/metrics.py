@@ -0,0 +1,242 @@
+import os
+import json
+import time
+import random
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+# --- Configuration ---
+METRICS_PREFIX = "news"
+# Histogram buckets (seconds) for the Prometheus exposition; they span a
+# sub-millisecond cache hit up to a slow Gemini or Jina call.
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+# Raw samples kept per series for exact-ish percentiles in run reports
+MAX_SAMPLES = 10000
+RUN_REPORT_DIR = os.getenv(
+    "RUN_REPORT_DIR",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '.cache', 'run_reports'))
+)
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Stage names used across the pipeline and services
+STAGES = ("fetch", "scrape", "clean", "summarize", "embed", "store", "query", "tts")
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key: tuple, extra: tuple = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape_label(v)}"' for k, v in pairs) + "}"
+
+
+def _escape_label(value: str) -> str:
+    """Escapes a label value for the Prometheus text format (backslash first)."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    """Linear-interpolated percentile of an already sorted list (q in 0..100)."""
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * q / 100.0
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+class _Histogram:
+    """Bucketed counts for Prometheus plus a bounded reservoir of raw samples for percentiles."""
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+        self.samples = []
+
+    def observe(self, value: float):
+        self.count += 1
+        self.total += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        # Reservoir sampling keeps the percentile estimate unbiased once full
+        if len(self.samples) < MAX_SAMPLES:
+            self.samples.append(value)
+        else:
+            slot = random.randrange(self.count)
+            if slot < MAX_SAMPLES:
+                self.samples[slot] = value
+
+    def summary(self) -> dict:
+        values = sorted(self.samples)
+        return {
+            "count": self.count,
+            "sum": round(self.total, 6),
+            "mean": round(self.total / self.count, 6) if self.count else 0.0,
+            "p50": round(percentile(values, 50), 6),
+            "p95": round(percentile(values, 95), 6),
+            "p99": round(percentile(values, 99), 6),
+            "max": round(values[-1], 6) if values else 0.0,
+        }
+
+
+class MetricsRegistry:
+    """
+    Thread-safe, in-process counters and histograms with labels.
+
+    Services expose them in the Prometheus text format on /metrics; batch
+    jobs write a JSON run report with per-stage p50/p95/p99 at the end.
+    """
+
+    def __init__(self, prefix: str = METRICS_PREFIX):
+        self.prefix = prefix
+        self.lock = threading.Lock()
+        self.counters = {}     # name -> {label_key: value}
+        self.histograms = {}   # name -> {label_key: _Histogram}
+        self.started_at = time.time()
+
+    # --- Recording ---
+    def inc(self, name: str, value: float = 1, **labels):
+        """Adds `value` to a counter, e.g. inc("items_total", stage="scrape", outcome="ok")."""
+        key = _label_key(labels)
+        with self.lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, buckets: tuple = DURATION_BUCKETS, **labels):
+        """Records one observation in a histogram."""
+        key = _label_key(labels)
+        with self.lock:
+            series = self.histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = _Histogram(buckets)
+            series[key].observe(value)
+
+    @contextmanager
+    def timed(self, stage: str, **labels):
+        """
+        Times the wrapped block as one `stage_duration_seconds` observation and
+        counts it as an error when it raises.
+
+        Example:
+            with metrics.timed("summarize"):
+                summary = get_summary(content)
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.inc("errors_total", stage=stage, **labels)
+            raise
+        finally:
+            self.observe("stage_duration_seconds", time.perf_counter() - start, stage=stage, **labels)
+
+    # --- Convenience recorders ---
+    def count_items(self, stage: str, n: int = 1, outcome: str = "ok"):
+        self.inc("items_total", n, stage=stage, outcome=outcome)
+
+    def count_bytes(self, stage: str, n: int):
+        self.inc("bytes_total", n, stage=stage)
+
+    def count_cache(self, cache: str, hit: bool, n: int = 1):
+        self.inc("cache_requests_total", n, cache=cache, result="hit" if hit else "miss")
+
+    def count_error(self, stage: str, n: int = 1):
+        self.inc("errors_total", n, stage=stage)
+
+    # --- Export ---
+    def render_prometheus(self) -> str:
+        """Renders every metric in the Prometheus text exposition format."""
+        lines = []
+        with self.lock:
+            for name, series in sorted(self.counters.items()):
+                full_name = f"{self.prefix}_{name}"
+                lines.append(f"# TYPE {full_name} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{full_name}{_format_labels(key)} {value}")
+
+            for name, series in sorted(self.histograms.items()):
+                full_name = f"{self.prefix}_{name}"
+                lines.append(f"# TYPE {full_name} histogram")
+                for key, hist in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(hist.buckets, hist.counts):
+                        cumulative += count
+                        lines.append(f"{full_name}_bucket{_format_labels(key, (('le', str(bound)),))} {cumulative}")
+                    lines.append(f"{full_name}_bucket{_format_labels(key, (('le', '+Inf'),))} {hist.count}")
+                    lines.append(f"{full_name}_sum{_format_labels(key)} {hist.total}")
+                    lines.append(f"{full_name}_count{_format_labels(key)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        """Counters and histogram summaries as plain dicts, keyed by 'name{labels}'."""
+        with self.lock:
+            return {
+                "counters": {
+                    f"{name}{_format_labels(key)}": value
+                    for name, series in self.counters.items() for key, value in series.items()
+                },
+                "histograms": {
+                    f"{name}{_format_labels(key)}": hist.summary()
+                    for name, series in self.histograms.items() for key, hist in series.items()
+                },
+            }
+
+    def stage_summary(self) -> dict:
+        """Per-stage latency summary from `stage_duration_seconds`, keyed by stage (and any extra label values)."""
+        with self.lock:
+            series = self.histograms.get("stage_duration_seconds", {})
+            summary = {}
+            for key, hist in series.items():
+                labels = dict(key)
+                stage = labels.pop("stage", "")
+                # Extra labels keep series apart, e.g. 'store/firestore' and 'store/vector_store'
+                name = "/".join([stage, *(labels[k] for k in sorted(labels))])
+                summary[name] = hist.summary()
+            return summary
+
+    def write_run_report(self, job: str, extra: dict | None = None, directory: str = RUN_REPORT_DIR) -> str:
+        """
+        Writes a JSON report for a batch job run and prints the per-stage
+        latency table.
+
+        Args:
+            job (str): Job name, used in the file name (e.g. 'daily_pipeline').
+            extra (dict): Additional job-specific fields to include.
+
+        Returns:
+            str: The path of the written report.
+        """
+        finished = time.time()
+        report = {
+            "job": job,
+            "started_at": datetime.utcfromtimestamp(self.started_at).isoformat(),
+            "finished_at": datetime.utcfromtimestamp(finished).isoformat(),
+            "wall_seconds": round(finished - self.started_at, 3),
+            "stages": self.stage_summary(),
+            **self.snapshot(),
+            **(extra or {}),
+        }
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{job}_{datetime.utcfromtimestamp(finished):%Y%m%d%H%M%S}.json")
+        with open(path, "w") as f:
+            json.dump(report, f, indent=1, default=str)
+
+        print(f"\n⏱️  Stage timings for {job} (seconds):")
+        print(f"   {'stage':<24}{'count':>8}{'p50':>10}{'p95':>10}{'p99':>10}{'total':>10}")
+        for stage, s in sorted(report["stages"].items()):
+            print(f"   {stage:<24}{s['count']:>8}{s['p50']:>10.3f}{s['p95']:>10.3f}{s['p99']:>10.3f}{s['sum']:>10.1f}")
+        print(f"   Report saved to {path}")
+        return path
+
+
+# One registry per process, shared by every module that records metrics.
+metrics = MetricsRegistry()
+timed = metrics.timed
@@ -0,0 +1,551 @@
+import io
+import os
+import sys
+import time
+import uuid
+import base64
+import marshal
+import pstats
+import cProfile
+import threading
+import contextvars
+import tracemalloc
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+
+# --- Configuration ---
+# Profiling endpoints are only registered when this is true; they are also
+# restricted to callers presenting the shared INTERNAL_API_TOKEN.
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+# Seconds between stack samples (5 ms costs ~1-2% CPU on a busy service)
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", 0.005))
+# Upper bound for ?seconds= on the sampling and allocation endpoints
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", 60))
+# Frames kept per allocation traceback by tracemalloc
+PROFILE_TRACEMALLOC_FRAMES = int(os.getenv("PROFILE_TRACEMALLOC_FRAMES", 25))
+# Per-request cProfile results kept in memory for /debug/profile/requests
+PROFILE_KEEP_REQUESTS = int(os.getenv("PROFILE_KEEP_REQUESTS", 20))
+# Where batch jobs write their --profile output
+PROFILE_DIR = os.getenv(
+    "PROFILE_DIR",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '.cache', 'profiles'))
+)
+
+# Requests carrying this header (plus the internal token) are run under cProfile
+PROFILE_REQUEST_HEADER = "X-Profile-Request"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+_python_services_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+# Before Python 3.12 cProfile only sees the thread that enabled it, so work a
+# profiled FastAPI request hands to the thread pool is profiled separately
+# (see run_in_threadpool_profiled) and collected here.
+_PER_THREAD_CPROFILE = sys.version_info < (3, 12)
+_worker_profiles = contextvars.ContextVar("worker_profiles", default=None)
+
+
+def is_authorized(headers) -> bool:
+    """True when profiling is enabled and the request carries the shared INTERNAL_API_TOKEN."""
+    expected_token = os.environ.get("INTERNAL_API_TOKEN")
+    return PROFILING_ENABLED and bool(expected_token) and headers.get("X-Internal-Token") == expected_token
+
+
+# --- Frame labels ---
+_labels = {}
+
+
+def _frame_label(code) -> str:
+    """'function (path:line)', with paths relative to python_services or site-packages."""
+    label = _labels.get(code)
+    if label is None:
+        path = code.co_filename
+        if path.startswith(_python_services_dir):
+            path = os.path.relpath(path, _python_services_dir)
+        elif "site-packages" in path:
+            path = path.split("site-packages" + os.sep, 1)[-1]
+        else:
+            path = os.path.basename(path)
+        # ';' separates frames in the folded format
+        label = f"{code.co_name} ({path}:{code.co_firstlineno})".replace(";", ",")
+        _labels[code] = label
+    return label
+
+
+def _folded(stacks: Counter) -> str:
+    """Folded stacks ('root;caller;callee count' per line) for flamegraph.pl, speedscope or inferno."""
+    return "\n".join(f"{stack} {count}" for stack, count in stacks.most_common())
+
+
+# --- Sampling profiler ---
+class SamplingProfiler:
+    """
+    Statistical wall-clock profiler. A background thread reads every other
+    thread's current stack with sys._current_frames() at a fixed interval
+    and counts identical stacks. Nothing is hooked into the profiled code
+    (unlike cProfile or sys.setprofile), so the overhead is the sampling
+    thread alone and does not grow with the number of calls.
+
+    Threads blocked on I/O or locks are sampled too, so idle server threads
+    show up as their own towers in the flamegraph.
+    """
+
+    def __init__(self, interval: float = PROFILE_SAMPLE_INTERVAL, exclude: set | None = None):
+        """
+        Args:
+            interval (float): Seconds between samples.
+            exclude (set): Thread idents not to sample, e.g. the thread
+                waiting for the profile to finish.
+        """
+        self.interval = interval
+        self.exclude = set(exclude or ())
+        self.stacks = Counter()
+        self.samples = 0
+        self.started_at = None
+        self.seconds = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        skip = self.exclude | {threading.get_ident()}
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident in skip:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}"))
+            self.stacks[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.seconds = time.perf_counter() - self.started_at
+        return self
+
+    def folded(self) -> str:
+        return _folded(self.stacks)
+
+    def top(self, limit: int = 20) -> list[dict]:
+        """Functions with the most samples at the top of the stack (self time)."""
+        leaves = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        total = sum(leaves.values()) or 1
+        return [{"function": name, "samples": count, "percent": round(100 * count / total, 2)}
+                for name, count in leaves.most_common(limit)]
+
+    def report(self, limit: int = 20) -> dict:
+        return {"seconds": round(self.seconds, 3), "interval": self.interval, "samples": self.samples,
+                "top": self.top(limit), "folded": self.folded()}
+
+
+# One sampling session per process at a time
+_sampling_lock = threading.Lock()
+
+
+def sample_for(seconds: float, interval: float = PROFILE_SAMPLE_INTERVAL) -> SamplingProfiler | None:
+    """
+    Samples all threads for `seconds` (capped at PROFILE_MAX_SECONDS) and
+    returns the stopped profiler, or None if another session is running.
+    """
+    if not _sampling_lock.acquire(blocking=False):
+        return None
+    try:
+        profiler = SamplingProfiler(interval, exclude={threading.get_ident()}).start()
+        time.sleep(min(max(seconds, 0.0), PROFILE_MAX_SECONDS))
+        return profiler.stop()
+    finally:
+        _sampling_lock.release()
+
+
+# --- Per-request cProfile ---
+class RequestProfiles:
+    """
+    Runs single requests under cProfile and keeps the last
+    PROFILE_KEEP_REQUESTS results in memory.
+
+    cProfile is process-wide on recent Pythons, so one request is
+    profiled at a time; a marked request arriving meanwhile runs normally.
+    """
+
+    def __init__(self, keep: int = PROFILE_KEEP_REQUESTS):
+        self.keep = keep
+        self.results = OrderedDict()  # profile id -> result
+        self._active = threading.Lock()
+        self._lock = threading.Lock()
+
+    def start(self) -> cProfile.Profile | None:
+        if not self._active.acquire(blocking=False):
+            return None
+        profile = cProfile.Profile()
+        profile.enable()
+        return profile
+
+    def finish(self, profile: cProfile.Profile, method: str, path: str, seconds: float,
+               worker_profiles: list | None = None) -> str:
+        """Stops the profile, stores its result (merged with `worker_profiles`) and returns its id."""
+        profile.disable()
+        self._active.release()
+        stats = pstats.Stats(profile)
+        for worker_profile in worker_profiles or ():
+            stats.add(worker_profile)
+        profile_id = uuid.uuid4().hex[:12]
+        result = {
+            "id": profile_id,
+            "method": method,
+            "path": path,
+            "ms": round(seconds * 1000, 2),
+            "at": datetime.utcnow().isoformat(),
+            "stats": _pstats_text(stats),
+            "folded": _cprofile_folded(stats),
+            "prof_b64": _pstats_dump(stats),
+        }
+        with self._lock:
+            self.results[profile_id] = result
+            while len(self.results) > self.keep:
+                self.results.popitem(last=False)
+        return profile_id
+
+    def discard(self, profile: cProfile.Profile):
+        """Stops a profile without keeping it (the request failed before a response)."""
+        profile.disable()
+        self._active.release()
+
+    def list(self) -> list[dict]:
+        with self._lock:
+            return [{k: r[k] for k in ("id", "method", "path", "ms", "at")} for r in reversed(self.results.values())]
+
+    def get(self, profile_id: str) -> dict | None:
+        with self._lock:
+            return self.results.get(profile_id)
+
+
+def _pstats_text(stats: pstats.Stats, limit: int = 40) -> str:
+    out = io.StringIO()
+    stats.stream = out
+    stats.sort_stats("cumulative").print_stats(limit)
+    return out.getvalue()
+
+
+def _pstats_dump(stats: pstats.Stats) -> str:
+    """The binary pstats dump (for snakeviz or flameprof), base64-encoded."""
+    return base64.b64encode(marshal.dumps(stats.stats)).decode("ascii")
+
+
+def _cprofile_folded(stats: pstats.Stats) -> str:
+    """
+    Caller;callee pairs weighted by microseconds spent in the callee.
+    cProfile records only one level of callers, so this is a two-level
+    flamegraph of where time went rather than full stacks.
+    """
+    stacks = Counter()
+    for (filename, line, name), (_, _, tottime, _, callers) in stats.stats.items():
+        callee = f"{name} ({os.path.basename(filename)}:{line})".replace(";", ",")
+        if not callers:
+            stacks[callee] += int(tottime * 1e6)
+        for (c_file, c_line, c_name), (_, _, c_tottime, _) in callers.items():
+            caller = f"{c_name} ({os.path.basename(c_file)}:{c_line})".replace(";", ",")
+            stacks[f"{caller};{callee}"] += int(c_tottime * 1e6)
+    return _folded(Counter({stack: us for stack, us in stacks.items() if us > 0}))
+
+
+request_profiles = RequestProfiles()
+
+
+# --- Allocations ---
+_IGNORED_ALLOCATIONS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def allocation_profile(seconds: float = 0.0, limit: int = 25, frames: int = PROFILE_TRACEMALLOC_FRAMES) -> dict:
+    """
+    Reports the top allocations by size with tracemalloc.
+
+    If tracing is already on (PYTHONTRACEMALLOC or an earlier call), the
+    report covers everything allocated since it was turned on; otherwise
+    tracing is turned on for `seconds` and the report covers memory
+    allocated in that window and still alive at its end. Tracing is
+    expensive (roughly 2x slower allocations) and is switched off again
+    if it was started here.
+
+    Returns:
+        dict: 'top' (largest allocation sites by line), 'traced_kb',
+              'peak_kb' and 'folded' (allocation stacks weighted by bytes).
+    """
+    started_here = not tracemalloc.is_tracing()
+    if started_here:
+        tracemalloc.start(frames)
+    try:
+        time.sleep(min(max(seconds, 0.0), PROFILE_MAX_SECONDS))
+        snapshot = tracemalloc.take_snapshot().filter_traces(_IGNORED_ALLOCATIONS)
+        traced, peak = tracemalloc.get_traced_memory()
+    finally:
+        if started_here:
+            tracemalloc.stop()
+
+    top = [{"where": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            "size_kb": round(stat.size / 1024, 1), "count": stat.count}
+           for stat in snapshot.statistics("lineno")[:limit]]
+
+    stacks = Counter()
+    for stat in snapshot.statistics("traceback"):
+        # Traceback iterates from the oldest frame, i.e. root first as folded stacks expect
+        stack = [f"{os.path.basename(frame.filename)}:{frame.lineno}".replace(";", ",")
+                 for frame in stat.traceback]
+        stacks[";".join(stack)] += stat.size
+    return {"seconds": seconds, "traced_kb": round(traced / 1024, 1), "peak_kb": round(peak / 1024, 1),
+            "top": top, "folded": _folded(stacks)}
+
+
+# --- Batch jobs ---
+@contextmanager
+def profile_run(job: str, enabled: bool = True, directory: str = PROFILE_DIR):
+    """
+    Samples the whole body of the `with` block and writes the result as
+    <job>_<timestamp>.folded (flamegraph input) plus a .txt summary of the
+    hottest functions. Used by the --profile flag of batch jobs.
+
+    Args:
+        job (str): Job name, used in the file names (e.g. 'daily_pipeline').
+        enabled (bool): When False, the block runs unprofiled.
+    """
+    if not enabled:
+        yield None
+        return
+    profiler = SamplingProfiler().start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, f"{job}_{datetime.utcnow():%Y%m%d%H%M%S}")
+        with open(base + ".folded", "w") as f:
+            f.write(profiler.folded() + "\n")
+        with open(base + ".txt", "w") as f:
+            f.write(f"{job}: {profiler.samples} samples over {profiler.seconds:.1f}s "
+                    f"(every {profiler.interval * 1000:.0f} ms)\n\n")
+            for row in profiler.top(40):
+                f.write(f"{row['percent']:>6.2f}%  {row['samples']:>8}  {row['function']}\n")
+        print(f"🔬 Profile for {job} saved to {base}.folded "
+              f"(render with flamegraph.pl or https://www.speedscope.app)")
+
+
+# --- Flask integration ---
+def _bounded_seconds(value, default: float) -> float:
+    try:
+        return min(max(float(value), 0.0), PROFILE_MAX_SECONDS)
+    except (TypeError, ValueError):
+        return default
+
+
+def _bounded_limit(value, default: int) -> int:
+    try:
+        return min(max(int(value), 1), 500)
+    except (TypeError, ValueError):
+        return default
+
+
+def register_flask_profiling(app):
+    """
+    Adds the profiling surface to a Flask app when PROFILING_ENABLED is set.
+    Every route and the per-request header require X-Internal-Token.
+
+        POST /debug/profile/sample?seconds=10[&format=folded]
+        POST /debug/profile/allocations?seconds=10[&limit=25][&format=folded]
+        GET  /debug/profile/requests
+        GET  /debug/profile/requests/<id>[?format=folded|prof]
+
+    Any request sent with 'X-Profile-Request: 1' is run under cProfile; the
+    response carries X-Profile-Id to fetch the result with.
+    """
+    if not PROFILING_ENABLED:
+        return
+    from flask import request, jsonify, g
+
+    def _respond(report: dict):
+        if request.args.get("format") == "folded":
+            return app.response_class(report["folded"] + "\n", mimetype="text/plain")
+        return jsonify(report), 200
+
+    @app.before_request
+    def _start_request_profile():
+        if request.headers.get(PROFILE_REQUEST_HEADER) and is_authorized(request.headers):
+            g._profile = request_profiles.start()
+            g._profile_started = time.perf_counter()
+
+    @app.after_request
+    def _finish_request_profile(response):
+        profile = g.pop("_profile", None)
+        if profile is not None:
+            seconds = time.perf_counter() - g.pop("_profile_started")
+            response.headers[PROFILE_ID_HEADER] = request_profiles.finish(profile, request.method, request.path, seconds)
+        return response
+
+    @app.teardown_request
+    def _abort_request_profile(exc):
+        profile = g.pop("_profile", None)
+        if profile is not None:
+            request_profiles.discard(profile)
+
+    @app.route('/debug/profile/sample', methods=['POST'])
+    def debug_profile_sample():
+        if not is_authorized(request.headers):
+            return jsonify({"error": "Forbidden"}), 403
+        seconds = _bounded_seconds(request.args.get("seconds"), 10.0)
+        interval = _bounded_seconds(request.args.get("interval"), PROFILE_SAMPLE_INTERVAL) or PROFILE_SAMPLE_INTERVAL
+        profiler = sample_for(seconds, interval)
+        if profiler is None:
+            return jsonify({"error": "A profile is already running"}), 409
+        return _respond(profiler.report())
+
+    @app.route('/debug/profile/allocations', methods=['POST'])
+    def debug_profile_allocations():
+        if not is_authorized(request.headers):
+            return jsonify({"error": "Forbidden"}), 403
+        seconds = _bounded_seconds(request.args.get("seconds"), 10.0)
+        limit = _bounded_limit(request.args.get("limit"), 25)
+        return _respond(allocation_profile(seconds, limit))
+
+    @app.route('/debug/profile/requests', methods=['GET'])
+    def debug_profile_requests():
+        if not is_authorized(request.headers):
+            return jsonify({"error": "Forbidden"}), 403
+        return jsonify({"profiles": request_profiles.list()}), 200
+
+    @app.route('/debug/profile/requests/<profile_id>', methods=['GET'])
+    def debug_profile_request(profile_id):
+        if not is_authorized(request.headers):
+            return jsonify({"error": "Forbidden"}), 403
+        result = request_profiles.get(profile_id)
+        if result is None:
+            return jsonify({"error": "Unknown profile id"}), 404
+        fmt = request.args.get("format")
+        if fmt == "prof":
+            return app.response_class(base64.b64decode(result["prof_b64"]), mimetype="application/octet-stream")
+        if fmt == "folded":
+            return app.response_class(result["folded"] + "\n", mimetype="text/plain")
+        return app.response_class(result["stats"], mimetype="text/plain")
+
+    print("🔬 Profiling endpoints enabled under /debug/profile (internal token required).")
+
+
+# --- FastAPI integration ---
+async def run_in_threadpool_profiled(func, *args, **kwargs):
+    """
+    starlette's run_in_threadpool(), for request handlers of apps using
+    register_fastapi_profiling: when the request is being profiled, `func`
+    is profiled on its worker thread as well and merged into the result.
+    """
+    from starlette.concurrency import run_in_threadpool
+    worker_profiles = _worker_profiles.get()
+    if worker_profiles is None:
+        return await run_in_threadpool(func, *args, **kwargs)
+
+    def profiled():
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.disable()
+            worker_profiles.append(profile)
+    return await run_in_threadpool(profiled)
+
+
+def register_fastapi_profiling(app):
+    """
+    The same surface as register_flask_profiling, for FastAPI apps. The
+    blocking sampling and allocation windows run in the thread pool, so
+    the event loop keeps serving the traffic being profiled.
+    """
+    if not PROFILING_ENABLED:
+        return
+    from fastapi import Request
+    from fastapi.responses import JSONResponse, PlainTextResponse, Response
+    from starlette.concurrency import run_in_threadpool
+
+    def _respond(request: Request, report: dict):
+        if request.query_params.get("format") == "folded":
+            return PlainTextResponse(report["folded"] + "\n")
+        return JSONResponse(report)
+
+    @app.middleware("http")
+    async def _request_profile(request: Request, call_next):
+        if not (request.headers.get(PROFILE_REQUEST_HEADER) and is_authorized(request.headers)):
+            return await call_next(request)
+        profile = request_profiles.start()
+        if profile is None:
+            return await call_next(request)
+        started = time.perf_counter()
+        worker_profiles = [] if _PER_THREAD_CPROFILE else None
+        token = _worker_profiles.set(worker_profiles)
+        try:
+            response = await call_next(request)
+        finally:
+            _worker_profiles.reset(token)
+            # Runs on the event loop, so time spent serving other requests
+            # while this one awaited is included.
+            profile_id = request_profiles.finish(profile, request.method, request.url.path,
+                                                 time.perf_counter() - started, worker_profiles)
+        response.headers[PROFILE_ID_HEADER] = profile_id
+        return response
+
+    @app.post("/debug/profile/sample")
+    async def debug_profile_sample(request: Request):
+        if not is_authorized(request.headers):
+            return JSONResponse({"error": "Forbidden"}, status_code=403)
+        seconds = _bounded_seconds(request.query_params.get("seconds"), 10.0)
+        interval = _bounded_seconds(request.query_params.get("interval"), PROFILE_SAMPLE_INTERVAL) or PROFILE_SAMPLE_INTERVAL
+        profiler = await run_in_threadpool(sample_for, seconds, interval)
+        if profiler is None:
+            return JSONResponse({"error": "A profile is already running"}, status_code=409)
+        return _respond(request, profiler.report())
+
+    @app.post("/debug/profile/allocations")
+    async def debug_profile_allocations(request: Request):
+        if not is_authorized(request.headers):
+            return JSONResponse({"error": "Forbidden"}, status_code=403)
+        seconds = _bounded_seconds(request.query_params.get("seconds"), 10.0)
+        limit = _bounded_limit(request.query_params.get("limit"), 25)
+        return _respond(request, await run_in_threadpool(allocation_profile, seconds, limit))
+
+    @app.get("/debug/profile/requests")
+    async def debug_profile_requests(request: Request):
+        if not is_authorized(request.headers):
+            return JSONResponse({"error": "Forbidden"}, status_code=403)
+        return JSONResponse({"profiles": request_profiles.list()})
+
+    @app.get("/debug/profile/requests/{profile_id}")
+    async def debug_profile_request(profile_id: str, request: Request):
+        if not is_authorized(request.headers):
+            return JSONResponse({"error": "Forbidden"}, status_code=403)
+        result = request_profiles.get(profile_id)
+        if result is None:
+            return JSONResponse({"error": "Unknown profile id"}, status_code=404)
+        fmt = request.query_params.get("format")
+        if fmt == "prof":
+            return Response(base64.b64decode(result["prof_b64"]), media_type="application/octet-stream")
+        if fmt == "folded":
+            return PlainTextResponse(result["folded"] + "\n")
+        return PlainTextResponse(result["stats"])
+
+    print("🔬 Profiling endpoints enabled under /debug/profile (internal token required).")
@@ -0,0 +1,210 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+
+from shared.storage.compression import compress_text, decompress_text
+
+# --- Configuration ---
+QUEUE_PATH = os.getenv(
+    "PIPELINE_QUEUE_PATH",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '.cache', 'pipeline_queue.sqlite3'))
+)
+# Ordered pipeline stages. An item's `stage` is the last one it completed.
+STAGES = ["fetched", "scraped", "cleaned", "summarized", "embedded", "stored"]
+DEFAULT_LEASE_SECONDS = float(os.getenv("PIPELINE_LEASE_SECONDS", 600))
+MAX_ATTEMPTS = int(os.getenv("PIPELINE_MAX_ATTEMPTS", 3))
+# A failed item waits this long before its next attempt, doubling per attempt
+RETRY_BASE_SECONDS = float(os.getenv("PIPELINE_RETRY_BASE_SECONDS", 60))
+
+# Item statuses
+READY = "ready"        # waiting for the stage after `stage`
+CLAIMED = "claimed"    # a worker holds a lease on it
+DONE = "done"          # completed the final stage
+SKIPPED = "skipped"    # dropped on purpose (e.g. content too short)
+FAILED = "failed"      # gave up after MAX_ATTEMPTS
+
+
+def _stub(payload: dict) -> dict:
+    """What a finished item keeps of its payload: enough to identify the article, none of the bodies."""
+    article = payload.get("article") or {}
+    return {"article": {"url": article.get("url"), "title": article.get("title")}}
+
+
+class WorkQueue:
+    """
+    Durable, SQLite-backed work queue for the batch pipeline.
+
+    Holds one row per article with the last stage it completed, its status
+    and a compressed JSON payload carrying the article plus every stage's
+    output. A stage's result is committed before the item moves on, so after
+    a crash or kill the next run resumes each article exactly where it
+    stopped and never repeats a paid scrape or LLM call that already
+    finished.
+
+    Workers claim items with a time-limited lease; leases that expire (a
+    worker died) are picked up again by the next claim.
+
+    Items that finished or were skipped keep their row, so the article is
+    never queued again, but only a stub of their payload.
+    """
+
+    def __init__(self, path: str = QUEUE_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        # isolation_level=None: we manage transactions explicitly with BEGIN IMMEDIATE.
+        self.conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS work_items (
+                doc_id TEXT PRIMARY KEY,
+                category TEXT,
+                stage TEXT NOT NULL,
+                status TEXT NOT NULL,
+                payload BLOB NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                claimed_by TEXT,
+                lease_until REAL,
+                retry_at REAL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(work_items)")}
+        if "retry_at" not in columns:
+            self.conn.execute("ALTER TABLE work_items ADD COLUMN retry_at REAL")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_work_items_stage ON work_items (stage, status)")
+        # Finished rows from before payloads were stubbed still carry their bodies
+        self.conn.execute(
+            "UPDATE work_items SET payload = ? WHERE status IN (?, ?) AND length(payload) > 1024",
+            (compress_text(json.dumps({})), DONE, SKIPPED)
+        )
+        self._lock = threading.Lock()
+
+    # --- Enqueue ---
+    def enqueue(self, doc_id: str, category: str, article: dict) -> bool:
+        """Adds a freshly fetched article. Returns False if it is already queued (in any state)."""
+        now = time.time()
+        with self._lock:
+            cursor = self.conn.execute(
+                "INSERT OR IGNORE INTO work_items (doc_id, category, stage, status, payload, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (doc_id, category, STAGES[0], READY, compress_text(json.dumps({"article": article}, default=str)), now, now)
+            )
+        return cursor.rowcount == 1
+
+    def contains(self, doc_id: str) -> bool:
+        with self._lock:
+            return self.conn.execute("SELECT 1 FROM work_items WHERE doc_id = ?", (doc_id,)).fetchone() is not None
+
+    # --- Claim ---
+    def claim(self, completed_stage: str, worker_id: str, limit: int = 10,
+              lease_seconds: float = DEFAULT_LEASE_SECONDS) -> list[dict]:
+        """
+        Leases up to `limit` items that finished `completed_stage` and are
+        waiting for the next one (failed ones once their retry time has
+        come), including items whose previous lease expired.
+        Returns dicts with doc_id, category, attempts and the decoded payload.
+        """
+        now = time.time()
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self.conn.execute(
+                    "SELECT doc_id, category, attempts, payload FROM work_items "
+                    "WHERE stage = ? AND ((status = ? AND (retry_at IS NULL OR retry_at <= ?)) "
+                    "OR (status = ? AND lease_until < ?)) "
+                    "ORDER BY created_at LIMIT ?",
+                    (completed_stage, READY, now, CLAIMED, now, limit)
+                ).fetchall()
+                self.conn.executemany(
+                    "UPDATE work_items SET status = ?, claimed_by = ?, lease_until = ?, updated_at = ? WHERE doc_id = ?",
+                    [(CLAIMED, worker_id, now + lease_seconds, now, row[0]) for row in rows]
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return [
+            {"doc_id": doc_id, "category": category, "attempts": attempts,
+             "payload": json.loads(decompress_text(payload))}
+            for doc_id, category, attempts, payload in rows
+        ]
+
+    # --- Transitions ---
+    def advance(self, item: dict, new_stage: str, **outputs):
+        """
+        Records that `item` completed `new_stage`, merging `outputs` into its
+        payload. The item becomes ready for the next stage (or done, when
+        its payload is reduced to a stub).
+        """
+        item["payload"].update(outputs)
+        status = DONE if new_stage == STAGES[-1] else READY
+        payload = _stub(item["payload"]) if status == DONE else item["payload"]
+        with self._lock:
+            self.conn.execute(
+                "UPDATE work_items SET stage = ?, status = ?, payload = ?, attempts = 0, last_error = NULL, "
+                "claimed_by = NULL, lease_until = NULL, retry_at = NULL, updated_at = ? WHERE doc_id = ?",
+                (new_stage, status, compress_text(json.dumps(payload, default=str)), time.time(), item["doc_id"])
+            )
+
+    def fail(self, item: dict, error: str):
+        """
+        Releases `item` for another attempt after a backoff (RETRY_BASE_SECONDS,
+        doubling per attempt), or marks it failed after MAX_ATTEMPTS. Until
+        then claim() passes over it, so a stage doesn't retry it at once.
+        """
+        attempts = item["attempts"] + 1
+        status = FAILED if attempts >= MAX_ATTEMPTS else READY
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                "UPDATE work_items SET status = ?, attempts = ?, last_error = ?, claimed_by = NULL, "
+                "lease_until = NULL, retry_at = ?, updated_at = ? WHERE doc_id = ?",
+                (status, attempts, str(error)[:500], now + RETRY_BASE_SECONDS * 2 ** (attempts - 1), now,
+                 item["doc_id"])
+            )
+
+    def skip(self, item: dict, reason: str):
+        """Drops `item` from the pipeline on purpose."""
+        with self._lock:
+            self.conn.execute(
+                "UPDATE work_items SET status = ?, payload = ?, last_error = ?, claimed_by = NULL, "
+                "lease_until = NULL, updated_at = ? WHERE doc_id = ?",
+                (SKIPPED, compress_text(json.dumps(_stub(item["payload"]), default=str)), reason, time.time(),
+                 item["doc_id"])
+            )
+
+    def release_claims(self, claimed_by: str | None = None) -> int:
+        """
+        Returns claimed items to ready, either all of them or only those held
+        by `claimed_by`. Only safe for workers known to be gone.
+        """
+        query = "UPDATE work_items SET status = ?, claimed_by = NULL, lease_until = NULL WHERE status = ?"
+        params = [READY, CLAIMED]
+        if claimed_by is not None:
+            query += " AND claimed_by = ?"
+            params.append(claimed_by)
+        with self._lock:
+            cursor = self.conn.execute(query, params)
+        return cursor.rowcount
+
+    def claimants(self) -> list[str]:
+        """Worker IDs currently holding claims."""
+        with self._lock:
+            return [row[0] for row in self.conn.execute(
+                "SELECT DISTINCT claimed_by FROM work_items WHERE status = ?", (CLAIMED,)
+            )]
+
+    # --- Reporting ---
+    def counts(self) -> dict:
+        """Returns {stage: {status: count}}."""
+        counts = {}
+        with self._lock:
+            for stage, status, count in self.conn.execute(
+                "SELECT stage, status, COUNT(*) FROM work_items GROUP BY stage, status"
+            ):
+                counts.setdefault(stage, {})[status] = count
+        return counts
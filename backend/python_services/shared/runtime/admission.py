@@ -0,0 +1,328 @@
+import os
+import math
+import time
+import asyncio
+import threading
+from collections import deque
+from contextlib import contextmanager, asynccontextmanager
+from functools import wraps
+
+from shared.observability.metrics import metrics
+
+# --- Configuration ---
+# Request headers understood by every admission-controlled endpoint
+PRIORITY_HEADER = "X-Priority"          # 'interactive' (default) or 'batch'
+DEADLINE_HEADER = "X-Request-Deadline"  # absolute Unix time in seconds, e.g. 1760000000.25
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+LANES = (INTERACTIVE, BATCH)  # in dispatch order
+
+WAIT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class AdmissionRejected(Exception):
+    """
+    Raised when a request is not admitted. `status` is 429 when the queue
+    is full, 503 when the request was shed or cannot finish before its
+    deadline; `retry_after` is the suggested Retry-After in seconds.
+    """
+
+    def __init__(self, status: int, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+    def body(self) -> dict:
+        return {"error": "Service is overloaded, retry later" if self.status == 429 else "Request dropped",
+                "reason": self.reason, "retry_after": self.retry_after}
+
+    def headers(self) -> dict:
+        return {"Retry-After": str(self.retry_after)}
+
+
+class _Waiter:
+    """A queued request; woken from release() on a worker thread or, for asyncio callers, on their loop."""
+
+    __slots__ = ("lane", "deadline", "outcome", "_event", "_loop", "_future")
+
+    def __init__(self, lane: str, deadline: float | None, loop=None):
+        self.lane = lane
+        self.deadline = deadline
+        self.outcome = None  # 'admitted' or a rejection reason
+        self._loop = loop
+        self._event = None if loop else threading.Event()
+        self._future = loop.create_future() if loop else None
+
+    def wake(self, outcome: str):
+        self.outcome = outcome
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._resolve)
+        else:
+            self._event.set()
+
+    def _resolve(self):
+        if not self._future.done():
+            self._future.set_result(None)
+
+
+class _AsyncSlot:
+    """
+    The inference slot of an admit_async() block. Work that keeps running
+    when the request is cancelled (a worker thread) is passed through
+    shield(), so the slot is held until that work has really finished.
+    """
+
+    __slots__ = ("work",)
+
+    def __init__(self):
+        self.work = None
+
+    async def shield(self, awaitable):
+        self.work = asyncio.ensure_future(awaitable)
+        return await asyncio.shield(self.work)
+
+
+class AdmissionController:
+    """
+    Bounded admission in front of a CPU-bound model.
+
+    At most `max_in_flight` requests run inference at once; up to
+    `max_queue` more wait, FIFO within a lane, and interactive requests
+    are always dispatched before batch ones. Batch requests may hold at
+    most `max_batch_queue` of the queue slots, and an interactive request
+    arriving at a full queue takes the slot of the newest waiting batch
+    request, which is shed. Anything beyond that is rejected at once (429)
+    instead of piling up behind the model, so the latency of admitted
+    requests stays bounded by roughly (max_queue / max_in_flight + 1)
+    service times.
+
+    Deadlines (the X-Request-Deadline header) drop work that is already
+    too late: a request is rejected on arrival when its deadline has
+    passed or the estimated queue wait would overrun it, leaves the queue
+    when it expires, and is dropped before inference if it expired just as
+    it was admitted (all 503).
+
+    Keep max_in_flight + max_queue below the server's worker thread count,
+    so rejections are never stuck behind the server's own accept queue.
+    """
+
+    def __init__(self, name: str, max_in_flight: int = 2, max_queue: int = 4, max_batch_queue: int | None = None,
+                 max_queue_wait: float = 10.0):
+        """
+        Args:
+            name (str): Label for metrics (e.g. 'embed').
+            max_in_flight (int): Concurrent inferences.
+            max_queue (int): Requests allowed to wait, across lanes.
+            max_batch_queue (int): Of those, how many may be batch (default half).
+            max_queue_wait (float): Longest a request waits without a deadline.
+        """
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.max_batch_queue = max_queue // 2 if max_batch_queue is None else max_batch_queue
+        self.max_queue_wait = max_queue_wait
+        self.in_flight = 0
+        self.lanes = {lane: deque() for lane in LANES}
+        self.service_seconds = None  # moving average of the inference time
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, name: str, prefix: str, max_in_flight: int, max_queue: int) -> "AdmissionController":
+        """Reads <prefix>_MAX_IN_FLIGHT, _MAX_QUEUE, _MAX_BATCH_QUEUE and _MAX_QUEUE_WAIT_SECONDS."""
+        batch_queue = os.getenv(f"{prefix}_MAX_BATCH_QUEUE")
+        return cls(
+            name,
+            max_in_flight=int(os.getenv(f"{prefix}_MAX_IN_FLIGHT", max_in_flight)),
+            max_queue=int(os.getenv(f"{prefix}_MAX_QUEUE", max_queue)),
+            max_batch_queue=int(batch_queue) if batch_queue else None,
+            max_queue_wait=float(os.getenv(f"{prefix}_MAX_QUEUE_WAIT_SECONDS", 10)),
+        )
+
+    # --- Bookkeeping (call with the lock held) ---
+    def _queued(self) -> int:
+        return sum(len(waiters) for waiters in self.lanes.values())
+
+    def _estimated_wait(self, ahead: int) -> float:
+        """Seconds until a request with `ahead` requests before it starts inference."""
+        if self.service_seconds is None or (ahead == 0 and self.in_flight < self.max_in_flight):
+            return 0.0
+        # The running requests are half done on average
+        return (ahead / self.max_in_flight + 0.5) * self.service_seconds
+
+    def _retry_after(self) -> int:
+        return max(1, math.ceil(self._estimated_wait(self._queued())))
+
+    def _reject(self, status: int, reason: str, lane: str) -> AdmissionRejected:
+        metrics.inc("admission_total", service=self.name, lane=lane, outcome=reason)
+        return AdmissionRejected(status, reason, self._retry_after())
+
+    def _enter(self, lane: str, deadline: float | None, loop=None) -> _Waiter | None:
+        """Admits at once (returns None), queues (returns the waiter) or raises AdmissionRejected."""
+        now = time.monotonic()
+        with self._lock:
+            if deadline is not None and deadline <= now:
+                raise self._reject(503, "deadline_expired", lane)
+            ahead = len(self.lanes[INTERACTIVE]) + (len(self.lanes[BATCH]) if lane == BATCH else 0)
+            if ahead == 0 and self.in_flight < self.max_in_flight:
+                self.in_flight += 1
+                return None
+
+            if lane == BATCH and len(self.lanes[BATCH]) >= self.max_batch_queue:
+                raise self._reject(429, "queue_full", lane)
+            if self._queued() >= self.max_queue and (lane == BATCH or not self.lanes[BATCH]):
+                raise self._reject(429, "queue_full", lane)
+            if deadline is not None and now + self._estimated_wait(ahead) + (self.service_seconds or 0) > deadline:
+                raise self._reject(503, "deadline_unreachable", lane)
+            if self._queued() >= self.max_queue:
+                # Interactive request at a full queue: the newest batch request gives up its slot
+                self.lanes[BATCH].pop().wake("shed")
+            waiter = _Waiter(lane, deadline, loop)
+            self.lanes[lane].append(waiter)
+            return waiter
+
+    def _leave_queue(self, waiter: _Waiter):
+        """Called when a waiter timed out or was cancelled; it may have been admitted or shed meanwhile."""
+        with self._lock:
+            if waiter.outcome is None:
+                self.lanes[waiter.lane].remove(waiter)
+                waiter.outcome = "deadline_expired" if waiter.deadline is not None and \
+                    time.monotonic() >= waiter.deadline else "queue_timeout"
+
+    def _wait_timeout(self, waiter: _Waiter) -> float:
+        timeout = self.max_queue_wait
+        if waiter.deadline is not None:
+            timeout = min(timeout, waiter.deadline - time.monotonic())
+        return max(timeout, 0.0)
+
+    def _started(self, waiter: _Waiter | None, lane: str, deadline: float | None, waited: float):
+        """Checks the outcome of a wait; raises if the request is not to run."""
+        if waiter is not None and waiter.outcome != "admitted":
+            raise self._reject(503, waiter.outcome, lane)
+        if deadline is not None and time.monotonic() >= deadline:
+            # Admitted, but too late for the caller to use the result
+            self._release(None)
+            raise self._reject(503, "deadline_expired", lane)
+        metrics.inc("admission_total", service=self.name, lane=lane, outcome="admitted")
+        metrics.observe("admission_wait_seconds", waited, buckets=WAIT_BUCKETS, service=self.name, lane=lane)
+
+    def _release(self, service_seconds: float | None):
+        with self._lock:
+            self.in_flight -= 1
+            if service_seconds is not None:
+                previous = self.service_seconds
+                self.service_seconds = service_seconds if previous is None else 0.8 * previous + 0.2 * service_seconds
+            while self.in_flight < self.max_in_flight:
+                lane = next((lane for lane in LANES if self.lanes[lane]), None)
+                if lane is None:
+                    break
+                self.in_flight += 1
+                self.lanes[lane].popleft().wake("admitted")
+
+    # --- Public API ---
+    @contextmanager
+    def admit(self, lane: str = INTERACTIVE, deadline: float | None = None):
+        """
+        Runs the block once admitted, for threaded servers (Flask).
+
+        Args:
+            lane (str): 'interactive' or 'batch'.
+            deadline (float): time.monotonic() deadline, see parse_deadline().
+
+        Raises:
+            AdmissionRejected: when the request is not admitted.
+        """
+        started = time.monotonic()
+        waiter = self._enter(lane, deadline)
+        if waiter is not None and not waiter._event.wait(self._wait_timeout(waiter)):
+            self._leave_queue(waiter)
+        self._started(waiter, lane, deadline, time.monotonic() - started)
+        admitted = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(time.monotonic() - admitted)
+
+    @asynccontextmanager
+    async def admit_async(self, lane: str = INTERACTIVE, deadline: float | None = None):
+        """
+        The same as admit() for asyncio servers (FastAPI); waiting does not
+        block the event loop. Run the inference through the yielded slot's
+        shield(), e.g. `await slot.shield(run_in_threadpool(model, text))`:
+        a thread can't be cancelled, so if the client goes away meanwhile
+        the slot is only released once the thread is done.
+        """
+        started = time.monotonic()
+        waiter = self._enter(lane, deadline, loop=asyncio.get_running_loop())
+        if waiter is not None:
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter._future), self._wait_timeout(waiter))
+            except asyncio.TimeoutError:
+                self._leave_queue(waiter)
+            except asyncio.CancelledError:
+                # The client went away: give up the queue slot, or the inference slot if just admitted
+                self._leave_queue(waiter)
+                if waiter.outcome == "admitted":
+                    self._release(None)
+                raise
+        self._started(waiter, lane, deadline, time.monotonic() - started)
+        admitted = time.monotonic()
+        slot = _AsyncSlot()
+        try:
+            yield slot
+        finally:
+            if slot.work is not None and not slot.work.done():
+                def release_when_done(work):
+                    if not work.cancelled():
+                        work.exception()  # retrieved, so asyncio doesn't log it as unhandled
+                    self._release(time.monotonic() - admitted)
+                slot.work.add_done_callback(release_when_done)
+            else:
+                self._release(time.monotonic() - admitted)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"in_flight": self.in_flight, "queued": {lane: len(w) for lane, w in self.lanes.items()},
+                    "service_seconds": round(self.service_seconds or 0.0, 4)}
+
+
+# --- Request headers ---
+def parse_lane(headers) -> str:
+    """The lane named by X-Priority; anything but 'batch' is interactive."""
+    return BATCH if (headers.get(PRIORITY_HEADER) or "").strip().lower() == BATCH else INTERACTIVE
+
+
+def parse_deadline(headers) -> float | None:
+    """
+    X-Request-Deadline (absolute Unix seconds) as a time.monotonic()
+    deadline, or None when absent or malformed. Callers forward the same
+    header to the services they call, so the deadline spans the whole chain.
+    """
+    value = headers.get(DEADLINE_HEADER)
+    if not value:
+        return None
+    try:
+        return time.monotonic() + (float(value) - time.time())
+    except ValueError:
+        return None
+
+
+# --- Flask integration ---
+def admission_controlled(controller: AdmissionController):
+    """
+    Flask view decorator: admits the request through `controller` (lane
+    and deadline from the headers) or answers 429/503 with Retry-After.
+    Place it below @require_auth, so unauthenticated requests never queue.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            from flask import request, jsonify
+            try:
+                with controller.admit(parse_lane(request.headers), parse_deadline(request.headers)):
+                    return view(*args, **kwargs)
+            except AdmissionRejected as e:
+                return jsonify(e.body()), e.status, e.headers()
+        return wrapper
+    return decorator
@@ -0,0 +1,264 @@
+import os
+import re
+import math
+import sqlite3
+import threading
+from collections import Counter
+
+# --- Configuration ---
+KEYWORD_DF_PATH = os.getenv(
+    "KEYWORD_DF_PATH",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '.cache', 'keyword_df.sqlite3'))
+)
+# Terms (stems) kept per article, and the cap on the stored array
+KEYWORDS_MAX_TERMS = int(os.getenv("KEYWORDS_MAX_TERMS", 12))
+KEYWORDS_MAX = int(os.getenv("KEYWORDS_MAX", 20))
+# Surface forms stored per term, so "election" and "elections" both match
+KEYWORDS_FORMS_PER_TERM = int(os.getenv("KEYWORDS_FORMS_PER_TERM", 2))
+# Below this many documents in the DF table, IDF is not trusted yet and terms
+# are ranked by (weighted) frequency alone.
+KEYWORDS_MIN_CORPUS = int(os.getenv("KEYWORDS_MIN_CORPUS", 50))
+
+# Field weights: a word in the title says more than one deep in the body
+TITLE_WEIGHT = 3.0
+DESCRIPTION_WEIGHT = 2.0
+BODY_WEIGHT = 1.0
+
+# The query side (backend/functions/search.js) drops these, so they are never searchable
+QUERY_STOP_WORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'he',
+    'in', 'is', 'it', 'its', 'of', 'on', 'that', 'the', 'to', 'was', 'were', 'will', 'with'
+}
+# Common words that are searchable but never worth a keyword slot
+STOP_WORDS = QUERY_STOP_WORDS | {
+    'about', 'after', 'again', 'all', 'also', 'any', 'been', 'before', 'being', 'but', 'can', 'could',
+    'did', 'does', 'doing', 'down', 'during', 'each', 'few', 'had', 'have', 'having', 'her', 'here',
+    'hers', 'him', 'his', 'how', 'into', 'just', 'like', 'more', 'most', 'much', 'new', 'not', 'now',
+    'off', 'once', 'one', 'only', 'other', 'our', 'out', 'over', 'own', 'said', 'same', 'says', 'she',
+    'should', 'some', 'such', 'than', 'their', 'them', 'then', 'there', 'these', 'they', 'this', 'those',
+    'through', 'too', 'two', 'under', 'until', 'very', 'what', 'when', 'where', 'which', 'while', 'who',
+    'whom', 'why', 'would', 'year', 'years', 'you', 'your', 'told', 'according', 'including', 'between',
+    'because', 'may', 'might', 'must', 'get', 'got', 'make', 'made', 'many', 'first', 'last', 'still',
+}
+
+# Same normalisation as generateKeywordsFromQuery() in search.js: lower case,
+# drop everything that isn't [A-Za-z0-9_] or whitespace, split on whitespace.
+_NON_WORD = re.compile(r"[^A-Za-z0-9_\s]")
+
+# Light suffix stripping (ordered, first match wins). Only used to group
+# word forms for counting; the stored keywords are the words themselves.
+_SUFFIXES = [
+    ("ational", "ate"), ("ization", "ize"), ("iveness", "ive"), ("fulness", "ful"), ("ousness", "ous"),
+    ("ements", "e"), ("ement", "e"), ("ments", ""), ("ment", ""), ("ies", "y"), ("ied", "y"),
+    ("sses", "ss"), ("ings", ""), ("ing", ""), ("edly", ""), ("ed", ""), ("ly", ""), ("s", ""),
+]
+_KEEP_S = ("ss", "us", "is", "ous")
+
+
+def tokenize(text: str) -> list[str]:
+    """Splits text into lowercase words exactly as search queries are split."""
+    if not text:
+        return []
+    return _NON_WORD.sub("", text.lower()).split()
+
+
+def stem(word: str) -> str:
+    """Reduces a word to a crude stem ('elections' -> 'election', 'running' -> 'run')."""
+    if word.endswith("s") and word.endswith(_KEEP_S):
+        return word
+    # 'taxes' -> 'tax', 'watches' -> 'watch', but 'shares' -> 'share'
+    if word.endswith("es") and word[:-2].endswith(("s", "x", "z", "ch", "sh")) and len(word) > 4:
+        return word[:-2]
+    for suffix, replacement in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            base = word[:-len(suffix)] + replacement
+            # 'running' -> 'runn' -> 'run'
+            if suffix in ("ing", "ings", "ed", "edly") and len(base) > 3 and base[-1] == base[-2] and base[-1] not in "lsz":
+                base = base[:-1]
+            return base
+    return word
+
+
+def _is_candidate(word: str) -> bool:
+    # Over-long tokens are URLs or markup that lost its punctuation
+    return 2 < len(word) <= 30 and word not in STOP_WORDS and not word.isdigit() and not word.startswith("http")
+
+
+def analyze(title: str = "", description: str = "", body: str = "") -> tuple[Counter, dict]:
+    """
+    Weighted term frequencies of an article.
+
+    Returns:
+        tuple: (Counter of stem -> weighted count,
+                dict of stem -> Counter of the surface words seen for it)
+    """
+    weights, forms = Counter(), {}
+    for text, weight in ((title, TITLE_WEIGHT), (description, DESCRIPTION_WEIGHT), (body, BODY_WEIGHT)):
+        for word in tokenize(text):
+            if _is_candidate(word):
+                term = stem(word)
+                weights[term] += weight
+                forms.setdefault(term, Counter())[word] += 1
+    return weights, forms
+
+
+class DocumentFrequencyTable:
+    """
+    Corpus document frequencies per stem, in a small local SQLite table.
+
+    Updated incrementally as articles are ingested (each document ID is
+    counted once, however often it is re-processed), and read in one query
+    per batch of documents.
+    """
+
+    def __init__(self, path: str = KEYWORD_DF_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS terms (stem TEXT PRIMARY KEY, df INTEGER NOT NULL) WITHOUT ROWID")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS docs (doc_id TEXT PRIMARY KEY) WITHOUT ROWID")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self.conn.commit()
+        self._lock = threading.Lock()
+
+    def doc_count(self) -> int:
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'doc_count'").fetchone()
+        return row[0] if row else 0
+
+    def add_documents(self, documents: dict) -> int:
+        """
+        Counts the terms of documents not seen before.
+
+        Args:
+            documents (dict): doc_id -> iterable of the document's stems.
+
+        Returns:
+            int: How many documents were new.
+        """
+        if not documents:
+            return 0
+        with self._lock, self.conn:
+            known = set()
+            doc_ids = list(documents)
+            for start in range(0, len(doc_ids), 500):
+                chunk = doc_ids[start:start + 500]
+                known.update(row[0] for row in self.conn.execute(
+                    f"SELECT doc_id FROM docs WHERE doc_id IN ({','.join('?' * len(chunk))})", chunk))
+            new_ids = [doc_id for doc_id in doc_ids if doc_id not in known]
+            if not new_ids:
+                return 0
+
+            df = Counter()
+            for doc_id in new_ids:
+                df.update(set(documents[doc_id]))
+            self.conn.executemany("INSERT INTO docs (doc_id) VALUES (?)", ((doc_id,) for doc_id in new_ids))
+            self.conn.executemany(
+                "INSERT INTO terms (stem, df) VALUES (?, ?) ON CONFLICT(stem) DO UPDATE SET df = df + excluded.df",
+                df.items())
+            self.conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('doc_count', ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = value + excluded.value", (len(new_ids),))
+        return len(new_ids)
+
+    def lookup(self, stems) -> dict:
+        """Document frequency of each stem (missing stems are left out)."""
+        stems = list(set(stems))
+        result = {}
+        with self._lock:
+            for start in range(0, len(stems), 500):
+                chunk = stems[start:start + 500]
+                result.update(self.conn.execute(
+                    f"SELECT stem, df FROM terms WHERE stem IN ({','.join('?' * len(chunk))})", chunk))
+        return result
+
+
+class KeywordExtractor:
+    """
+    Picks each article's top terms by TF-IDF and stores them as the plain
+    lowercase words search.js matches with 'array-contains-any', so keyword
+    arrays stay short and rank what the article is actually about.
+    """
+
+    def __init__(self, df_table: DocumentFrequencyTable | None = None, max_terms: int = KEYWORDS_MAX_TERMS,
+                 max_keywords: int = KEYWORDS_MAX, forms_per_term: int = KEYWORDS_FORMS_PER_TERM):
+        self.df_table = df_table if df_table is not None else DocumentFrequencyTable()
+        self.max_terms = max_terms
+        self.max_keywords = max_keywords
+        self.forms_per_term = forms_per_term
+
+    def _select(self, weights: Counter, forms: dict, df: dict, n_docs: int) -> list[str]:
+        use_idf = n_docs >= KEYWORDS_MIN_CORPUS
+        scores = {}
+        for term, weight in weights.items():
+            tf = 1.0 + math.log(weight)
+            idf = math.log((n_docs + 1) / (df.get(term, 0) + 1)) + 1.0 if use_idf else 1.0
+            scores[term] = tf * idf
+
+        keywords = []
+        for term in sorted(scores, key=lambda t: (-scores[t], t))[:self.max_terms]:
+            for word, _ in forms[term].most_common(self.forms_per_term):
+                keywords.append(word)
+            if len(keywords) >= self.max_keywords:
+                break
+        return keywords[:self.max_keywords]
+
+    def analyze_many(self, documents: dict) -> dict:
+        """
+        Args:
+            documents (dict): doc_id -> {'title', 'description', 'body'} (any may be missing).
+
+        Returns:
+            dict: doc_id -> analyze() result.
+        """
+        return {doc_id: analyze(doc.get("title") or "", doc.get("description") or "", doc.get("body") or "")
+                for doc_id, doc in documents.items()}
+
+    def learn(self, analyzed: dict) -> int:
+        """Adds analyzed documents to the corpus frequencies. Returns how many were new."""
+        return self.df_table.add_documents({doc_id: weights.keys() for doc_id, (weights, _) in analyzed.items()})
+
+    def select_many(self, analyzed: dict) -> dict:
+        """Top keywords of every analyzed document, with one DF lookup for the whole batch."""
+        n_docs = self.df_table.doc_count()
+        df = self.df_table.lookup(term for weights, _ in analyzed.values() for term in weights)
+        return {doc_id: self._select(weights, forms, df, n_docs) for doc_id, (weights, forms) in analyzed.items()}
+
+    def extract_many(self, documents: dict, learn: bool = True) -> dict:
+        """
+        Extracts keywords for a batch of articles with one DF update and one
+        DF lookup for the whole batch.
+
+        Args:
+            documents (dict): doc_id -> {'title', 'description', 'body'} (any may be missing).
+            learn (bool): Add the batch to the corpus frequencies first.
+
+        Returns:
+            dict: doc_id -> list of keywords.
+        """
+        analyzed = self.analyze_many(documents)
+        if learn:
+            self.learn(analyzed)
+        return self.select_many(analyzed)
+
+    def extract(self, title: str = "", description: str = "", body: str = "", doc_id: str | None = None,
+                learn: bool = True) -> list[str]:
+        """Keywords for a single article (see extract_many)."""
+        documents = {doc_id or "": {"title": title, "description": description, "body": body}}
+        # Without an ID the article can't be counted exactly once, so it isn't learned from.
+        return self.extract_many(documents, learn=learn and doc_id is not None)[doc_id or ""]
+
+
+_extractor = None
+_extractor_lock = threading.Lock()
+
+
+def get_keyword_extractor() -> KeywordExtractor:
+    """Returns the process-wide extractor backed by the default DF table."""
+    global _extractor
+    if _extractor is None:
+        with _extractor_lock:
+            if _extractor is None:
+                _extractor = KeywordExtractor()
+    return _extractor
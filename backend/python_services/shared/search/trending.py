@@ -0,0 +1,309 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+
+from shared.database.vector_store import to_timestamp
+from shared.search.keywords import stem
+
+# --- Configuration ---
+TRENDING_SNAPSHOT_PATH = os.getenv(
+    "TRENDING_SNAPSHOT_PATH",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '.cache', 'trending.npz'))
+)
+# Sliding window: TRENDING_BUCKETS buckets of TRENDING_BUCKET_SECONDS each (48 x 1h).
+# The newest TRENDING_CURRENT_BUCKETS are the "current" window, the rest the baseline.
+TRENDING_BUCKET_SECONDS = int(os.getenv("TRENDING_BUCKET_SECONDS", 3600))
+TRENDING_BUCKETS = int(os.getenv("TRENDING_BUCKETS", 48))
+TRENDING_CURRENT_BUCKETS = int(os.getenv("TRENDING_CURRENT_BUCKETS", 6))
+# Count-Min Sketch per bucket: DEPTH rows of WIDTH counters
+TRENDING_SKETCH_WIDTH = int(os.getenv("TRENDING_SKETCH_WIDTH", 4096))
+TRENDING_SKETCH_DEPTH = int(os.getenv("TRENDING_SKETCH_DEPTH", 4))
+# Heavy-hitter candidates tracked per bucket (SpaceSaving)
+TRENDING_CANDIDATES = int(os.getenv("TRENDING_CANDIDATES", 256))
+# A term is bursting when its current count is at least BURST_MIN_COUNT and
+# BURST_RATIO times what its baseline rate predicts for the current window.
+TRENDING_BURST_RATIO = float(os.getenv("TRENDING_BURST_RATIO", 3.0))
+TRENDING_BURST_MIN_COUNT = int(os.getenv("TRENDING_BURST_MIN_COUNT", 3))
+# Pseudo-count added to both sides of the ratio, so a few mentions of a rare term aren't a burst
+TRENDING_BURST_PRIOR = float(os.getenv("TRENDING_BURST_PRIOR", 5.0))
+# Article IDs remembered so a re-sent article is not counted twice
+TRENDING_SEEN_IDS = int(os.getenv("TRENDING_SEEN_IDS", 20000))
+TRENDING_SNAPSHOT_SECONDS = float(os.getenv("TRENDING_SNAPSHOT_SECONDS", 60))
+
+
+class SpaceSaving:
+    """
+    Top-k heavy hitters in fixed memory (Metwally et al.'s SpaceSaving).
+
+    Keeps at most `capacity` counters; a new key replaces the smallest one
+    and inherits its count as error bound, so every key whose true count is
+    above total / capacity is guaranteed to be tracked.
+    """
+
+    def __init__(self, capacity: int = TRENDING_CANDIDATES, entries: dict | None = None):
+        self.capacity = capacity
+        self.entries = entries or {}  # key -> [count, error, label]
+
+    def add(self, key: str, label: str, count: int = 1):
+        entry = self.entries.get(key)
+        if entry is not None:
+            entry[0] += count
+        elif len(self.entries) < self.capacity:
+            self.entries[key] = [count, 0, label]
+        else:
+            smallest = min(self.entries, key=lambda k: self.entries[k][0])
+            floor = self.entries.pop(smallest)[0]
+            self.entries[key] = [floor + count, floor, label]
+
+
+class TrendingEngine:
+    """
+    Streaming trending-topics counter over article keywords.
+
+    Each time bucket of the sliding window has its own Count-Min Sketch
+    (frequency estimates for any term) and SpaceSaving summary (which terms
+    are worth looking at). Memory is fixed by the configuration, whatever
+    the number of articles or distinct terms: buckets x depth x width
+    counters plus buckets x candidates entries.
+
+    Sketches are linear, so a window's estimate for a term is the minimum
+    over rows of the summed bucket counters. Counts are per article: a term
+    (stemmed, so "election" and "elections" are one topic) counts once per
+    article that has it among its keywords.
+
+    The ranking is computed once per observation batch or bucket rotation
+    and cached, so trending() costs O(k).
+    """
+
+    def __init__(self, path: str | None = TRENDING_SNAPSHOT_PATH, bucket_seconds: int = TRENDING_BUCKET_SECONDS,
+                 buckets: int = TRENDING_BUCKETS, current_buckets: int = TRENDING_CURRENT_BUCKETS,
+                 width: int = TRENDING_SKETCH_WIDTH, depth: int = TRENDING_SKETCH_DEPTH,
+                 candidates: int = TRENDING_CANDIDATES):
+        if not 0 < current_buckets < buckets:
+            raise ValueError("current_buckets must be between 1 and buckets - 1")
+        self.path = path
+        self.bucket_seconds = bucket_seconds
+        self.buckets = buckets
+        self.current_buckets = current_buckets
+        self.width = width
+        self.depth = depth
+        self.candidates = candidates
+
+        self.counts = np.zeros((buckets, depth, width), dtype=np.uint32)
+        # Absolute bucket number (ts // bucket_seconds) held by each ring slot, -1 when empty
+        self.bucket_ids = np.full(buckets, -1, dtype=np.int64)
+        self.heavy = [SpaceSaving(candidates) for _ in range(buckets)]
+        self.first_bucket = None  # first bucket ever observed; older baseline buckets are unknown, not quiet
+        self.seen = OrderedDict()
+        self.observed = 0
+
+        self._ranking = None  # cached (bucket_id, ranked, bursting)
+        self._last_saved = 0.0
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            self.load()
+
+    # --- Hashing ---
+    def _indexes(self, key: str) -> np.ndarray:
+        """Counter column of `key` in each sketch row (stable across processes, unlike hash())."""
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return np.array([(h1 + row * h2) % self.width for row in range(self.depth)], dtype=np.int64)
+
+    def _slot(self, bucket_id: int, current_id: int) -> int | None:
+        """Ring slot for bucket_id, clearing it if it still holds an expired bucket. None if too old."""
+        if bucket_id <= current_id - self.buckets:
+            return None
+        slot = bucket_id % self.buckets
+        if self.bucket_ids[slot] != bucket_id:
+            if self.bucket_ids[slot] > bucket_id:
+                return None
+            self.counts[slot] = 0
+            self.heavy[slot] = SpaceSaving(self.candidates)
+            self.bucket_ids[slot] = bucket_id
+        return slot
+
+    # --- Ingestion ---
+    def observe(self, articles: dict, now: float | None = None) -> int:
+        """
+        Counts the keywords of newly stored articles.
+
+        Args:
+            articles (dict): doc_id -> {'keywords': [...], 'publishedAt': ...}.
+                Articles are placed in the bucket of their publishedAt (or
+                `now` when it is missing or in the future); articles older
+                than the window and IDs seen before are ignored.
+
+        Returns:
+            int: How many articles were counted.
+        """
+        now = time.time() if now is None else now
+        current_id = int(now // self.bucket_seconds)
+        counted = 0
+        with self._lock:
+            for doc_id, article in articles.items():
+                if doc_id in self.seen:
+                    continue
+                self.seen[doc_id] = True
+                if len(self.seen) > TRENDING_SEEN_IDS:
+                    self.seen.popitem(last=False)
+
+                published = to_timestamp(article.get("publishedAt"))
+                bucket_id = int(min(published or now, now) // self.bucket_seconds)
+                slot = self._slot(bucket_id, current_id)
+                if slot is None:
+                    continue
+
+                terms = {}
+                for word in article.get("keywords") or []:
+                    terms.setdefault(stem(word), word)
+                rows = np.arange(self.depth)
+                for term, label in terms.items():
+                    self.counts[slot, rows, self._indexes(term)] += 1
+                    self.heavy[slot].add(term, label)
+                counted += 1
+                self.observed += 1
+                if self.first_bucket is None or bucket_id < self.first_bucket:
+                    self.first_bucket = bucket_id
+
+            if counted:
+                self._ranking = None
+        if counted and self.path and now - self._last_saved >= TRENDING_SNAPSHOT_SECONDS:
+            self.save()
+        return counted
+
+    # --- Queries ---
+    def _window_slots(self, current_id: int) -> tuple[list[int], list[int], int]:
+        """(current window slots, baseline slots, baseline buckets known) holding live buckets."""
+        current, baseline, known = [], [], 0
+        for offset in range(self.buckets):
+            bucket_id = current_id - offset
+            slot = bucket_id % self.buckets
+            is_current = offset < self.current_buckets
+            if not is_current and self.first_bucket is not None and bucket_id >= self.first_bucket:
+                known += 1
+            if self.bucket_ids[slot] == bucket_id:
+                (current if is_current else baseline).append(slot)
+        return current, baseline, known
+
+    def _rank(self, current_id: int) -> list[dict]:
+        current, baseline, known = self._window_slots(current_id)
+        candidates = {}
+        for slot in current:
+            for term, (_, _, label) in self.heavy[slot].entries.items():
+                candidates.setdefault(term, label)
+        if not candidates:
+            return []
+
+        terms = list(candidates)
+        columns = np.stack([self._indexes(term) for term in terms])  # (terms, depth)
+        rows = np.arange(self.depth)
+
+        def estimate(slots):
+            if not slots:
+                return np.zeros(len(terms), dtype=np.int64)
+            window = self.counts[slots].sum(axis=0, dtype=np.int64)  # summed sketch (depth, width)
+            return window[rows, columns].min(axis=1)
+
+        current_counts, baseline_counts = estimate(current), estimate(baseline)
+        ranked = []
+        for term, count, base in zip(terms, current_counts.tolist(), baseline_counts.tolist()):
+            if count <= 0:
+                continue
+            item = {"term": candidates[term], "count": count, "baseline": base}
+            if known:
+                # What the baseline rate predicts for a window as long as the current one
+                expected = base * self.current_buckets / known
+                item["burst_ratio"] = round((count + TRENDING_BURST_PRIOR) / (expected + TRENDING_BURST_PRIOR), 2)
+                item["bursting"] = count >= TRENDING_BURST_MIN_COUNT and item["burst_ratio"] >= TRENDING_BURST_RATIO
+            else:
+                item["burst_ratio"], item["bursting"] = None, False
+            ranked.append(item)
+        ranked.sort(key=lambda item: (-item["count"], item["term"]))
+        return ranked
+
+    def trending(self, k: int = 10, bursting_only: bool = False, now: float | None = None) -> list[dict]:
+        """
+        The k most frequent terms of the current window, each with its
+        baseline count, burst ratio and whether it is bursting. With
+        `bursting_only`, only bursting terms, strongest burst first.
+        """
+        current_id = int((time.time() if now is None else now) // self.bucket_seconds)
+        with self._lock:
+            if self._ranking is None or self._ranking[0] != current_id:
+                ranked = self._rank(current_id)
+                bursts = sorted((item for item in ranked if item["bursting"]),
+                                key=lambda item: (-item["burst_ratio"], -item["count"]))
+                self._ranking = (current_id, ranked, bursts)
+            _, ranked, bursts = self._ranking
+        return (bursts if bursting_only else ranked)[:k]
+
+    def stats(self) -> dict:
+        return {
+            "articles_observed": self.observed,
+            "window_hours": round(self.buckets * self.bucket_seconds / 3600, 2),
+            "current_window_hours": round(self.current_buckets * self.bucket_seconds / 3600, 2),
+            "memory_bytes": int(self.counts.nbytes + self.bucket_ids.nbytes),
+            "live_buckets": int((self.bucket_ids >= 0).sum()),
+        }
+
+    # --- Snapshots ---
+    def _shape(self) -> dict:
+        return {"bucket_seconds": self.bucket_seconds, "buckets": self.buckets,
+                "width": self.width, "depth": self.depth}
+
+    def save(self):
+        """Writes the state to `path` atomically (temp file + rename)."""
+        with self._lock:
+            meta = {
+                "shape": self._shape(),
+                "heavy": [ss.entries for ss in self.heavy],
+                "first_bucket": self.first_bucket,
+                "seen": list(self.seen),
+                "observed": self.observed,
+            }
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + ".tmp.npz"
+            np.savez_compressed(tmp_path, counts=self.counts, bucket_ids=self.bucket_ids, meta=np.array(json.dumps(meta)))
+            os.replace(tmp_path, self.path)
+            self._last_saved = time.time()
+
+    def load(self):
+        """Restores a snapshot written by save(). Snapshots taken with a different configuration are ignored."""
+        try:
+            with np.load(self.path, allow_pickle=False) as snapshot:
+                meta = json.loads(str(snapshot["meta"]))
+                if meta["shape"] != self._shape():
+                    print(f"⚠️ Trending snapshot at {self.path} has a different configuration; starting empty.")
+                    return
+                counts, bucket_ids = snapshot["counts"], snapshot["bucket_ids"]
+        except Exception as e:
+            print(f"⚠️ Could not load trending snapshot ({e}); starting empty.")
+            return
+        with self._lock:
+            self.counts, self.bucket_ids = counts, bucket_ids
+            self.heavy = [SpaceSaving(self.candidates, entries) for entries in meta["heavy"]]
+            self.first_bucket = meta["first_bucket"]
+            self.seen = OrderedDict.fromkeys(meta["seen"], True)
+            self.observed = meta["observed"]
+            self._ranking = None
+        print(f"Loaded trending snapshot ({self.observed} articles observed).")
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_trending_engine() -> TrendingEngine:
+    """Returns the process-wide engine, restored from the local snapshot."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = TrendingEngine()
+    return _engine
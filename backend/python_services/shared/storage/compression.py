@@ -0,0 +1,36 @@
+import zlib
+
+# zstandard is optional: blobs fall back to zlib when it is missing. Every
+# blob starts with a one-byte codec tag so either kind can always be read back.
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+    print("Warning: 'zstandard' is not installed. Falling back to zlib compression.")
+
+CODEC_ZLIB = b"z"
+CODEC_ZSTD = b"s"
+ZSTD_LEVEL = 10
+
+_compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL) if zstandard else None
+_decompressor = zstandard.ZstdDecompressor() if zstandard else None
+
+
+def compress_text(text: str) -> bytes:
+    """Compresses UTF-8 text with zstd (or zlib), prefixed with its codec tag."""
+    raw = text.encode("utf-8")
+    if _compressor:
+        return CODEC_ZSTD + _compressor.compress(raw)
+    return CODEC_ZLIB + zlib.compress(raw, 9)
+
+
+def decompress_text(blob: bytes) -> str:
+    """Reverses compress_text."""
+    codec, payload = blob[:1], blob[1:]
+    if codec == CODEC_ZSTD:
+        if not _decompressor:
+            raise RuntimeError("Blob is zstd-compressed but 'zstandard' is not installed.")
+        return _decompressor.decompress(payload).decode("utf-8")
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(payload).decode("utf-8")
+    raise ValueError(f"Unknown compression codec tag {codec!r}.")
@@ -0,0 +1,221 @@
+import os
+import hashlib
+import tempfile
+import threading
+
+from shared.storage.compression import compress_text, decompress_text
+
+# --- CONFIGURATION ---
+# Where article bodies live:
+#   'local' -> compressed files under CONTENT_STORE_PATH (default). Only the
+#              machine that wrote them can read them, and data_fetcher, the
+#              summarizer and clean_content run as separate jobs, so the
+#              pipelines keep bodies inline in Firestore and write no blobs
+#              (documents only shrink with 'gcs'). Used by the benchmarks and
+#              by migrate_article_bodies.py --allow-local-store.
+#   'gcs'   -> objects in the Cloud Storage bucket CONTENT_STORE_BUCKET, shared
+#              by every service; only then are inline bodies dropped. Needs
+#              google-cloud-storage, and zstandard wherever bodies are read.
+CONTENT_STORE_BACKEND = os.getenv("CONTENT_STORE_BACKEND", "local").lower()
+CONTENT_STORE_PATH = os.getenv(
+    "CONTENT_STORE_PATH",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', 'content_store'))
+)
+CONTENT_STORE_BUCKET = os.getenv("CONTENT_STORE_BUCKET")
+CONTENT_STORE_PREFIX = os.getenv("CONTENT_STORE_PREFIX", "article-bodies")
+# The article page in the frontend reads 'content' straight from Firestore,
+# so the cleaned text stays inline by default. Set to false once nothing
+# reads it from the document anymore: articles then keep only card fields
+# (with a shared backend; see above).
+ARTICLE_INLINE_CONTENT = os.getenv("ARTICLE_INLINE_CONTENT", "true").lower() == "true"
+
+REF_PREFIX = "sha256:"
+
+# Article body fields -> the Firestore field holding their content reference
+BODY_REF_FIELDS = {
+    "content": "content_ref",               # cleaned text
+    "full_clean_content": "raw_content_ref",  # raw scrape, input to cleaning and summarizing
+}
+
+
+def content_ref(text: str) -> str:
+    """The content address of a body: 'sha256:<hex digest of its UTF-8 bytes>'."""
+    return REF_PREFIX + hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+# --- INTERFACE ---
+class ContentStore:
+    """
+    Content-addressed store for article bodies.
+
+    Bodies are compressed (zstd, or zlib without zstandard, see
+    compression.py) and stored under the SHA-256 of their text, so
+    identical bodies are stored once and a reference never goes stale.
+    Backends only move opaque blobs by key.
+    """
+
+    name = "base"
+    # Whether every service can read what this store wrote
+    shared = False
+
+    def _read(self, key: str) -> bytes | None:
+        raise NotImplementedError
+
+    def _write(self, key: str, blob: bytes):
+        raise NotImplementedError
+
+    def _exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def put(self, text: str) -> str:
+        """Stores text (if not stored already) and returns its reference."""
+        ref = content_ref(text)
+        key = ref[len(REF_PREFIX):]
+        if not self._exists(key):
+            self._write(key, compress_text(text))
+        return ref
+
+    def get(self, ref: str) -> str | None:
+        """Returns the text of a reference, or None when it is unknown."""
+        if not ref or not ref.startswith(REF_PREFIX):
+            return None
+        blob = self._read(ref[len(REF_PREFIX):])
+        return decompress_text(blob) if blob is not None else None
+
+
+# --- LOCAL BACKEND ---
+class LocalContentStore(ContentStore):
+    """Blobs as files, fanned out as <root>/ab/cd/<digest>.blob."""
+
+    name = "local"
+
+    def __init__(self, root: str = CONTENT_STORE_PATH):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key[2:4], key + ".blob")
+
+    def _read(self, key):
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _write(self, key, blob):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so readers never see a partial blob
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(blob)
+        os.replace(tmp_path, path)
+
+    def _exists(self, key):
+        return os.path.exists(self._path(key))
+
+
+# --- CLOUD STORAGE BACKEND ---
+class GCSContentStore(ContentStore):
+    """Blobs as objects <prefix>/<digest> in a Cloud Storage bucket (needs google-cloud-storage)."""
+
+    name = "gcs"
+    shared = True
+
+    def __init__(self, bucket_name: str | None = CONTENT_STORE_BUCKET, prefix: str = CONTENT_STORE_PREFIX):
+        if not bucket_name:
+            raise ValueError("FATAL: CONTENT_STORE_BUCKET must be set for CONTENT_STORE_BACKEND=gcs.")
+        from google.cloud import storage
+        from google.api_core.exceptions import NotFound
+        self._not_found = NotFound
+        self.bucket = storage.Client().bucket(bucket_name)
+        self.prefix = prefix.strip("/")
+
+    def _blob(self, key):
+        return self.bucket.blob(f"{self.prefix}/{key}")
+
+    def _read(self, key):
+        try:
+            return self._blob(key).download_as_bytes()
+        except self._not_found:
+            return None
+
+    def _write(self, key, blob):
+        self._blob(key).upload_from_string(blob, content_type="application/octet-stream")
+
+    def _exists(self, key):
+        return self._blob(key).exists()
+
+
+_content_store = None
+_content_store_lock = threading.Lock()
+
+
+def get_content_store() -> ContentStore:
+    """
+    Returns the process-wide content store selected by CONTENT_STORE_BACKEND,
+    creating it on first use.
+    """
+    global _content_store
+    if _content_store is None:
+        with _content_store_lock:
+            if _content_store is None:
+                if CONTENT_STORE_BACKEND == "local":
+                    _content_store = LocalContentStore()
+                elif CONTENT_STORE_BACKEND == "gcs":
+                    _content_store = GCSContentStore()
+                else:
+                    raise ValueError(f"FATAL: Unknown CONTENT_STORE_BACKEND '{CONTENT_STORE_BACKEND}'. Use 'local' or 'gcs'.")
+    return _content_store
+
+
+# --- ARTICLE HELPERS ---
+def store_bodies(bodies: dict, inline_content: bool = ARTICLE_INLINE_CONTENT, store: ContentStore | None = None) -> dict:
+    """
+    Writes article bodies to the content store and returns the Firestore
+    fields that reference them.
+
+    With a store other services can't read (the local backend), bodies are
+    kept inline only, so a job on another machine still finds them, and no
+    blob is written that nothing would read.
+
+    Args:
+        bodies (dict): body field ('content' and/or 'full_clean_content') -> text.
+        inline_content (bool): Also keep the cleaned 'content' in the document.
+            Otherwise an older inline copy is deleted, so it can't shadow
+            the reference (use the fields with update() or set(merge=True)).
+
+    Returns:
+        dict: e.g. {'content_ref': 'sha256:...', 'raw_content_ref': 'sha256:...'}
+              plus the inline bodies (or a delete marker for 'content');
+              only the inline bodies with a store that isn't shared.
+    """
+    store = store or get_content_store()
+    fields = {}
+    for field, text in bodies.items():
+        if not text:
+            continue
+        if store.shared:
+            fields[BODY_REF_FIELDS[field]] = store.put(text)
+        else:
+            fields[field] = text
+    if bodies.get("content") and store.shared:
+        if inline_content:
+            fields["content"] = bodies["content"]
+        else:
+            from firebase_admin import firestore
+            fields["content"] = firestore.DELETE_FIELD
+    return fields
+
+
+def load_body(data: dict, field: str = "content", store: ContentStore | None = None) -> str | None:
+    """
+    Returns an article body from its document data: the inline field when
+    present (documents not migrated yet), otherwise the referenced blob.
+    """
+    if data.get(field):
+        return data[field]
+    ref = data.get(BODY_REF_FIELDS[field])
+    if not ref:
+        return None
+    return (store or get_content_store()).get(ref)
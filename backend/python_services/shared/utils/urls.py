@@ -0,0 +1,88 @@
+import re
+import hashlib
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# --- Configuration ---
+# Query parameters that only track where a click came from; they never change the article.
+TRACKING_PARAMS = {
+    "ref", "ref_src", "ref_url", "referrer", "cmpid", "cmp", "s_cid",
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid", "_ga", "_gl",
+    "ocid", "smid", "smtyp", "taid", "mod", "ito", "guccounter", "guce_referrer",
+    "guce_referrer_sig", "amp", "outputtype", "amp_js_v", "usqp", "__twitter_impression",
+}
+TRACKING_PREFIXES = ("utm_", "ns_", "mkt_", "pk_", "hsa_", "at_")
+# Host prefixes that serve the same article as the bare host.
+HOST_ALIAS_PREFIXES = ("www.", "m.", "amp.", "mobile.")
+AMP_CACHE_HOST = re.compile(r"\.cdn\.ampproject\.org$")
+DOC_ID_LENGTH = 32
+
+
+def _resolve_amp_path(host: str, path: str) -> tuple[str, str]:
+    """Maps AMP variants of an article back to its regular URL path."""
+    # Google AMP cache: https://example-com.cdn.ampproject.org/c/s/example.com/path
+    if AMP_CACHE_HOST.search(host):
+        match = re.match(r"^/[a-z](?:/s)?/([^/]+)(/.*)?$", path)
+        if match:
+            host, path = match.group(1).lower(), match.group(2) or "/"
+
+    path = re.sub(r"^/amp(?=/)", "", path)                 # /amp/story -> /story
+    path = re.sub(r"/amp/?$", "", path) or "/"              # /story/amp -> /story
+    path = re.sub(r"\.amp(\.html?)?$", r"\1", path)         # /story.amp.html -> /story.html
+    return host, path
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Normalizes an article URL so the same story always maps to the same string:
+    https scheme, lower-case host without www./m./amp. prefixes or default port,
+    AMP paths resolved, tracking query parameters removed, remaining parameters
+    sorted, no trailing slash and no fragment.
+
+    Args:
+        url (str): The article URL as received from NewsAPI or a user.
+
+    Returns:
+        str: The canonical URL, or an empty string for an empty input.
+    """
+    url = (url or "").strip()
+    if not url:
+        return ""
+    if "://" not in url:
+        url = "https://" + url
+
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    try:
+        port = parts.port
+    except ValueError:
+        port = None  # malformed or out of range: keep the host and path
+    if port and port not in (80, 443):
+        host = f"{host}:{port}"
+
+    host, path = _resolve_amp_path(host, parts.path or "/")
+    for prefix in HOST_ALIAS_PREFIXES:
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+
+    path = re.sub(r"/{2,}", "/", path)
+    if len(path) > 1:
+        path = path.rstrip("/")
+
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    )
+    return urlunsplit(("https", host, path, urlencode(query), ""))
+
+
+def make_doc_id(url: str) -> str:
+    """
+    Fixed-length document ID for an article, shared by Firestore and the vector
+    store: the first 32 hex characters (128 bits) of the SHA-256 of the
+    canonical URL. The original URL is kept on the document itself.
+    """
+    canonical = canonicalize_url(url)
+    if not canonical:
+        return ""
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:DOC_ID_LENGTH]
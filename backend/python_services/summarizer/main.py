@@ -1,76 +1,325 @@
+"""
+Summarization Worker
+--------------------
+Long-running worker that drains articles with processing_status == 'pending'.
+
+Each worker claims a batch in a Firestore transaction, marking the articles
+'in_progress' with a `lease_until` deadline and its own `lease_owner`, so any
+number of workers on any number of machines can run side by side without
+summarizing the same article twice. Articles whose lease expired (their
+worker died) are claimed again. Summaries are generated with several
+articles packed into each Gemini request, a few requests in flight under a
+shared requests-per-minute limit, and written back in one transaction per
+batch, which only touches articles this worker still owns.
+
+By default the worker polls for pending articles every
+SUMMARY_IDLE_POLL_SECONDS. With --listen it subscribes to them instead
+(Firestore on_snapshot, see pending_listener.py) and summarizes new articles
+seconds after they are written, with a periodic sweep for expired leases
+and anything the listener could not queue.
+
+Usage:
+    python main.py [--once | --listen] [--concurrency N] [--rpm N]
+"""
+
 import sys
 import os
+import uuid
+import signal
+import socket
+import argparse
+import threading
 import time
+from datetime import datetime, timedelta, timezone
+from dotenv import load_dotenv
 
 # This allows this script to find and import modules from the 'shared' directory
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from shared.database.firestore_client import db
-from summary_engine.langgraph_agent import get_summary
+# --- Load Environment Variables ---
+# Before the shared imports: several of them read their settings at import time.
+load_dotenv(os.path.join(os.path.dirname(__file__), '..', '..', '.env'))
+
+from firebase_admin import firestore
+from shared.database.firestore_client import get_db
+from shared.database.article_cache import notify_articles_updated, notify_trending
+from shared.database.feed_snapshots import update_feeds
+from shared.observability.metrics import metrics
+from shared.storage.content_store import load_body
+from summary_engine.langgraph_agent import get_summaries, SUMMARY_FAILED_MESSAGE
+from summary_engine.rate_limiter import gemini_limiter, GEMINI_RPM
+from pending_listener import PendingArticleListener
+
+# --- Configuration ---
+CLAIM_BATCH_SIZE = int(os.getenv("SUMMARY_CLAIM_BATCH_SIZE", 20))
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", 4))
+# Gemini quota shared by this worker's threads (requests per minute)
+SUMMARY_RPM = GEMINI_RPM
+LEASE_SECONDS = int(os.getenv("SUMMARY_LEASE_SECONDS", 600))
+IDLE_POLL_SECONDS = int(os.getenv("SUMMARY_IDLE_POLL_SECONDS", 60))
+MAX_ATTEMPTS = int(os.getenv("SUMMARY_MAX_ATTEMPTS", 3))
+# Listener mode: how often to sweep for expired leases and missed or dropped articles
+LISTEN_SWEEP_SECONDS = float(os.getenv("SUMMARY_LISTEN_SWEEP_SECONDS", 300))
+# Histogram buckets (seconds) for the time from an article's creation to its summary
+INGEST_LATENCY_BUCKETS = (1, 2, 5, 10, 30, 60, 300, 900, 3600, 4 * 3600, 12 * 3600, 24 * 3600)
+WORKER_ID = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+_stop = threading.Event()
+
+
+def _articles():
+    return get_db().collection('articles')
+
+
+# --- Leasing ---
+def _find_claimable(limit: int) -> list:
+    """Pending articles first, then ones whose lease has expired."""
+    now = datetime.now(timezone.utc)
+    # Only the references are needed; an empty select() would return every field
+    refs = [doc.reference for doc in
+            _articles().where('processing_status', '==', 'pending').limit(limit)
+            .select(['processing_status']).stream()]
+    if len(refs) < limit:
+        expired = (_articles()
+                   .where('processing_status', '==', 'in_progress')
+                   .where('lease_until', '<', now)
+                   .limit(limit - len(refs))
+                   .select(['processing_status'])
+                   .stream())
+        refs.extend(doc.reference for doc in expired)
+    return refs
+
+
+@firestore.transactional
+def _claim_in_transaction(transaction, refs: list) -> list:
+    """Re-reads the candidates inside the transaction and leases the ones still claimable."""
+    now = datetime.now(timezone.utc)
+    lease_until = now + timedelta(seconds=LEASE_SECONDS)
+    claimed = []
+    for snapshot in transaction.get_all(refs):
+        data = snapshot.to_dict() or {}
+        status = data.get('processing_status')
+        lease = data.get('lease_until')
+        if status == 'pending' or (status == 'in_progress' and lease is not None and lease < now):
+            transaction.update(snapshot.reference, {
+                'processing_status': 'in_progress',
+                'lease_owner': WORKER_ID,
+                'lease_until': lease_until,
+                'attempts': data.get('attempts', 0) + 1,
+            })
+            claimed.append(snapshot)
+    return claimed
+
 
-def process_articles():
+def claim_batch(limit: int = CLAIM_BATCH_SIZE, refs: list | None = None) -> list:
     """
-    Finds articles in Firestore that have not been summarized, generates a summary
-    for each, and updates the document.
+    Leases up to `limit` articles for this worker (or the given candidate
+    refs, e.g. from the listener). Returns their snapshots (pre-claim data).
     """
-    # 1. Query Firestore for articles with 'pending' status. We process in small batches.
-    articles_ref = db.collection('articles').where('processing_status', '==', 'pending').limit(10)
-    
+    if refs is None:
+        refs = _find_claimable(limit)
+    if not refs:
+        return []
+    return _claim_in_transaction(get_db().transaction(), refs)
+
+
+@firestore.transactional
+def _write_results_in_transaction(transaction, results: dict) -> list:
+    """Writes results only for articles this worker still holds the lease on."""
+    refs = [_articles().document(doc_id) for doc_id in results]
+    written = []
+    for snapshot in transaction.get_all(refs):
+        if (snapshot.to_dict() or {}).get('lease_owner') != WORKER_ID:
+            print(f"  -> Lease on {snapshot.id} was lost to another worker; dropping its result.")
+            continue
+        transaction.update(snapshot.reference, {
+            **results[snapshot.id],
+            'lease_owner': firestore.DELETE_FIELD,
+            'lease_until': firestore.DELETE_FIELD,
+            'updatedAt': datetime.utcnow(),
+        })
+        written.append(snapshot.id)
+    return written
+
+
+# --- Summarizing ---
+def _summarize_batch(claimed: list, concurrency: int) -> dict:
+    """Builds the Firestore update for every claimed article, keyed by ID."""
+    results, contents = {}, {}
+    for snapshot in claimed:
+        article_data = snapshot.to_dict() or {}
+        content = load_body(article_data, 'full_clean_content') or load_body(article_data, 'content')
+        if content:
+            contents[snapshot.id] = content
+        else:
+            print(f"  -> SKIPPED: {snapshot.id} has no full content.")
+            metrics.count_items("summarize", outcome="no_content")
+            results[snapshot.id] = {'processing_status': 'failed_no_content'}
+
     try:
-        articles_to_process = list(articles_ref.stream())
+        with metrics.timed("summarize"):
+            summaries = get_summaries(contents, max_concurrency=concurrency)
     except Exception as e:
-        print(f"Error fetching articles from Firestore: {e}")
-        return
-
-    if not articles_to_process:
-        print("No pending articles to summarize. All work is done.")
-        return
-        
-    print(f"Found {len(articles_to_process)} articles to summarize.")
-
-    # 2. Loop through each article document and process it
-    for article_doc in articles_to_process:
-        article_data = article_doc.to_dict()
-        doc_id = article_doc.id
-        
-        print(f"\nProcessing article: {article_data.get('title')}")
-        
-        content = article_data.get('full_clean_content')
-        
-        if not content:
-            print("  -> SKIPPED: Article has no full content.")
-            db.collection('articles').document(doc_id).update({'processing_status': 'failed_no_content'})
+        print(f"  -> FAILED to summarize batch. Error: {e}")
+        summaries = {}
+
+    for snapshot in claimed:
+        if snapshot.id in results:
             continue
+        summary = summaries.get(snapshot.id)
+        if summary and summary != SUMMARY_FAILED_MESSAGE:
+            metrics.count_items("summarize")
+            results[snapshot.id] = {'summary': summary, 'processing_status': 'completed'}
+        else:
+            # Give it back to the queue unless it has used up its attempts
+            metrics.count_error("summarize")
+            attempts = (snapshot.to_dict() or {}).get('attempts', 0) + 1
+            results[snapshot.id] = {'processing_status': 'failed' if attempts >= MAX_ATTEMPTS else 'pending'}
+    return results
 
-        # 3. Generate the summary using our LangGraph agent
-        summary = get_summary(content)
-        
-        # 4. Update the document in Firestore with the summary and new status
-        try:
-            db.collection('articles').document(doc_id).update({
-                'summary': summary,
-                'processing_status': 'completed'
-            })
-            print(f"  -> Successfully updated Firestore document: {doc_id}")
-        except Exception as e:
-            print(f"  -> FAILED to update Firestore document {doc_id}. Error: {e}")
 
-        # Add a delay to respect API rate limits (Gemini Pro has a limit of 60 requests/minute)
-        time.sleep(2)
+def _record_ingest_latency(claimed: list, completed: dict):
+    """Observes how long after its document was created each article got its summary."""
+    now = time.time()
+    for snapshot in claimed:
+        created = getattr(snapshot, 'create_time', None)
+        if snapshot.id not in completed or created is None:
+            continue
+        created_ts = created.timestamp() if hasattr(created, 'timestamp') else created.seconds + created.nanos / 1e9
+        metrics.observe("ingest_to_summary_seconds", max(now - created_ts, 0.0), buckets=INGEST_LATENCY_BUCKETS)
+
+
+def process_articles(concurrency: int = SUMMARY_CONCURRENCY, refs: list | None = None) -> int:
+    """
+    Claims one batch of articles (the claimable ones among `refs`, if
+    given), summarizes them (packed several to a Gemini request,
+    `concurrency` requests in flight) and writes the results back.
+
+    Returns:
+        int: The number of articles claimed (0 when there is no work).
+    """
+    try:
+        claimed = claim_batch(refs=refs)
+    except Exception as e:
+        print(f"Error claiming articles from Firestore: {e}")
+        return 0
+
+    if not claimed:
+        return 0
+    print(f"\nClaimed {len(claimed)} articles to summarize.")
+
+    results = _summarize_batch(claimed, concurrency)
+
+    try:
+        with metrics.timed("store"):
+            written = _write_results_in_transaction(get_db().transaction(), results)
+    except Exception as e:
+        # Leases expire on their own, so the articles will be picked up again
+        print(f"  -> FAILED to write results to Firestore. Error: {e}")
+        return len(claimed)
+
+    # Publish the completed articles to the feed snapshots and the search service (cards, trending).
+    # The feed excerpt comes from the body, which may only be in the content store (as in rebuild_feeds).
+    completed = {}
+    for snapshot in claimed:
+        if snapshot.id in written and results[snapshot.id].get('processing_status') == 'completed':
+            data = snapshot.to_dict() or {}
+            completed[snapshot.id] = {**data, **results[snapshot.id], 'content': load_body(data) or ''}
+    _record_ingest_latency(claimed, completed)
+    update_feeds(completed)
+    notify_articles_updated(list(completed))
+    notify_trending(completed)
+    print(f"  -> Wrote {len(written)} results.")
+    return len(claimed)
+
+
+def run_worker(once: bool = False, concurrency: int = SUMMARY_CONCURRENCY, rpm: float = SUMMARY_RPM):
+    """Claims and processes batches until stopped. With `once`, exits when no work is left."""
+    gemini_limiter.set_rpm(rpm)
+    processed = 0
+    while not _stop.is_set():
+        claimed = process_articles(concurrency)
+        processed += claimed
+        if claimed:
+            continue
+        if once:
+            print("No pending articles to summarize. All work is done.")
+            break
+        _stop.wait(IDLE_POLL_SECONDS)
+    return processed
+
+
+def run_listener(concurrency: int = SUMMARY_CONCURRENCY, rpm: float = SUMMARY_RPM) -> int:
+    """
+    Summarizes pending articles as they arrive, until stopped.
+
+    The listener queues the IDs of pending articles; each batch is claimed
+    with the usual lease transaction, so reconnect replays and other
+    workers never cause an article to be summarized twice. When the queue
+    is empty, a claim sweep runs at the start, every LISTEN_SWEEP_SECONDS,
+    and whenever the listener had to drop arrivals because the queue was
+    full. The sweep picks up expired leases, which are never 'pending' and
+    so never reach the listener.
+    """
+    gemini_limiter.set_rpm(rpm)
+    listener = PendingArticleListener(lambda: _articles().where('processing_status', '==', 'pending'))
+    processed, next_sweep = 0, 0.0
+    try:
+        while not _stop.is_set():
+            listener.ensure_listening()
+            doc_ids = listener.take(CLAIM_BATCH_SIZE, wait=1.0)
+            if doc_ids:
+                try:
+                    processed += process_articles(concurrency, refs=[_articles().document(i) for i in doc_ids])
+                finally:
+                    listener.done(doc_ids)
+                continue
+
+            if listener.overflowed.is_set() or time.monotonic() >= next_sweep:
+                listener.overflowed.clear()
+                while not _stop.is_set() and (claimed := process_articles(concurrency)):
+                    processed += claimed
+                next_sweep = time.monotonic() + LISTEN_SWEEP_SECONDS
+    finally:
+        listener.close()
+        print(f"Listener stats: {listener.stats()}")
+    return processed
+
+
+def _request_stop(signum, frame):
+    print("\nStop requested; finishing the current batch...")
+    _stop.set()
+
 
 def main():
     """
     Main entry point for the summarization service.
     """
+    parser = argparse.ArgumentParser(description="Summarize pending articles.")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--once", action="store_true", help="Exit once no claimable articles are left.")
+    mode.add_argument("--listen", action="store_true",
+                      help="Subscribe to pending articles and summarize them as they arrive.")
+    parser.add_argument("--concurrency", type=int, default=SUMMARY_CONCURRENCY)
+    parser.add_argument("--rpm", type=float, default=SUMMARY_RPM, help="Gemini requests per minute for this worker.")
+    args = parser.parse_args()
+
+    signal.signal(signal.SIGTERM, _request_stop)
+    signal.signal(signal.SIGINT, _request_stop)
+
     print("=============================================")
     print("  STARTING NEWS SUMMARIZATION SERVICE")
+    print(f"  Worker: {WORKER_ID}")
     print("=============================================")
-    
-    process_articles()
-    
-    print("\nSummarization process finished.")
+
+    if args.listen:
+        processed = run_listener(concurrency=args.concurrency, rpm=args.rpm)
+    else:
+        processed = run_worker(once=args.once, concurrency=args.concurrency, rpm=args.rpm)
+
+    print(f"\nSummarization process finished. Articles processed: {processed}")
+    metrics.write_run_report("summarizer", extra={"worker": WORKER_ID})
     print("=============================================")
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,142 @@
+import os
+import time
+import queue
+import threading
+
+# --- Configuration ---
+# Most article IDs waiting in memory; beyond this, arrivals wait in Firestore
+LISTEN_QUEUE_SIZE = int(os.getenv("SUMMARY_LISTEN_QUEUE_SIZE", 200))
+# After the first ID arrives, how long to wait for more to fill a batch
+LISTEN_BATCH_WAIT_SECONDS = float(os.getenv("SUMMARY_LISTEN_BATCH_WAIT_SECONDS", 0.5))
+# Delays between re-subscription attempts after the listener stops
+RECONNECT_BACKOFF_SECONDS = (1, 2, 5, 10, 30, 60)
+
+
+class PendingArticleListener:
+    """
+    Subscribes to pending articles with on_snapshot and hands their IDs to
+    the worker through a bounded in-process queue.
+
+    Backpressure: the queue holds at most `maxsize` IDs. When it is full,
+    new arrivals are not queued (blocking would stall the listener thread)
+    and `overflowed` is set. Those articles stay 'pending' in Firestore,
+    which is the durable buffer, and the worker collects them with a
+    regular claim sweep once it has caught up.
+
+    Deduplication: an ID is queued at most once until the worker calls
+    done() for it, so the replay of every matching document after a
+    reconnect, or repeated modifications, don't queue it twice. The claim
+    transaction's lease then makes sure it is summarized once, whichever
+    worker sees it first.
+
+    Reconnects: the Firestore client retries transient stream errors
+    itself. If the watch stops for good, ensure_listening() subscribes
+    again with backoff, and the fresh subscription replays all pending
+    articles.
+    """
+
+    def __init__(self, query_factory, maxsize: int = LISTEN_QUEUE_SIZE):
+        """
+        Args:
+            query_factory (callable): Returns the Firestore query to listen
+                to; called again on every re-subscription.
+            maxsize (int): Capacity of the in-process queue.
+        """
+        self._query_factory = query_factory
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.overflowed = threading.Event()
+        self._tracked = set()  # IDs queued or being processed
+        self._lock = threading.Lock()
+        self._watch = None
+        self._failures = 0
+        self._next_attempt = 0.0
+        self.received = 0
+        self.dropped = 0
+        self.reconnects = 0
+
+    # --- Listener thread ---
+    def _on_snapshot(self, docs, changes, read_time):
+        self._failures = 0
+        for change in changes:
+            # REMOVED: no longer pending (claimed by a worker, or deleted)
+            if change.type.name != "REMOVED":
+                self._offer(change.document.id)
+
+    def _offer(self, doc_id: str):
+        with self._lock:
+            if doc_id in self._tracked:
+                return
+            try:
+                self.queue.put_nowait(doc_id)
+            except queue.Full:
+                self.dropped += 1
+                self.overflowed.set()
+                return
+            self._tracked.add(doc_id)
+            self.received += 1
+
+    # --- Worker side ---
+    def take(self, limit: int, wait: float) -> list[str]:
+        """
+        Waits up to `wait` seconds for an article ID, then collects up to
+        `limit` IDs that arrive within LISTEN_BATCH_WAIT_SECONDS, so a burst
+        of new articles is claimed and summarized as one batch.
+        """
+        try:
+            doc_ids = [self.queue.get(timeout=wait)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + LISTEN_BATCH_WAIT_SECONDS
+        while len(doc_ids) < limit:
+            remaining = deadline - time.monotonic()
+            try:
+                doc_ids.append(self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return doc_ids
+
+    def done(self, doc_ids: list[str]):
+        """Forgets processed IDs, so later changes to them are queued again."""
+        with self._lock:
+            self._tracked.difference_update(doc_ids)
+
+    # --- Subscription ---
+    def is_active(self) -> bool:
+        # The client's Watch has no public liveness flag; it sets _closed once it gives up.
+        return self._watch is not None and not getattr(self._watch, "_closed", False)
+
+    def _schedule_retry(self, reason: str):
+        delay = RECONNECT_BACKOFF_SECONDS[min(self._failures, len(RECONNECT_BACKOFF_SECONDS) - 1)]
+        self._failures += 1
+        self._next_attempt = time.monotonic() + delay
+        print(f"  -> Pending-article listener {reason}; subscribing again in {delay}s.")
+
+    def ensure_listening(self) -> bool:
+        """Subscribes if not subscribed (or the watch stopped), respecting the backoff. Returns whether active."""
+        if self.is_active():
+            return True
+        if self._watch is not None:
+            self.close()
+            self.reconnects += 1
+            self._schedule_retry("stopped")
+            return False
+        if time.monotonic() < self._next_attempt:
+            return False
+        try:
+            self._watch = self._query_factory().on_snapshot(self._on_snapshot)
+            return True
+        except Exception as e:
+            self._schedule_retry(f"could not subscribe ({e})")
+            return False
+
+    def close(self):
+        if self._watch is not None:
+            try:
+                self._watch.unsubscribe()
+            except Exception:
+                pass
+            self._watch = None
+
+    def stats(self) -> dict:
+        return {"received": self.received, "dropped": self.dropped, "reconnects": self.reconnects,
+                "queued": self.queue.qsize()}
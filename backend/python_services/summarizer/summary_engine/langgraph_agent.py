@@ -1,35 +1,24 @@
 import os
+import re
+import json
+from concurrent.futures import ThreadPoolExecutor
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import RunnableLambda
 
-def get_summary(article_content: str) -> str:
-    """
-    Uses the Google Gemini model to generate a summary for the given article content,
-    formatted as a list of bullet points.
-    
-    Args:
-        article_content (str): The full text of the news article.
-        
-    Returns:
-        str: A concise, bulleted summary of the article, or an error message.
-    """
-    gemini_api_key = os.getenv("GEMINI_API_KEY")
-    if not gemini_api_key:
-        raise ValueError("FATAL: GEMINI_API_KEY is not set in your .env file.")
+from .rate_limiter import gemini_limiter
+from .token_budget import plan_summary, count_tokens
 
-    # 1. Define the Large Language Model (LLM)
-    llm = ChatGoogleGenerativeAI(
-        model='gemini-2.0-flash',
-        google_api_key=gemini_api_key,
-        api_version="v1",  # 👈 Force stable version
-        temperature=0.3,
-    )
+# Concurrent chunk calls in the map-reduce path
+SUMMARY_CHUNK_CONCURRENCY = int(os.getenv("SUMMARY_CHUNK_CONCURRENCY", 4))
+# Packed mode: several articles per request, answered as one JSON object.
+SUMMARY_PACK_TOKEN_BUDGET = int(os.getenv("SUMMARY_PACK_TOKEN_BUDGET", 8000))
+SUMMARY_PACK_MAX_ARTICLES = int(os.getenv("SUMMARY_PACK_MAX_ARTICLES", 8))
+# Articles bigger than this are always summarized on their own.
+SUMMARY_PACK_MAX_ARTICLE_TOKENS = int(os.getenv("SUMMARY_PACK_MAX_ARTICLE_TOKENS", 2000))
 
-    # 2. Create a clear and specific prompt template with formatting instructions.
-    # THIS IS THE PART WE ARE CHANGING.
-    prompt = ChatPromptTemplate.from_template(
-        """
+SUMMARY_PROMPT = """
         You are an expert news analyst. Your task is to provide a clear, unbiased, and concise summary of the following news article.
 
         **Format the summary as a list of 3 to 6 key bullet points.** Each point should be a complete sentence.
@@ -39,21 +28,215 @@ def get_summary(article_content: str) -> str:
         ---
         {article}
         """
-    )
 
-    # 3. Define the output parser
-    output_parser = StrOutputParser()
+# Short briefs don't need the full instructions (or six bullets).
+BRIEF_PROMPT = """Summarize this news brief in 2 or 3 factual bullet points, each a complete sentence:
+---
+{article}
+"""
 
-    # 4. Chain the components together
-    summarization_chain = prompt | llm | output_parser
+# Map step: notes on one part of a long article.
+CHUNK_PROMPT = """
+        You are an expert news analyst. Below is one part of a longer news article.
+        List the key facts, events and outcomes it reports as short bullet points. No opinions.
+
+        ---
+        {article}
+        """
+
+# Reduce step: combine the notes into the final summary.
+COMBINE_PROMPT = """
+        You are an expert news analyst. The notes below were taken from consecutive parts of one news article.
+
+        **Write the article's summary as a list of 3 to 6 key bullet points.** Each point should be a complete sentence.
+        Keep the most important facts, drop repetition, and do not add any personal opinions or speculation.
+
+        Notes:
+        ---
+        {article}
+        """
+
+PACKED_PROMPT = """
+        You are an expert news analyst. Below are several separate news articles, each inside <article id="..."> tags.
+        Summarize each article on its own, without mixing facts between articles.
+
+        For every article write 3 to 6 key bullet points (2 or 3 for very short briefs). Each point should be a
+        complete sentence. Focus on the key facts, events, and outcomes. Do not add any personal opinions or speculation.
+
+        Reply with only a JSON object that maps each article id to its list of bullet point strings, e.g.
+        {{"id1": ["First point.", "Second point."], "id2": ["..."]}}
+
+        {articles}
+        """
+
+SUMMARY_FAILED_MESSAGE = "Summary could not be generated at this time."
+
+_chains = {}
+
+
+def _throttle(inputs):
+    # Every request, including each chunk of a batch, waits for a quota slot.
+    gemini_limiter.wait()
+    return inputs
+
+
+def _get_chain(name: str, template: str):
+    """Builds each prompt | llm | parser chain once per process."""
+    if name not in _chains:
+        gemini_api_key = os.getenv("GEMINI_API_KEY")
+        if not gemini_api_key:
+            raise ValueError("FATAL: GEMINI_API_KEY is not set in your .env file.")
+
+        llm = ChatGoogleGenerativeAI(
+            model='gemini-2.0-flash',
+            google_api_key=gemini_api_key,
+            api_version="v1",  # 👈 Force stable version
+            temperature=0.3,
+        )
+        _chains[name] = RunnableLambda(_throttle) | ChatPromptTemplate.from_template(template) | llm | StrOutputParser()
+    return _chains[name]
+
+
+def get_summary(article_content: str) -> str:
+    """
+    Uses the Google Gemini model to generate a summary for the given article content,
+    formatted as a list of bullet points.
+
+    The input is budgeted first (see token_budget.py): short briefs get a
+    compact prompt, moderately long articles are trimmed to their most
+    salient sentences, and very long ones are summarized chunk by chunk
+    (concurrently) before the chunk notes are combined.
+
+    Args:
+        article_content (str): The full text of the news article.
+
+    Returns:
+        str: A concise, bulleted summary of the article, or an error message.
+    """
+    mode, pieces = plan_summary(article_content)
+    if mode == "map_reduce":
+        chunk_chain = _get_chain("chunk", CHUNK_PROMPT)
+        combine_chain = _get_chain("combine", COMBINE_PROMPT)
+    else:
+        chain = _get_chain(mode, BRIEF_PROMPT if mode == "brief" else SUMMARY_PROMPT)
 
-    print("  -> Generating bulleted summary with Gemini...")
     try:
-        # Invoke the chain with the article content
-        summary = summarization_chain.invoke({"article": article_content})
+        if mode == "map_reduce":
+            print(f"  -> Long article: summarizing {len(pieces)} chunks with Gemini...")
+            notes = chunk_chain.batch(
+                [{"article": piece} for piece in pieces],
+                config={"max_concurrency": SUMMARY_CHUNK_CONCURRENCY},
+            )
+            summary = combine_chain.invoke({"article": "\n\n".join(notes)})
+        else:
+            print("  -> Generating bulleted summary with Gemini...")
+            summary = chain.invoke({"article": pieces[0]})
         print("  -> Summary generated successfully.")
         return summary
     except Exception as e:
         print(f"  -> FAILED to generate summary. Error: {e}")
-        return "Summary could not be generated at this time."
+        return SUMMARY_FAILED_MESSAGE
+
+
+# --- Packed summarization ---
+def _pack(articles: dict) -> tuple[list[list[str]], list[str]]:
+    """
+    Groups article IDs into packs that fit SUMMARY_PACK_TOKEN_BUDGET and
+    SUMMARY_PACK_MAX_ARTICLES. Returns (packs, ids to summarize on their own).
+    """
+    packs, singles = [], []
+    current, used = [], 0
+    for doc_id, content in articles.items():
+        mode, pieces = plan_summary(content)
+        tokens = count_tokens(pieces[0])
+        if mode == "map_reduce" or tokens > SUMMARY_PACK_MAX_ARTICLE_TOKENS:
+            singles.append(doc_id)
+            continue
+        if current and (used + tokens > SUMMARY_PACK_TOKEN_BUDGET or len(current) >= SUMMARY_PACK_MAX_ARTICLES):
+            packs.append(current)
+            current, used = [], 0
+        current.append(doc_id)
+        used += tokens
+    if current:
+        packs.append(current)
+
+    # A pack of one gains nothing over the regular prompt.
+    singles.extend(pack[0] for pack in packs if len(pack) == 1)
+    return [pack for pack in packs if len(pack) > 1], singles
+
+
+def _parse_packed_response(text: str, expected_ids: list[str]) -> dict:
+    """
+    Extracts {article id: bulleted summary} from a packed JSON reply. Entries
+    that are missing, unexpected or not a non-empty list of strings are left
+    out so the caller can retry them on their own.
+    """
+    text = re.sub(r"^\s*```(?:json)?|```\s*$", "", text.strip())
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        match = re.search(r"\{.*\}", text, re.DOTALL)
+        try:
+            data = json.loads(match.group(0)) if match else None
+        except json.JSONDecodeError:
+            data = None
+    if not isinstance(data, dict):
+        return {}
+
+    summaries = {}
+    for doc_id in expected_ids:
+        points = data.get(doc_id)
+        if isinstance(points, str):
+            points = [line.lstrip("*-• ").strip() for line in points.splitlines()]
+        if not isinstance(points, list):
+            continue
+        points = [p.strip() for p in points if isinstance(p, str) and p.strip()]
+        if points:
+            summaries[doc_id] = "\n".join(f"* {point}" for point in points)
+    return summaries
+
+
+def _summarize_pack(articles: dict, pack: list[str]) -> dict:
+    """Summarizes one pack in a single request. Returns the summaries that came back valid."""
+    body = "\n\n".join(
+        f'<article id="{doc_id}">\n{plan_summary(articles[doc_id])[1][0]}\n</article>' for doc_id in pack
+    )
+    try:
+        reply = _get_chain("packed", PACKED_PROMPT).invoke({"articles": body})
+    except Exception as e:
+        print(f"  -> FAILED packed summary of {len(pack)} articles. Error: {e}")
+        return {}
+    summaries = _parse_packed_response(reply, pack)
+    print(f"  -> Packed request summarized {len(summaries)}/{len(pack)} articles.")
+    return summaries
+
+
+def get_summaries(articles: dict, max_concurrency: int = 1) -> dict:
+    """
+    Summarizes many articles with as few Gemini requests as possible.
+
+    Short and regular articles are packed several to a request, and the model
+    answers with JSON keyed by article ID. The reply is validated per article;
+    anything missing or malformed, and every article too long to pack, goes
+    through get_summary() on its own.
+
+    Args:
+        articles (dict): Article content keyed by article ID.
+        max_concurrency (int): Requests in flight at once (the shared
+            rate limiter still applies).
+
+    Returns:
+        dict: A bulleted summary per article ID (get_summary's fallback
+        message where summarization failed).
+    """
+    articles = {doc_id: content for doc_id, content in articles.items() if content}
+    packs, singles = _pack(articles)
 
+    summaries = {}
+    with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as pool:
+        for pack, result in zip(packs, pool.map(lambda pack: _summarize_pack(articles, pack), packs)):
+            summaries.update(result)
+            singles.extend(doc_id for doc_id in pack if doc_id not in result)
+        for doc_id, summary in zip(singles, pool.map(lambda doc_id: get_summary(articles[doc_id]), singles)):
+            summaries[doc_id] = summary
+    return summaries
@@ -0,0 +1,31 @@
+import os
+import time
+import threading
+
+# Gemini requests per minute allowed for this process (free tier ≈ 15).
+GEMINI_RPM = float(os.getenv("GEMINI_RPM", os.getenv("SUMMARY_RPM", 15)))
+
+
+class RateLimiter:
+    """Spaces calls evenly so that all threads together stay under `rpm` requests per minute."""
+
+    def __init__(self, rpm: float):
+        self.set_rpm(rpm)
+        self.next_slot = time.monotonic()
+        self.lock = threading.Lock()
+
+    def set_rpm(self, rpm: float):
+        self.interval = 60.0 / rpm if rpm > 0 else 0.0
+
+    def wait(self):
+        """Blocks until one more call fits under the limit."""
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+# Shared by every Gemini call the summary engine makes.
+gemini_limiter = RateLimiter(GEMINI_RPM)
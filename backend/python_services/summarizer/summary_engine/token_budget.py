@@ -0,0 +1,163 @@
+import os
+import re
+import math
+from collections import Counter
+
+# --- Configuration ---
+# Token budget for the article text sent in a single summarization call.
+SUMMARY_TOKEN_BUDGET = int(os.getenv("SUMMARY_TOKEN_BUDGET", 3000))
+# Articles up to this size are trimmed to the budget by sentence salience;
+# longer ones (live blogs, long reads) are map-reduced in chunks instead.
+SUMMARY_MAP_REDUCE_TOKENS = int(os.getenv("SUMMARY_MAP_REDUCE_TOKENS", 6000))
+# Hard ceiling on what is sent at all, applied by salience before chunking
+# (drops leftover junk from scraped pages).
+SUMMARY_MAX_INPUT_TOKENS = int(os.getenv("SUMMARY_MAX_INPUT_TOKENS", 8000))
+# Size of each chunk in the map-reduce path.
+SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", 2500))
+# Articles at or under this size get the compact "brief" prompt.
+SHORT_ARTICLE_TOKENS = int(os.getenv("SHORT_ARTICLE_TOKENS", 250))
+
+# Roughly how Gemini's SentencePiece tokenizer splits English news text:
+# words of up to ~6 letters are one token, longer words two or more, every
+# punctuation mark and digit group its own token.
+_TOKEN_PATTERN = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])[\"'”’)\]]*\s+(?=[\"'“‘(\[]?[A-Z0-9])")
+_WORD = re.compile(r"[a-z][a-z'-]+")
+
+STOP_WORDS = frozenset("""
+a an and are as at be been but by can could did do does for from had has have he her his i if in into is it its
+just more most no not of on or our out over said says she so than that the their them then there these they this
+those to up was we were what when which who will with would you your also after about all new one two
+""".split())
+
+
+def count_tokens(text: str) -> int:
+    """
+    Estimates the number of Gemini input tokens in `text` without a network
+    call. Close enough for budgeting; use the model's count_tokens API when
+    an exact figure matters.
+    """
+    if not text:
+        return 0
+    return sum(1 + len(piece) // 7 for piece in _TOKEN_PATTERN.findall(text))
+
+
+def split_sentences(text: str) -> list[tuple[int, str]]:
+    """Splits cleaned article text into (paragraph index, sentence) pairs."""
+    sentences = []
+    for p_index, paragraph in enumerate(p for p in re.split(r"\n\s*\n", text) if p.strip()):
+        for sentence in _SENTENCE_SPLIT.split(paragraph.strip()):
+            sentence = " ".join(sentence.split())
+            if sentence:
+                sentences.append((p_index, sentence))
+    return sentences
+
+
+def _salience_scores(sentences: list[tuple[int, str]]) -> list[float]:
+    """
+    Scores each sentence by how many of the article's frequent content words
+    it carries (normalised by length), with a bonus for the lead paragraphs
+    and penalties for fragments and repeated sentences.
+    """
+    words_per_sentence = [[w for w in _WORD.findall(s.lower()) if w not in STOP_WORDS] for _, s in sentences]
+    frequencies = Counter(w for words in words_per_sentence for w in set(words))
+    if not frequencies:
+        return [0.0] * len(sentences)
+    top = max(frequencies.values())
+
+    scores, seen = [], set()
+    for (p_index, sentence), words in zip(sentences, words_per_sentence):
+        if not words:
+            scores.append(0.0)
+            continue
+        score = sum(frequencies[w] / top for w in words) / math.sqrt(len(words))
+        score *= 1.0 + 0.5 / (1 + p_index)          # news puts the key facts first
+        if len(words) < 4:
+            score *= 0.3                              # headings, bylines, menu leftovers
+        key = sentence.lower()
+        if key in seen:
+            score = 0.0                               # duplicated boilerplate
+        seen.add(key)
+        scores.append(score)
+    return scores
+
+
+def truncate_to_tokens(text: str, budget: int) -> str:
+    """Cuts `text` after the last token that fits in `budget` tokens, by count_tokens()."""
+    used, end = 0, 0
+    for match in _TOKEN_PATTERN.finditer(text):
+        used += 1 + len(match.group()) // 7
+        if used > budget:
+            break
+        end = match.end()
+    return text[:end]
+
+
+def trim_to_budget(text: str, budget: int = SUMMARY_TOKEN_BUDGET) -> str:
+    """
+    Keeps the most salient sentences of `text` that fit in `budget` tokens,
+    in their original order and paragraphs. Text already within budget is
+    returned unchanged; when no sentence fits (one run-on sentence, or
+    nothing scores), the start of the text is kept instead.
+    """
+    if count_tokens(text) <= budget:
+        return text
+    sentences = split_sentences(text)
+    scores = _salience_scores(sentences)
+    costs = [count_tokens(s) + 1 for _, s in sentences]
+
+    keep, used = set(), 0
+    for index in sorted(range(len(sentences)), key=lambda i: scores[i], reverse=True):
+        if scores[index] <= 0:
+            break
+        if used + costs[index] <= budget:
+            keep.add(index)
+            used += costs[index]
+    if not keep:
+        return truncate_to_tokens(text, budget)
+
+    paragraphs = {}
+    for index in sorted(keep):
+        p_index, sentence = sentences[index]
+        paragraphs.setdefault(p_index, []).append(sentence)
+    return "\n\n".join(" ".join(parts) for _, parts in sorted(paragraphs.items()))
+
+
+def split_into_chunks(text: str, chunk_tokens: int = SUMMARY_CHUNK_TOKENS) -> list[str]:
+    """Splits text into chunks of about `chunk_tokens`, on sentence boundaries."""
+    chunks, current, used = [], [], 0
+    last_paragraph = None
+    for p_index, sentence in split_sentences(text):
+        cost = count_tokens(sentence) + 1
+        if current and used + cost > chunk_tokens:
+            chunks.append("".join(current).strip())
+            current, used, last_paragraph = [], 0, None
+        separator = "" if last_paragraph is None else (" " if p_index == last_paragraph else "\n\n")
+        current.append(separator + sentence)
+        used += cost
+        last_paragraph = p_index
+    if current:
+        chunks.append("".join(current).strip())
+    return chunks
+
+
+def plan_summary(text: str) -> tuple[str, list[str]]:
+    """
+    Decides how an article is summarized.
+
+    Returns:
+        tuple: (mode, pieces) where mode is 'brief' (short article, compact
+        prompt), 'single' (one call on the text, trimmed to the budget if
+        needed) or 'map_reduce' (one call per chunk, then a combining call).
+    """
+    tokens = count_tokens(text)
+    if tokens <= SHORT_ARTICLE_TOKENS:
+        return "brief", [text]
+    if tokens <= SUMMARY_TOKEN_BUDGET:
+        return "single", [text]
+    if tokens <= SUMMARY_MAP_REDUCE_TOKENS:
+        return "single", [trim_to_budget(text, SUMMARY_TOKEN_BUDGET)]
+    chunks = split_into_chunks(trim_to_budget(text, SUMMARY_MAX_INPUT_TOKENS))
+    if len(chunks) == 1:
+        return "single", chunks
+    return "map_reduce", chunks
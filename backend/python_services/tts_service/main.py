@@ -1,7 +1,7 @@
 import sys
 import os
 from fastapi import FastAPI, Request, Depends, HTTPException, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.security import OAuth2PasswordBearer
 from kokoro import KPipeline
 import soundfile as sf
@@ -35,6 +35,11 @@ except Exception as e:
     print(f"FATAL: Error initializing Firebase for auth: {e}")
     verify_firebase_token = None
 
+from shared.observability.metrics import metrics, PROMETHEUS_CONTENT_TYPE
+from shared.observability.profiling import register_fastapi_profiling, run_in_threadpool_profiled
+from shared.runtime.admission import AdmissionController, AdmissionRejected, parse_lane, parse_deadline
+from speech_cache import CachedSpeechPipeline, SAMPLE_RATE
+
 # --- Model Loading ---
 try:
     print("Loading Kokoro TTS model...")
@@ -44,8 +49,27 @@ except Exception as e:
     print(f"FATAL: Could not load Kokoro model. Error: {e}")
     pipeline = None
 
+# --- Phoneme & Audio Cache (see speech_cache.py) ---
+TTS_CACHE_ENABLED = os.environ.get("TTS_CACHE_ENABLED", "true").lower() == "true"
+speech = CachedSpeechPipeline(pipeline) if pipeline and TTS_CACHE_ENABLED else None
+
+# --- Admission Control (see shared/runtime/admission.py) ---
+# One synthesis at a time by default: Kokoro already uses every core for one request.
+tts_admission = AdmissionController.from_env("tts", "TTS", max_in_flight=1, max_queue=4)
+
+
+def synthesize(text: str) -> np.ndarray:
+    """Runs the model for `text`; called on a worker thread so the event loop keeps admitting and rejecting."""
+    if speech:
+        # Only sentences not spoken before reach the model
+        return speech.synthesize(text, voice="af_heart", speed=1)
+    all_audio = [audio for _, _, audio in pipeline(text, voice="af_heart", speed=1)]
+    return np.concatenate(all_audio) if all_audio else np.zeros(0)
+
 # --- FastAPI App & Auth Setup ---
 app = FastAPI()
+# Opt-in /debug/profile endpoints (PROFILING_ENABLED=true, internal token)
+register_fastapi_profiling(app)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 async def get_authenticated_user(token: str = Depends(oauth2_scheme)):
@@ -70,6 +94,19 @@ def health_check():
     else:
         return {"status": "error", "message": "TTS model failed to load"}, 503
 
+# --- Metrics Endpoint (Public, Prometheus text format) ---
+@app.get("/metrics")
+def metrics_endpoint():
+    return Response(metrics.render_prometheus(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+# --- Speech Cache Statistics (Public) ---
+@app.get("/tts/cache")
+def cache_stats():
+    """Hit rates, estimated time saved and memory use of the phoneme and audio caches."""
+    if not speech:
+        return {"enabled": False}
+    return {"enabled": True, **speech.stats()}
+
 # --- TTS Generation Endpoint ---
 @app.post("/tts")
 async def generate_tts(request: Request):
@@ -89,18 +126,16 @@ async def generate_tts(request: Request):
             return JSONResponse({"error": "No text provided"}, status_code=400)
 
         print(f"🗣️ Generating speech for: {text[:60]}...")
-        generator = pipeline(text, voice="af_heart", speed=1)
-
-        all_audio = []
-        for i, (_, _, audio) in enumerate(generator):
-            all_audio.append(audio)
+        metrics.count_bytes("tts", len(text))
+        async with tts_admission.admit_async(parse_lane(request.headers), parse_deadline(request.headers)) as slot:
+            with metrics.timed("tts"):
+                full_audio = await slot.shield(run_in_threadpool_profiled(synthesize, text))
 
-        if not all_audio:
+        if not len(full_audio):
             print("No audio generated.")
             return JSONResponse({"error": "No audio could be generated"}, status_code=500)
 
-        full_audio = np.concatenate(all_audio)
-        sample_rate = 24000  # Default sample rate for kokoro
+        sample_rate = SAMPLE_RATE
 
         print("Full audio generated. Encoding to Base64...")
 
@@ -112,6 +147,7 @@ async def generate_tts(request: Request):
         audio_base64 = base64.b64encode(audio_binary).decode('utf-8')
 
         print("Audio encoded successfully.")
+        metrics.count_items("tts")
         
         # 5. Return JSON with the Base64 string
         return JSONResponse({
@@ -120,8 +156,11 @@ async def generate_tts(request: Request):
         })
         # --- END OF MODIFICATION ---
 
+    except AdmissionRejected as e:
+        return JSONResponse(e.body(), status_code=e.status, headers=e.headers())
     except Exception as e:
         print(f"Error in TTS generation: {e}")
+        metrics.count_error("tts")
         return JSONResponse({"error": str(e)}, status_code=500)
 
 if __name__ == '__main__':
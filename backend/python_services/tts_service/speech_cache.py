@@ -0,0 +1,187 @@
+import os
+import re
+import time
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from shared.observability.metrics import metrics
+
+# --- Configuration ---
+# Byte budgets of the two cache levels (0 disables a level)
+TTS_PHONEME_CACHE_BYTES = int(os.getenv("TTS_PHONEME_CACHE_BYTES", 16 * 1024 * 1024))
+TTS_AUDIO_CACHE_BYTES = int(os.getenv("TTS_AUDIO_CACHE_BYTES", 256 * 1024 * 1024))
+SAMPLE_RATE = 24000  # Kokoro's output rate
+
+# Sentence ends; the text is split into paragraphs (like Kokoro's own
+# split_pattern) and then into sentences, which are the units of reuse.
+_SENTENCE_END = re.compile(r'(?:(?<=[.!?…])|(?<=[.!?…]["\')\]]))\s+')
+
+
+def split_segments(text: str) -> list[str]:
+    """Splits text into whitespace-normalised sentences, in order."""
+    segments = []
+    for paragraph in re.split(r'\n+', text):
+        for sentence in _SENTENCE_END.split(paragraph):
+            sentence = " ".join(sentence.split())
+            if sentence:
+                segments.append(sentence)
+    return segments
+
+
+class ByteBudgetLRU:
+    """
+    Thread-safe LRU map bounded by the total size of its values. Each entry
+    is stored with its size in bytes; the least recently used entries are
+    evicted once the budget is exceeded. Values larger than the whole budget
+    are not stored.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> (size, value)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, value, size: int):
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[0]
+            self._entries[key] = (size, value)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                evicted_size, _ = self._entries.popitem(last=False)[1]
+                self.bytes -= evicted_size
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "bytes": self.bytes, "max_bytes": self.max_bytes,
+                "evictions": self.evictions}
+
+
+class CachedSpeechPipeline:
+    """
+    Wraps a Kokoro KPipeline with a two-level cache, so repeated and
+    partially overlapping texts only pay for the sentences not seen before:
+
+      1. segment -> phonemes: grapheme-to-phoneme conversion (misaki) and
+         Kokoro's chunking of one sentence, keyed by its normalised text.
+      2. (phonemes, voice, speed) -> 16-bit PCM: the model inference for
+         one phoneme chunk, via KPipeline.generate_from_tokens().
+
+    Summaries repeat boilerplate sentences, and articles are replayed, so
+    level 2 hits skip the model entirely. Level 1 also pays off when the
+    same sentence is spoken with another voice or speed.
+
+    Sentences are synthesized one at a time, so prosody does not carry
+    across sentence boundaries (Kokoro would otherwise chunk a paragraph
+    at up to 510 phonemes).
+    """
+
+    def __init__(self, pipeline, phoneme_bytes: int = TTS_PHONEME_CACHE_BYTES,
+                 audio_bytes: int = TTS_AUDIO_CACHE_BYTES):
+        self.pipeline = pipeline
+        self.phonemes = ByteBudgetLRU(phoneme_bytes)
+        self.audio = ByteBudgetLRU(audio_bytes)
+        self._lock = threading.Lock()
+        self.counts = {"segment_hits": 0, "segment_misses": 0, "audio_hits": 0, "audio_misses": 0}
+        self.seconds_saved = 0.0   # estimated, from what the cached entries took to compute
+        self.seconds_spent = 0.0
+
+    # --- Level 1 ---
+    def _phonemize(self, segment: str) -> tuple[list[str], float]:
+        started = time.perf_counter()
+        _, tokens = self.pipeline.g2p(segment)
+        chunks = [ps for _, ps, _ in self.pipeline.en_tokenize(tokens) if ps]
+        return chunks, time.perf_counter() - started
+
+    def phonemes_for(self, segment: str) -> list[str]:
+        cached = self.phonemes.get(segment)
+        if cached is not None:
+            self._record("segment", hit=True, seconds=cached[1])
+            return cached[0]
+        chunks, seconds = self._phonemize(segment)
+        self._record("segment", hit=False, seconds=seconds)
+        size = len(segment.encode("utf-8")) + sum(len(ps.encode("utf-8")) for ps in chunks) + 64
+        self.phonemes.put(segment, (chunks, seconds), size)
+        return chunks
+
+    # --- Level 2 ---
+    def _synthesize(self, phonemes: str, voice: str, speed: float) -> tuple[np.ndarray, float]:
+        started = time.perf_counter()
+        parts = []
+        for result in self.pipeline.generate_from_tokens(phonemes, voice=voice, speed=speed):
+            audio = result.audio
+            if audio is None:
+                continue
+            if hasattr(audio, "detach"):  # torch tensor
+                audio = audio.detach().cpu().numpy()
+            parts.append(np.clip(np.asarray(audio, dtype=np.float32) * 32767, -32768, 32767).astype(np.int16))
+        pcm = np.concatenate(parts) if parts else np.zeros(0, dtype=np.int16)
+        return pcm, time.perf_counter() - started
+
+    def audio_for(self, phonemes: str, voice: str, speed: float) -> np.ndarray:
+        key = (phonemes, voice, float(speed))
+        cached = self.audio.get(key)
+        if cached is not None:
+            self._record("audio", hit=True, seconds=cached[1])
+            return cached[0]
+        pcm, seconds = self._synthesize(phonemes, voice, speed)
+        self._record("audio", hit=False, seconds=seconds)
+        self.audio.put(key, (pcm, seconds), pcm.nbytes + len(phonemes.encode("utf-8")) + 64)
+        return pcm
+
+    # --- Requests ---
+    def synthesize(self, text: str, voice: str = "af_heart", speed: float = 1) -> np.ndarray:
+        """
+        Returns the speech for `text` as 16-bit PCM at SAMPLE_RATE, built
+        from cached sentences where possible.
+        """
+        parts = []
+        for segment in split_segments(text):
+            for phonemes in self.phonemes_for(segment):
+                parts.append(self.audio_for(phonemes, voice, speed))
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.int16)
+
+    def _record(self, level: str, hit: bool, seconds: float):
+        with self._lock:
+            self.counts[f"{level}_{'hits' if hit else 'misses'}"] += 1
+            if hit:
+                self.seconds_saved += seconds
+            else:
+                self.seconds_spent += seconds
+        metrics.count_cache(f"tts_{level}", hit=hit)
+        if hit:
+            metrics.inc("tts_cache_seconds_saved_total", seconds, level=level)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self.counts)
+            saved, spent = self.seconds_saved, self.seconds_spent
+        segments = counts["segment_hits"] + counts["segment_misses"]
+        chunks = counts["audio_hits"] + counts["audio_misses"]
+        return {
+            **counts,
+            "segment_hit_rate": round(counts["segment_hits"] / segments, 4) if segments else 0.0,
+            "audio_hit_rate": round(counts["audio_hits"] / chunks, 4) if chunks else 0.0,
+            "seconds_saved": round(saved, 3),
+            "seconds_spent": round(spent, 3),
+            "phoneme_cache": self.phonemes.stats(),
+            "audio_cache": self.audio.stats(),
+        }
@@ -1,7 +1,28 @@
+"""
+Keyword Backfill
+----------------
+Recomputes the 'keywords' array of every article with the shared TF-IDF
+extractor (shared/search/keywords.py), replacing the old unbounded arrays
+of every unique word.
+
+Runs in two passes so every article is ranked against the whole corpus:
+  1. Reads the articles page by page (only the fields keywords are built
+     from), analyzes each page and adds it to the local document-frequency
+     table.
+  2. Selects each article's top terms, one DF lookup per page, and writes
+     the arrays back in bulk (500 writes per batch), skipping articles whose
+     keywords did not change.
+
+Each article is read once. The analyzed term counts are kept in memory
+between the passes.
+
+Usage:
+    python backfill_keywords.py [--page-size 500] [--only-missing] [--limit N] [--dry-run]
+"""
+
 import sys
 import os
-import re
-import string
+import argparse
 from dotenv import load_dotenv
 
 # --- Path Setup ---
@@ -18,97 +39,111 @@ if os.path.exists(env_path):
 else:
     print("WARNING: .env file not found at project root.")
 
-# --- Import Firestore Client ---
+# --- Import Shared Modules ---
 try:
-    from shared.database.firestore_client import db
+    from shared.database.firestore_client import get_db
+    from shared.search.keywords import get_keyword_extractor
+    from shared.storage.content_store import load_body
 except ImportError as e:
     print(f"FATAL: Could not import shared modules. Error: {e}")
     sys.exit(1)
 
-# A simple list of common "stop words" to ignore in keywords
-STOP_WORDS = set([
-    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'he',
-    'in', 'is', 'it', 'its', 'of', 'on', 'that', 'the', 'to', 'was', 'were', 'will', 'with'
-])
+WRITE_BATCH_SIZE = 500  # Firestore's limit per batch
+SOURCE_FIELDS = ['title', 'description', 'content', 'content_ref', 'keywords']
 
-def _generate_keywords(title: str, description: str) -> list[str]:
-    """
-    Generates a list of unique, lowercase keywords from a title and description
-    for Firestore 'array-contains-any' search.
-    """
-    if not title: title = ""
-    if not description: description = ""
-    full_text = title + " " + description
-    full_text = full_text.lower().translate(str.maketrans('', '', string.punctuation))
-    words = re.split(r'\s+', full_text)
-    keywords = list(set(word for word in words if word and word not in STOP_WORDS and len(word) > 2))
-    return keywords
-
-def backfill_keywords():
+
+def read_pages(db, page_size: int, limit: int | None = None):
+    """Yields lists of article snapshots (only SOURCE_FIELDS), in document ID order."""
+    last, read = None, 0
+    while limit is None or read < limit:
+        size = page_size if limit is None else min(page_size, limit - read)
+        query = db.collection('articles').order_by('__name__').select(SOURCE_FIELDS).limit(size)
+        if last is not None:
+            query = query.start_after(last)
+        page = list(query.stream())
+        if not page:
+            return
+        yield page
+        read += len(page)
+        last = page[-1]
+        if len(page) < size:
+            return
+
+
+def backfill_keywords(page_size: int = 500, only_missing: bool = False, limit: int | None = None,
+                      dry_run: bool = False):
     """
-    Reads existing articles from Firestore, generates a 'keywords' array
-    for those that don't have one, and updates them.
+    Recomputes article keywords for the whole collection (see module docstring).
     """
     print("\n" + "=" * 45)
     print("  STARTING KEYWORD BACKFILL PROCESS")
     print("=" * 45)
 
-    processed_count = 0
-    skipped_count = 0
+    db = get_db()
+    extractor = get_keyword_extractor()
 
-    try:
-        # Use a write batch for efficient updates
-        batch = db.batch()
-        
-        print("Fetching articles missing the 'keywords' field from Firestore...")
-        # Query for articles where the 'keywords' field does NOT exist
-        articles_snapshot = db.collection('articles').where('keywords', '==', None).stream()
-
-        for doc in articles_snapshot:
-            article_data = doc.to_dict()
-            doc_id = doc.id
-
-            print(f"\nProcessing article ID: {doc_id} (Title: {article_data.get('title', 'N/A')[:50]}...)")
-
-            title = article_data.get('title')
-            desc = article_data.get('description') or article_data.get('content')
-            
-            if title or desc:
-                # 1. Generate Keywords
-                keywords = _generate_keywords(title, desc)
-                
-                # 2. Add to batch for update
-                doc_ref = db.collection('articles').document(doc_id)
-                batch.update(doc_ref, {'keywords': keywords})
-                processed_count += 1
-                
-                print(f"  -> Generated {len(keywords)} keywords. Added to batch.")
-                
-                # Commit the batch every 100 articles to avoid memory issues
-                if processed_count % 100 == 0:
-                    print(f"--- Committing batch of {processed_count} articles ---")
-                    batch.commit()
-                    batch = db.batch() # Start a new batch
-            
-            else:
-                print("  -> Skipping: No 'title' or 'description' to generate keywords from.")
+    # --- Pass 1: read, analyze, learn document frequencies ---
+    analyzed, current = {}, {}
+    skipped_count = 0
+    for page in read_pages(db, page_size, limit):
+        documents = {}
+        for doc in page:
+            data = doc.to_dict() or {}
+            if only_missing and data.get('keywords'):
+                continue
+            body = load_body(data)
+            if not (data.get('title') or data.get('description') or body):
                 skipped_count += 1
+                continue
+            documents[doc.id] = {'title': data.get('title'), 'description': data.get('description'), 'body': body}
+            current[doc.id] = data.get('keywords') or []
+        page_analyzed = extractor.analyze_many(documents)
+        analyzed.update(page_analyzed)
+        if dry_run:
+            # The corpus table is local state too; a dry run previews against it as it is
+            print(f"  -> Read {len(page)} articles.")
+            continue
+        new_docs = extractor.learn(page_analyzed)
+        print(f"  -> Read {len(page)} articles ({new_docs} new to the keyword corpus).")
+    print(f"Analyzed {len(analyzed)} articles; corpus now has {extractor.df_table.doc_count()} documents.")
 
-        # Commit any remaining articles in the last batch
-        if processed_count % 100 != 0:
-            print(f"--- Committing final batch of articles ---")
-            batch.commit()
+    # --- Pass 2: select top terms and write back in bulk ---
+    doc_ids = list(analyzed)
+    updated_count = unchanged_count = 0
+    old_total = new_total = 0
+    for start in range(0, len(doc_ids), WRITE_BATCH_SIZE):
+        chunk = doc_ids[start:start + WRITE_BATCH_SIZE]
+        keywords = extractor.select_many({doc_id: analyzed[doc_id] for doc_id in chunk})
+        batch, changed = db.batch(), []
+        for doc_id in chunk:
+            old_total += len(current[doc_id])
+            new_total += len(keywords[doc_id])
+            if sorted(keywords[doc_id]) == sorted(current[doc_id]):
+                unchanged_count += 1
+                continue
+            batch.update(db.collection('articles').document(doc_id), {'keywords': keywords[doc_id]})
+            changed.append(doc_id)
 
-    except Exception as e:
-        print(f"\n--- AN ERROR OCCURRED DURING FIRESTORE STREAM ---")
-        print(f"Error: {e}")
-        print("Please check Firestore connection and permissions.")
+        if changed and not dry_run:
+            print(f"--- Committing batch of {len(changed)} articles ---")
+            batch.commit()
+        updated_count += len(changed)
 
     print("\n" + "=" * 45)
-    print("  KEYWORD BACKFILL PROCESS FINISHED")
-    print(f"  Successfully processed: {processed_count}")
+    print("  KEYWORD BACKFILL PROCESS FINISHED" + (" (dry run, nothing written)" if dry_run else ""))
+    print(f"  Updated: {updated_count}")
+    print(f"  Unchanged: {unchanged_count}")
     print(f"  Skipped (no content): {skipped_count}")
+    if analyzed:
+        print(f"  Keywords per article: {old_total / len(analyzed):.1f} -> {new_total / len(analyzed):.1f}")
     print("=" * 45)
 
+
 if __name__ == "__main__":
-    backfill_keywords()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Recompute article keywords with TF-IDF.")
+    parser.add_argument("--page-size", type=int, default=500, help="Articles read per Firestore query.")
+    parser.add_argument("--only-missing", action="store_true", help="Only articles without keywords.")
+    parser.add_argument("--limit", type=int, help="Stop after reading this many articles.")
+    parser.add_argument("--dry-run", action="store_true", help="Report the changes without writing them.")
+    args = parser.parse_args()
+    backfill_keywords(args.page_size, args.only_missing, args.limit, args.dry_run)
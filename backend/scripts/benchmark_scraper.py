@@ -0,0 +1,92 @@
+"""
+Scraper Throughput Benchmark
+----------------------------
+Runs the async Jina scraper against a local mock Reader server to show how
+scrape throughput scales with concurrency, without touching the real API.
+
+The mock server answers like r.jina.ai ({"data": {"content": ...}}) after a
+random latency, and fails a configurable share of requests with 429/503 so
+the retry path is exercised too.
+
+Usage:
+    python benchmark_scraper.py --urls 200 --concurrency 1 2 4 8 16 32
+"""
+
+import sys
+import os
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# --- Path Setup ---
+current_dir = os.path.dirname(__file__)
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+sys.path.append(os.path.join(project_root, 'python_services', 'data_fetcher'))
+
+from sources import jina_scraper
+
+
+class MockReaderHandler(BaseHTTPRequestHandler):
+    """Mimics the Jina Reader API: GET /<article url> -> JSON with Markdown content."""
+
+    latency = (0.05, 0.3)
+    error_rate = 0.05
+
+    def do_GET(self):
+        time.sleep(random.uniform(*self.latency))
+        if random.random() < self.error_rate:
+            self.send_response(random.choice([429, 503]))
+            self.send_header("Retry-After", "0.1")
+            self.end_headers()
+            return
+        body = json.dumps({"data": {"content": f"# Article\n\nMock content for {self.path}.\n" * 20}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_mock_server() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockReaderHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark scraper throughput against a local mock server.")
+    parser.add_argument("--urls", type=int, default=200)
+    parser.add_argument("--hosts", type=int, default=20, help="Distinct article hosts in the URL set.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    args = parser.parse_args()
+
+    MockReaderHandler.error_rate = args.error_rate
+    server = start_mock_server()
+    reader_url = f"http://127.0.0.1:{server.server_address[1]}/"
+    os.environ.setdefault("JINA_API_KEY", "benchmark")
+    # Keep retries quick so the benchmark measures throughput, not sleeps.
+    jina_scraper.RETRY_BASE_DELAY = 0.05
+
+    urls = [f"https://site{i % args.hosts}.example.com/news/{i}" for i in range(args.urls)]
+    print(f"{'concurrency':>11} {'seconds':>9} {'urls/s':>9} {'ok':>6}")
+    for concurrency in args.concurrency:
+        started = time.perf_counter()
+        results = jina_scraper.asyncio.run(
+            jina_scraper.scrape_many(urls, max_concurrency=concurrency, reader_url=reader_url, use_cache=False)
+        )
+        elapsed = time.perf_counter() - started
+        ok = sum(1 for content in results.values() if content)
+        print(f"{concurrency:>11} {elapsed:>9.2f} {len(urls) / elapsed:>9.1f} {ok:>6}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
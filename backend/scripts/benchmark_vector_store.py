@@ -0,0 +1,147 @@
+"""
+Vector Store Benchmark
+----------------------
+Compares the ChromaDB backend against the in-process LocalVectorStore on
+synthetic, clustered embeddings: build time, query throughput (QPS),
+recall@k against exact brute-force search, and peak RSS.
+
+Each (backend, size) run happens in its own subprocess so the RSS numbers
+are not polluted by the previous run.
+
+Usage:
+    python benchmark_vector_store.py --sizes 10000 100000 1000000 --dim 768
+"""
+
+import sys
+import os
+import json
+import time
+import argparse
+import tempfile
+import resource
+import multiprocessing as mp
+import numpy as np
+
+# --- Path Setup ---
+current_dir = os.path.dirname(__file__)
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+python_services_dir = os.path.join(project_root, 'python_services')
+sys.path.append(python_services_dir)
+
+CATEGORIES = ['business', 'entertainment', 'general', 'health', 'science', 'sports', 'technology']
+CHROMA_MAX_BATCH = 5000
+
+
+# ---------------- DATA ----------------
+def make_dataset(size: int, dim: int, n_queries: int, seed: int = 42):
+    """Clustered vectors (one cluster per category) so ANN recall is meaningful."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(len(CATEGORIES), dim)).astype(np.float32)
+    labels = rng.integers(0, len(CATEGORIES), size=size)
+    vectors = centers[labels] + rng.normal(scale=0.8, size=(size, dim)).astype(np.float32)
+    queries = centers[rng.integers(0, len(CATEGORIES), size=n_queries)] + \
+        rng.normal(scale=0.8, size=(n_queries, dim)).astype(np.float32)
+    return vectors.astype(np.float32), labels, queries.astype(np.float32)
+
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, k: int, block: int = 65536) -> list[set]:
+    """Exact squared-L2 top-k, computed in blocks to bound memory."""
+    best_d = np.full((len(queries), k), np.inf, dtype=np.float32)
+    best_i = np.zeros((len(queries), k), dtype=np.int64)
+    q_norms = np.einsum("ij,ij->i", queries, queries)[:, None]
+    for start in range(0, len(vectors), block):
+        chunk = vectors[start:start + block]
+        d = q_norms - 2 * queries @ chunk.T + np.einsum("ij,ij->i", chunk, chunk)[None, :]
+        all_d = np.concatenate([best_d, d], axis=1)
+        all_i = np.concatenate([best_i, np.arange(start, start + len(chunk))[None, :].repeat(len(queries), 0)], axis=1)
+        top = np.argpartition(all_d, k - 1, axis=1)[:, :k]
+        best_d = np.take_along_axis(all_d, top, axis=1)
+        best_i = np.take_along_axis(all_i, top, axis=1)
+    return [set(f"doc-{i}" for i in row) for row in best_i]
+
+
+# ---------------- BACKENDS ----------------
+def _build_store(backend: str, path: str):
+    if backend == "local":
+        from shared.database.local_vector_store import LocalVectorStore
+        return LocalVectorStore(path=path, space="l2")
+
+    import chromadb
+    from shared.database.vector_store import ChromaVectorStore
+    client = chromadb.PersistentClient(path=path)
+    return ChromaVectorStore(client.get_or_create_collection(name="benchmark"))
+
+
+def _run_one(backend: str, size: int, dim: int, k: int, n_queries: int, result_queue):
+    vectors, labels, queries = make_dataset(size, dim, n_queries)
+    ids = [f"doc-{i}" for i in range(size)]
+    metadatas = [{"category": CATEGORIES[label]} for label in labels]
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    with tempfile.TemporaryDirectory() as path:
+        store = _build_store(backend, path)
+
+        start = time.perf_counter()
+        for offset in range(0, size, CHROMA_MAX_BATCH):
+            end = offset + CHROMA_MAX_BATCH
+            store.add(ids[offset:end], vectors[offset:end].tolist() if backend == "chroma" else vectors[offset:end],
+                      metadatas[offset:end])
+        store.persist()
+        build_seconds = time.perf_counter() - start
+
+        del vectors
+        start = time.perf_counter()
+        returned = [store.query([q.tolist()], n_results=k)["ids"][0] for q in queries]
+        query_seconds = time.perf_counter() - start
+
+    result_queue.put({
+        "returned": returned,
+        "build_seconds": round(build_seconds, 2),
+        "qps": round(n_queries / query_seconds, 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "rss_before_build_mb": round(rss_before / 1024, 1),
+    })
+
+
+def run_benchmark(backend: str, size: int, dim: int, k: int, n_queries: int) -> dict:
+    ctx = mp.get_context("spawn")
+    result_queue = ctx.Queue()
+    process = ctx.Process(target=_run_one, args=(backend, size, dim, k, n_queries, result_queue))
+    process.start()
+    result = result_queue.get()
+    process.join()
+
+    vectors, _, queries = make_dataset(size, dim, n_queries)
+    truth = exact_top_k(vectors, queries, k)
+    recall = np.mean([len(truth[i] & set(ids)) / k for i, ids in enumerate(result.pop("returned"))])
+    return {"backend": backend, "size": size, "recall_at_k": round(float(recall), 4), **result}
+
+
+# ---------------- MAIN ----------------
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ChromaDB vs the local vector store.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--backends", nargs="+", default=["chroma", "local"])
+    parser.add_argument("--output", help="Optional path to write the results as JSON.")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'backend':<8} {'size':>9} {'build s':>9} {'QPS':>9} {'recall':>8} {'peak RSS MB':>12}")
+    for size in args.sizes:
+        for backend in args.backends:
+            row = run_benchmark(backend, size, args.dim, args.k, args.queries)
+            results.append(row)
+            print(f"{backend:<8} {size:>9} {row['build_seconds']:>9} {row['qps']:>9} "
+                  f"{row['recall_at_k']:>8} {row['peak_rss_mb']:>12}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
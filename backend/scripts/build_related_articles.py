@@ -0,0 +1,239 @@
+"""
+Related Articles Graph Builder
+------------------------------
+Offline job that runs after embeddings exist. For every article vector in
+the vector store it finds the top-k most similar other articles (cosine
+similarity, computed in NumPy blocks) and writes them to the article's
+Firestore document as a compact `related_ids` list.
+
+Runs incrementally: the neighbour lists from previous runs are kept in a
+local state file, so a run only
+  * searches the full corpus for articles it has not seen before, and
+  * checks existing articles against the new ones, rewriting an existing
+    article's list only if a new article displaces one of its neighbours.
+
+Usage:
+    python build_related_articles.py [--k 8] [--full]
+"""
+
+import sys
+import os
+import argparse
+from datetime import datetime
+import numpy as np
+from dotenv import load_dotenv
+
+# --- Path Setup ---
+current_dir = os.path.dirname(__file__)
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+python_services_dir = os.path.join(project_root, 'python_services')
+sys.path.append(python_services_dir)
+
+# --- Load Environment Variables ---
+env_path = os.path.join(project_root, '.env')
+if os.path.exists(env_path):
+    load_dotenv(dotenv_path=env_path)
+
+DEFAULT_STATE_PATH = os.path.join(project_root, 'related_graph.npz')
+QUERY_BLOCK = 512        # query rows per matrix product
+CANDIDATE_BLOCK = 65536  # candidate columns per matrix product
+FIRESTORE_BATCH_SIZE = 400
+
+
+# ---------------- VECTOR MATH ----------------
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+def block_top_k(queries: np.ndarray, candidates: np.ndarray, k: int,
+                self_columns: np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Top-k candidates by dot product for each query row, scanning the
+    candidate matrix in column blocks so memory stays bounded.
+
+    self_columns[r] is the candidate column holding query r itself (or -1),
+    which is excluded. Returns (columns, scores) sorted by descending score;
+    missing slots have column -1 and score -inf.
+    """
+    n_queries = len(queries)
+    best_scores = np.full((n_queries, k), -np.inf, dtype=np.float32)
+    best_columns = np.full((n_queries, k), -1, dtype=np.int64)
+    rows = np.arange(n_queries)
+
+    for start in range(0, len(candidates), CANDIDATE_BLOCK):
+        block = candidates[start:start + CANDIDATE_BLOCK]
+        scores = queries @ block.T
+        if self_columns is not None:
+            inside = (self_columns >= start) & (self_columns < start + len(block))
+            scores[rows[inside], self_columns[inside] - start] = -np.inf
+
+        all_scores = np.concatenate([best_scores, scores], axis=1)
+        all_columns = np.concatenate(
+            [best_columns, np.broadcast_to(np.arange(start, start + len(block)), scores.shape)], axis=1
+        )
+        top = np.argpartition(-all_scores, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(all_scores, top, axis=1)
+        best_columns = np.take_along_axis(all_columns, top, axis=1)
+
+    order = np.argsort(-best_scores, axis=1)
+    best_scores = np.take_along_axis(best_scores, order, axis=1)
+    best_columns = np.take_along_axis(best_columns, order, axis=1)
+    best_columns[~np.isfinite(best_scores)] = -1
+    return best_columns, best_scores
+
+
+# ---------------- STATE ----------------
+def load_state(path: str) -> tuple[dict, int | None]:
+    """
+    Returns ({doc_id: (neighbor_ids, scores)}, k) from the previous run, or
+    ({}, None) if there is none.
+    """
+    if not os.path.exists(path):
+        return {}, None
+    stored = np.load(path, allow_pickle=False)
+    ids = stored["ids"].tolist()
+    state = {}
+    for doc_id, neighbor_rows, scores in zip(ids, stored["neighbors"], stored["scores"]):
+        keep = neighbor_rows >= 0
+        state[doc_id] = ([ids[r] for r in neighbor_rows[keep]], scores[keep].tolist())
+    return state, stored["neighbors"].shape[1]
+
+
+def save_state(path: str, state: dict, k: int):
+    ids = list(state)
+    position = {doc_id: i for i, doc_id in enumerate(ids)}
+    neighbors = np.full((len(ids), k), -1, dtype=np.int64)
+    scores = np.full((len(ids), k), -np.inf, dtype=np.float32)
+    for row, doc_id in enumerate(ids):
+        neighbor_ids, neighbor_scores = state[doc_id]
+        for col, (neighbor_id, score) in enumerate(zip(neighbor_ids[:k], neighbor_scores[:k])):
+            if neighbor_id in position:
+                neighbors[row, col] = position[neighbor_id]
+                scores[row, col] = score
+    np.savez_compressed(path, ids=np.array(ids, dtype=str), neighbors=neighbors, scores=scores)
+
+
+# ---------------- GRAPH BUILD ----------------
+def update_related_graph(ids: list[str], vectors: np.ndarray, state: dict, k: int) -> tuple[dict, set]:
+    """
+    Brings the neighbour lists in `state` up to date with the current vectors.
+    Returns (new_state, changed_ids).
+    """
+    position = {doc_id: i for i, doc_id in enumerate(ids)}
+    # Previously seen articles whose neighbours have since been removed are rebuilt from scratch.
+    known = {
+        doc_id for doc_id, (neighbor_ids, _) in state.items()
+        if doc_id in position and all(n in position for n in neighbor_ids)
+    }
+    fresh_rows = np.array([i for i, doc_id in enumerate(ids) if doc_id not in known], dtype=np.int64)
+    known_rows = np.array([position[doc_id] for doc_id in known], dtype=np.int64)
+    new_state = {doc_id: state[doc_id] for doc_id in known}
+    changed = set()
+
+    # 1. Fresh articles: search the whole corpus.
+    for start in range(0, len(fresh_rows), QUERY_BLOCK):
+        block_rows = fresh_rows[start:start + QUERY_BLOCK]
+        columns, scores = block_top_k(vectors[block_rows], vectors, k, self_columns=block_rows)
+        for row, row_columns, row_scores in zip(block_rows, columns, scores):
+            keep = row_columns >= 0
+            new_state[ids[row]] = ([ids[c] for c in row_columns[keep]], row_scores[keep].tolist())
+            changed.add(ids[row])
+
+    # 2. Known articles: only the fresh ones can displace an existing neighbour.
+    truly_new_rows = np.array([r for r in fresh_rows if ids[r] not in state], dtype=np.int64)
+    if len(known_rows) and len(truly_new_rows):
+        new_vectors = vectors[truly_new_rows]
+        for start in range(0, len(known_rows), QUERY_BLOCK):
+            block_rows = known_rows[start:start + QUERY_BLOCK]
+            columns, scores = block_top_k(vectors[block_rows], new_vectors, k)
+            for row, row_columns, row_scores in zip(block_rows, columns, scores):
+                doc_id = ids[row]
+                old_ids, old_scores = new_state[doc_id]
+                candidates = dict(zip(old_ids, old_scores))
+                for c, score in zip(row_columns, row_scores):
+                    if c >= 0:
+                        candidates[ids[truly_new_rows[c]]] = float(score)
+                merged = sorted(candidates.items(), key=lambda item: -item[1])[:k]
+                merged_ids = [neighbor_id for neighbor_id, _ in merged]
+                if merged_ids != old_ids:
+                    new_state[doc_id] = (merged_ids, [score for _, score in merged])
+                    changed.add(doc_id)
+
+    return new_state, changed
+
+
+def write_related_ids(db, state: dict, doc_ids: set):
+    """
+    Writes `related_ids` for the given articles using batched Firestore
+    updates. Articles deleted since their vectors were indexed are skipped,
+    as one missing document would fail its whole batch.
+    """
+    articles = db.collection('articles')
+    doc_ids = list(doc_ids)
+    written = missing = 0
+    for start in range(0, len(doc_ids), FIRESTORE_BATCH_SIZE):
+        refs = [articles.document(doc_id) for doc_id in doc_ids[start:start + FIRESTORE_BATCH_SIZE]]
+        existing = {snapshot.id for snapshot in db.get_all(refs, field_paths=['url']) if snapshot.exists}
+        batch = db.batch()
+        for ref in refs:
+            if ref.id not in existing:
+                missing += 1
+                continue
+            batch.update(ref, {
+                'related_ids': state[ref.id][0],
+                'related_updatedAt': datetime.utcnow(),
+            })
+        if existing:
+            batch.commit()
+            written += len(existing)
+            print(f"--- Committed {written} related_ids updates ---")
+    if missing:
+        print(f"Skipped {missing} articles that no longer exist in Firestore.")
+    return written
+
+
+# ---------------- MAIN ----------------
+def main():
+    parser = argparse.ArgumentParser(description="Precompute related articles from article embeddings.")
+    parser.add_argument("--k", type=int, default=8, help="Related articles kept per article.")
+    parser.add_argument("--state", default=DEFAULT_STATE_PATH, help="Path of the incremental state file.")
+    parser.add_argument("--full", action="store_true", help="Ignore previous state and rebuild every list.")
+    parser.add_argument("--dry-run", action="store_true", help="Compute but do not write to Firestore.")
+    args = parser.parse_args()
+
+    print("\n" + "=" * 45)
+    print("  BUILDING RELATED ARTICLES GRAPH")
+    print("=" * 45)
+
+    from shared.database.vector_store import get_vector_store
+    ids, embeddings, _ = get_vector_store().get_all()
+    if not ids:
+        print("No article vectors found. Nothing to do.")
+        return
+    vectors = _normalize(embeddings)
+    print(f"Loaded {len(ids)} article vectors (dim {vectors.shape[1]}).")
+
+    state, state_k = ({}, None) if args.full else load_state(args.state)
+    if state and state_k != args.k:
+        # Lists kept at another k can't be extended incrementally
+        print(f"Previous run kept {state_k} related articles, this one keeps {args.k}: rebuilding every list.")
+        state = {}
+    new_state, changed = update_related_graph(ids, vectors, state, args.k)
+    print(f"{len(changed)} articles have new or changed related lists.")
+
+    if not args.dry_run and changed:
+        from shared.database.firestore_client import db
+        written = write_related_ids(db, new_state, changed)
+        print(f"Wrote related_ids for {written} articles.")
+
+    if not args.dry_run:
+        save_state(args.state, new_state, args.k)
+
+    print("\n" + "=" * 45)
+    print("  RELATED ARTICLES GRAPH FINISHED")
+    print("=" * 45)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Local Vector Index Maintenance
+------------------------------
+Keeps the time-bucketed local vector index (VECTOR_STORE_BACKEND=local)
+sized to the working set:
+  * folds day shards older than --compact-after-days into week shards
+  * drops shards older than --evict-after-days entirely
+
+Run it after the daily pipeline, e.g.:
+    python compact_vector_index.py --compact-after-days 7 --evict-after-days 90
+"""
+
+import sys
+import os
+import time
+import argparse
+
+# --- Path Setup ---
+current_dir = os.path.dirname(__file__)
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+python_services_dir = os.path.join(project_root, 'python_services')
+sys.path.append(python_services_dir)
+
+from shared.database.local_vector_store import LocalVectorStore, DEFAULT_INDEX_PATH
+
+DAY_SECONDS = 86400
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact and evict old shards of the local vector index.")
+    parser.add_argument("--path", default=DEFAULT_INDEX_PATH, help="Index directory.")
+    parser.add_argument("--compact-after-days", type=float, default=7,
+                        help="Fold day shards older than this into week shards.")
+    parser.add_argument("--evict-after-days", type=float, default=None,
+                        help="Drop shards older than this. Disabled by default.")
+    args = parser.parse_args()
+
+    print("=" * 45)
+    print("  LOCAL VECTOR INDEX MAINTENANCE")
+    print("=" * 45)
+
+    store = LocalVectorStore(path=args.path)
+    before_vectors, before_shards = store.count(), len(store.partitions)
+    now = time.time()
+
+    if args.evict_after_days is not None:
+        store.evict_before(now - args.evict_after_days * DAY_SECONDS)
+    store.compact(now - args.compact_after_days * DAY_SECONDS)
+    store.persist()
+
+    print(f"Vectors: {before_vectors} -> {store.count()}")
+    print(f"Shards:  {before_shards} -> {len(store.partitions)}")
+    print("=" * 45)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Article Body Migration
+----------------------
+Moves article bodies out of the Firestore documents into the content store
+(shared/storage/content_store.py):
+  * 'full_clean_content' (the raw scrape) is stored as a compressed blob,
+    replaced by 'raw_content_ref' and deleted from the document
+  * 'content' (the cleaned text) is stored as a blob and referenced by
+    'content_ref'; with --drop-inline-content it is deleted from the
+    document as well (only once nothing reads it from Firestore anymore)
+
+Afterwards it reports the average size of an article read before and
+after, computed with Firestore's document size rules, and how much the
+blob store holds.
+
+Safe to re-run: blobs are content-addressed, and documents that are
+already migrated are left alone. An inline body is only deleted once its
+blob reads back identical from the store.
+
+With the local backend the blobs exist only on the machine running this
+script, so no inline body is deleted (only references are added) unless
+--allow-local-store is passed, e.g. for a single-machine deployment.
+
+Usage:
+    python migrate_article_bodies.py [--page-size 200] [--limit N] [--drop-inline-content] [--dry-run]
+                                     [--allow-local-store]
+"""
+
+import sys
+import os
+import argparse
+from datetime import datetime
+from dotenv import load_dotenv
+
+# --- Path Setup ---
+current_dir = os.path.dirname(__file__)
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+python_services_dir = os.path.join(project_root, 'python_services')
+sys.path.append(python_services_dir)
+
+# --- Load Environment Variables ---
+env_path = os.path.join(project_root, '.env')
+if os.path.exists(env_path):
+    load_dotenv(dotenv_path=env_path)
+
+from firebase_admin import firestore
+from shared.database.firestore_client import get_db
+from shared.database.article_cache import CARD_FIELDS
+from shared.storage.compression import compress_text
+from shared.storage.content_store import get_content_store, content_ref, BODY_REF_FIELDS
+
+WRITE_BATCH_SIZE = 500  # Firestore's limit per batch
+
+
+# --- Firestore document size (https://firebase.google.com/docs/firestore/storage-size) ---
+def _value_size(value) -> int:
+    if value is None or isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float, datetime)):
+        return 8
+    if isinstance(value, str):
+        return len(value.encode("utf-8")) + 1
+    if isinstance(value, bytes):
+        return len(value)
+    if isinstance(value, (list, tuple)):
+        return sum(_value_size(item) for item in value)
+    if isinstance(value, dict):
+        return sum(len(key.encode("utf-8")) + 1 + _value_size(item) for key, item in value.items())
+    return 8
+
+
+def document_size(doc_id: str, data: dict) -> int:
+    """Storage size of articles/<doc_id> as Firestore counts it (name + fields + 32 bytes)."""
+    name_size = len("articles") + 1 + len(doc_id) + 1 + 16
+    return name_size + _value_size(data) + 32
+
+
+def migrate(page_size: int = 200, limit: int | None = None, drop_inline_content: bool = False, dry_run: bool = False,
+            allow_local_store: bool = False):
+    print("=" * 45)
+    print("  MIGRATING ARTICLE BODIES TO THE CONTENT STORE")
+    print("=" * 45)
+
+    db = get_db()
+    store = get_content_store()
+    print(f"Content store backend: {store.name}")
+    # Deleting inline bodies is only safe when every service can read the blobs
+    delete_inline = store.shared or allow_local_store
+    if not delete_inline:
+        print("⚠️ The local content store is not shared with the deployed services: inline bodies are kept "
+              "and only references are added. Use a shared backend (CONTENT_STORE_BACKEND=gcs) "
+              "or pass --allow-local-store.")
+
+    stats = {"documents": 0, "migrated": 0, "bytes_before": 0, "bytes_after": 0,
+             "card_bytes": 0, "body_bytes": 0, "blob_bytes": 0, "verify_failed": 0}
+    batch, pending = db.batch(), 0
+    last = None
+    while limit is None or stats["documents"] < limit:
+        size = page_size if limit is None else min(page_size, limit - stats["documents"])
+        query = db.collection("articles").order_by("__name__").limit(size)
+        if last is not None:
+            query = query.start_after(last)
+        page = list(query.stream())
+        if not page:
+            break
+        last = page[-1]
+
+        for doc in page:
+            data = doc.to_dict() or {}
+            stats["documents"] += 1
+            stats["bytes_before"] += document_size(doc.id, data)
+            stats["card_bytes"] += document_size(doc.id, {f: data.get(f) for f in CARD_FIELDS if f in data})
+
+            after, update = dict(data), {}
+            for field, ref_field in BODY_REF_FIELDS.items():
+                text = data.get(field)
+                if not text:
+                    continue
+                keep_inline = (field == "content" and not drop_inline_content) or not delete_inline
+                if data.get(ref_field) and keep_inline:
+                    continue
+                stats["body_bytes"] += len(text.encode("utf-8"))
+                stats["blob_bytes"] += len(compress_text(text))
+                ref = content_ref(text) if dry_run else store.put(text)
+                if not keep_inline and not dry_run and store.get(ref) != text:
+                    print(f"  -> {doc.id}: '{field}' did not read back from the store; keeping it inline.")
+                    stats["verify_failed"] += 1
+                    keep_inline = True
+                after[ref_field] = update[ref_field] = ref
+                if not keep_inline:
+                    after.pop(field)
+                    update[field] = firestore.DELETE_FIELD
+            stats["bytes_after"] += document_size(doc.id, after)
+
+            if update:
+                stats["migrated"] += 1
+                batch.update(doc.reference, update)
+                pending += 1
+                if pending == WRITE_BATCH_SIZE:
+                    if not dry_run:
+                        batch.commit()
+                    batch, pending = db.batch(), 0
+        print(f"  -> Processed {stats['documents']} articles ({stats['migrated']} migrated).")
+        if len(page) < size:
+            break
+
+    if pending and not dry_run:
+        batch.commit()
+    report(stats, dry_run)
+
+
+def report(stats: dict, dry_run: bool = False):
+    """Prints the bytes per article read before and after the migration."""
+    n = stats["documents"] or 1
+    print("\n" + "=" * 45)
+    print("  MIGRATION FINISHED" + (" (dry run, nothing written)" if dry_run else ""))
+    print(f"  Articles: {stats['documents']} ({stats['migrated']} migrated)")
+    print(f"  Bytes per full article read: {stats['bytes_before'] / n:,.0f} -> {stats['bytes_after'] / n:,.0f}")
+    print(f"  Bytes per card read (select): {stats['card_bytes'] / n:,.0f}")
+    if stats["verify_failed"]:
+        print(f"  ⚠️ Bodies kept inline because the blob did not read back: {stats['verify_failed']}")
+    if stats["body_bytes"]:
+        print(f"  Bodies moved: {stats['body_bytes']:,} bytes -> {stats['blob_bytes']:,} bytes compressed "
+              f"({stats['body_bytes'] / max(stats['blob_bytes'], 1):.1f}x)")
+    print("=" * 45)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move article bodies from Firestore into the content store.")
+    parser.add_argument("--page-size", type=int, default=200, help="Articles read per Firestore query.")
+    parser.add_argument("--limit", type=int, help="Stop after this many articles.")
+    parser.add_argument("--drop-inline-content", action="store_true",
+                        help="Also delete the cleaned 'content' from the documents (set ARTICLE_INLINE_CONTENT=false too).")
+    parser.add_argument("--dry-run", action="store_true", help="Report the savings without writing anything.")
+    parser.add_argument("--allow-local-store", action="store_true",
+                        help="Delete inline bodies even with the local backend (only if every service runs on this machine).")
+    args = parser.parse_args()
+    migrate(args.page_size, args.limit, args.drop_inline_content, args.dry_run, args.allow_local_store)
@@ -0,0 +1,237 @@
+"""
+Document ID Migration
+---------------------
+Moves articles from the old URL-derived IDs (url.replace('/', '_')...) to
+the fixed-length hashed IDs from shared/utils/urls.make_doc_id, in bulk:
+
+  1. Firestore: each article is copied to its new ID (with `canonical_url`
+     and `legacy_id` added) and the old document is deleted. Articles whose
+     canonical URL was already stored under another document are duplicates
+     and are simply deleted.
+  2. Vector store: vectors are re-keyed to the new IDs (duplicates dropped).
+  3. Users: `bookmarkedArticles` entries are rewritten to the new IDs.
+
+The old -> new mapping is appended to a JSON Lines file next to this
+script before each Firestore batch that moves those articles is committed,
+so it survives a crash mid-run. Pass that file to --resume to finish an
+interrupted migration: its mapping is re-keyed in the vector store and the
+bookmarks too.
+
+Usage:
+    python migrate_doc_ids.py [--dry-run] [--resume doc_id_migration_<timestamp>.jsonl]
+"""
+
+import sys
+import os
+import json
+import argparse
+from datetime import datetime
+from dotenv import load_dotenv
+
+# --- Path Setup ---
+current_dir = os.path.dirname(__file__)
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+python_services_dir = os.path.join(project_root, 'python_services')
+sys.path.append(python_services_dir)
+
+# --- Load Environment Variables ---
+env_path = os.path.join(project_root, '.env')
+if os.path.exists(env_path):
+    load_dotenv(dotenv_path=env_path)
+
+# --- Import Shared Modules ---
+try:
+    from shared.database.firestore_client import db
+    from shared.utils.urls import canonicalize_url, make_doc_id
+except ImportError as e:
+    print(f"FATAL: Could not import shared modules. Error: {e}")
+    sys.exit(1)
+
+PAGE_SIZE = 200
+# Each migrated article costs two writes (set + delete); Firestore allows 500 per batch.
+BATCH_OPERATIONS = 450
+
+
+class _BatchWriter:
+    """
+    Accumulates writes into Firestore batches and commits them as they fill
+    up. Mapping entries recorded with a batch are appended to `mapping_path`
+    before it is committed.
+    """
+
+    def __init__(self, dry_run: bool, mapping_path: str | None = None):
+        self.dry_run = dry_run
+        self.mapping_path = mapping_path
+        self.batch = db.batch()
+        self.pending = 0
+        self.committed = 0
+        self.pending_mapping = {}
+
+    def record(self, old_id: str, new_id: str):
+        self.pending_mapping[old_id] = new_id
+
+    def set(self, ref, data):
+        self.batch.set(ref, data)
+        self._count()
+
+    def update(self, ref, data):
+        self.batch.update(ref, data)
+        self._count()
+
+    def delete(self, ref):
+        self.batch.delete(ref)
+        self._count()
+
+    def _count(self):
+        self.pending += 1
+        if self.pending >= BATCH_OPERATIONS:
+            self.flush()
+
+    def flush(self):
+        if self.pending_mapping and self.mapping_path and not self.dry_run:
+            with open(self.mapping_path, "a") as f:
+                for old_id, new_id in self.pending_mapping.items():
+                    f.write(json.dumps({"old": old_id, "new": new_id}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        self.pending_mapping = {}
+        if self.pending and not self.dry_run:
+            self.batch.commit()
+        self.committed += self.pending
+        self.batch = db.batch()
+        self.pending = 0
+
+
+def migrate_articles(writer: _BatchWriter) -> tuple[dict, dict]:
+    """Rewrites article documents page by page. Returns (mapping, stats)."""
+    articles = db.collection('articles')
+    mapping = {}
+    claimed = set()
+    stats = {"scanned": 0, "migrated": 0, "duplicates_removed": 0, "already_migrated": 0, "no_url": 0,
+             "old_id_chars": 0, "new_id_chars": 0}
+
+    last_doc = None
+    while True:
+        query = articles.order_by('__name__').limit(PAGE_SIZE)
+        if last_doc is not None:
+            query = query.start_after(last_doc)
+        page = list(query.stream())
+        if not page:
+            break
+        last_doc = page[-1]
+
+        # Find out in one round trip which target IDs already exist.
+        targets = {}
+        for doc in page:
+            new_id = make_doc_id((doc.to_dict() or {}).get('url', ''))
+            if new_id and new_id != doc.id:
+                targets[doc.id] = new_id
+        existing = {
+            snapshot.id for snapshot in db.get_all([articles.document(t) for t in set(targets.values())], field_paths=['url'])
+            if snapshot.exists
+        } if targets else set()
+
+        for doc in page:
+            stats["scanned"] += 1
+            data = doc.to_dict() or {}
+            new_id = make_doc_id(data.get('url', ''))
+            if not new_id:
+                stats["no_url"] += 1
+                continue
+            stats["old_id_chars"] += len(doc.id)
+            stats["new_id_chars"] += len(new_id)
+            if new_id == doc.id:
+                stats["already_migrated"] += 1
+                claimed.add(new_id)
+                continue
+
+            mapping[doc.id] = new_id
+            writer.record(doc.id, new_id)
+            if new_id in existing or new_id in claimed:
+                writer.delete(doc.reference)
+                stats["duplicates_removed"] += 1
+                continue
+
+            claimed.add(new_id)
+            writer.set(articles.document(new_id), {
+                **data,
+                'canonical_url': canonicalize_url(data['url']),
+                'legacy_id': doc.id,
+                'updatedAt': datetime.utcnow(),
+            })
+            writer.delete(doc.reference)
+            stats["migrated"] += 1
+
+        print(f"--- Scanned {stats['scanned']} articles ({stats['migrated']} migrated, "
+              f"{stats['duplicates_removed']} duplicates) ---")
+
+    writer.flush()
+    return mapping, stats
+
+
+def migrate_bookmarks(writer: _BatchWriter, mapping: dict) -> int:
+    """Rewrites users' bookmarkedArticles to the new IDs. Returns users updated."""
+    updated = 0
+    for user_doc in db.collection('users').stream():
+        bookmarks = (user_doc.to_dict() or {}).get('bookmarkedArticles') or []
+        rewritten = list(dict.fromkeys(mapping.get(article_id, article_id) for article_id in bookmarks))
+        if rewritten != bookmarks:
+            writer.update(user_doc.reference, {'bookmarkedArticles': rewritten})
+            updated += 1
+    writer.flush()
+    return updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate articles to canonical hashed document IDs.")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing.")
+    parser.add_argument("--resume", help="Mapping file of an interrupted run, to finish and append to.")
+    args = parser.parse_args()
+
+    print("\n" + "=" * 45)
+    print("  STARTING DOCUMENT ID MIGRATION" + (" (DRY RUN)" if args.dry_run else ""))
+    print("=" * 45)
+
+    mapping_path = args.resume or os.path.join(current_dir, f"doc_id_migration_{datetime.utcnow():%Y%m%d%H%M%S}.jsonl")
+    previous = {}
+    if args.resume:
+        with open(args.resume) as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    previous[entry["old"]] = entry["new"]
+        print(f"Resuming: {len(previous)} articles were moved by the interrupted run.")
+
+    writer = _BatchWriter(args.dry_run, mapping_path)
+    mapping, stats = migrate_articles(writer)
+    mapping = {**previous, **mapping}
+
+    renamed_vectors = 0
+    if mapping and not args.dry_run:
+        from shared.database.vector_store import get_vector_store
+        store = get_vector_store()
+        renamed_vectors = store.rename_ids(mapping)
+        store.persist()
+
+    users_updated = migrate_bookmarks(writer, mapping) if mapping else 0
+
+    counted = stats["scanned"] - stats["no_url"]
+    print("\n" + "=" * 45)
+    print("  DOCUMENT ID MIGRATION FINISHED")
+    print(f"  Articles scanned:     {stats['scanned']}")
+    print(f"  Migrated:             {stats['migrated']}")
+    print(f"  Duplicates removed:   {stats['duplicates_removed']}")
+    print(f"  Already migrated:     {stats['already_migrated']}")
+    print(f"  Vectors re-keyed:     {renamed_vectors}")
+    print(f"  Users' bookmarks:     {users_updated}")
+    if counted:
+        print(f"  Avg ID length:        {stats['old_id_chars'] / counted:.0f} -> {stats['new_id_chars'] / counted:.0f} chars")
+    print(f"  Firestore writes:     {writer.committed}")
+    if not args.dry_run:
+        print(f"  Mapping saved to:     {mapping_path}")
+    print("  Re-run build_related_articles.py so related_ids use the new IDs.")
+    print("=" * 45)
+
+
+if __name__ == "__main__":
+    main()
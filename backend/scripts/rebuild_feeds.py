@@ -0,0 +1,48 @@
+"""
+Feed Snapshot Rebuild
+---------------------
+Rebuilds the precomputed feed documents (feeds/all and feeds/<category>)
+from the newest completed articles. The pipeline and the summarizer keep
+the feeds current incrementally; run this once to create them, or after
+articles were edited or deleted by hand.
+
+Usage:
+    python rebuild_feeds.py [--size 50]
+"""
+
+import sys
+import os
+import argparse
+from dotenv import load_dotenv
+
+# --- Path Setup ---
+current_dir = os.path.dirname(__file__)
+project_root = os.path.abspath(os.path.join(current_dir, '..'))
+python_services_dir = os.path.join(project_root, 'python_services')
+sys.path.append(python_services_dir)
+
+# --- Load Environment Variables ---
+env_path = os.path.join(project_root, '.env')
+if os.path.exists(env_path):
+    load_dotenv(dotenv_path=env_path)
+
+from shared.database.feed_snapshots import rebuild_feeds, FEED_SIZE, FEEDS_COLLECTION
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the per-category feed snapshot documents.")
+    parser.add_argument("--size", type=int, default=FEED_SIZE, help="Cards kept per feed.")
+    args = parser.parse_args()
+
+    print("=" * 45)
+    print("  REBUILDING FEED SNAPSHOTS")
+    print("=" * 45)
+
+    sizes = rebuild_feeds(size=args.size)
+    for name, count in sizes.items():
+        print(f"  {FEEDS_COLLECTION}/{name}: {count} cards")
+    print("=" * 45)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,8 +9,10 @@ const ArticleDetail = () => {
   const { id } = useParams();
   const location = useLocation();
   const navigate = useNavigate();
-  const [article, setArticle] = useState(location.state || null);
-  const [loading, setLoading] = useState(!location.state);
+  // Feed cards only carry an excerpt, so the full article is read by ID
+  const passed = location.state?.feedCard ? null : location.state;
+  const [article, setArticle] = useState(passed || null);
+  const [loading, setLoading] = useState(!passed);
   const articleRef = useRef(null);
 
   // 🔥 Fetch from Firestore if article not passed through navigation
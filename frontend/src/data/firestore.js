@@ -10,11 +10,32 @@ import {
   getDoc,
 } from "firebase/firestore";
 
+/**
+ * Read a precomputed feed document (feeds/{category} or feeds/all).
+ * The backend keeps each one up to date as a single ordered array of article
+ * cards, so a feed costs one small read. Returns null if there is no feed yet.
+ */
+async function getFeed(category, max) {
+  const feedSnap = await getDoc(
+    doc(db, "feeds", category ? category.toLowerCase() : "all")
+  );
+  const cards = feedSnap.exists() ? feedSnap.data().articles || [] : [];
+  return cards.length ? cards.slice(0, max) : null;
+}
+
 /**
  * Fetch articles from Firestore
- * Includes automatic fallback if index is missing.
+ * Reads the feed snapshot first and only queries the articles collection
+ * when it is missing. Includes automatic fallback if index is missing.
  */
 export async function getArticles(category = null, max = 20) {
+  try {
+    const feed = await getFeed(category, max);
+    if (feed) return feed;
+  } catch (err) {
+    console.warn("⚠️ Feed snapshot unavailable — querying articles.", err);
+  }
+
   try {
     const articlesRef = collection(db, "articles");
     let q;